@@ -0,0 +1,84 @@
+"""Shared helpers for parsing LLM extraction responses.
+
+Used by both the event and payment extractors so parsing fixes and optimizations land in one place.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+
+import orjson
+
+
+def parse_iso_date(value: str | None) -> date | None:
+    """Parse a model-provided YYYY-MM-DD string, returning None when missing or invalid."""
+
+    if not value:
+        return None
+    s = str(value).strip()
+    if not s:
+        return None
+    try:
+        return date.fromisoformat(s)
+    except ValueError:
+        return None
+
+
+def find_json_object(raw: str) -> str | None:
+    """Return the first balanced `{...}` region in `raw`, or None.
+
+    A single linear pass tracking brace depth and JSON string state (honouring escapes), which
+    stops at the end of the first object instead of scanning to the last `}` in the text.
+    """
+
+    start = raw.find("{")
+    if start < 0:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(raw)):
+        ch = raw[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return raw[start : i + 1]
+    return None
+
+
+def extract_json_object(raw: str) -> dict:
+    """Extract the first JSON object from a raw model response."""
+
+    raw = (raw or "").strip()
+    if not raw:
+        raise ValueError("empty model response")
+
+    # Fast path: direct JSON (always taken when the backend honours constrained decoding).
+    try:
+        obj = orjson.loads(raw)
+        if isinstance(obj, dict):
+            return obj
+    except Exception:
+        pass
+
+    # Tolerant path for servers that ignore the format constraint: find {...} region.
+    snippet = find_json_object(raw)
+    if snippet is None:
+        raise ValueError("model response did not contain a JSON object")
+
+    obj = orjson.loads(snippet)
+    if not isinstance(obj, dict):
+        raise ValueError("extracted JSON was not an object")
+    return obj
@@ -0,0 +1,21 @@
+"""Cheap relevance screens run before an LLM extraction call.
+
+The LLM call dominates extraction cost, and in inbox-wide scans most emails are neither events
+nor payments. A keyword/shape regex over the subject and the head of the body lets us skip those
+emails in microseconds. The screens are tuned for recall: a false positive only costs the LLM call
+we would have made anyway.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+# Only the start of the body is screened; relevant details are almost always near the top.
+PREFILTER_HEAD_CHARS = 4096
+
+
+def matches_prefilter(pattern: Any, *, subject: str | None, body: str | None) -> bool:
+    """Return True if `pattern` matches the subject or the head of the body."""
+
+    text = f"{subject or ''}\n{(body or '')[:PREFILTER_HEAD_CHARS]}"
+    return pattern.search(text) is not None
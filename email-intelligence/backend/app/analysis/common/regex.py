@@ -0,0 +1,15 @@
+"""Regex engine used by analysis hot paths.
+
+google-re2 (optional) gives linear-time (DFA) matching on arbitrary email/model text. Every
+pattern compiled through this module must stay RE2-compatible (no backreferences or
+lookarounds) so the stdlib engine is a drop-in fallback.
+"""
+
+from __future__ import annotations
+
+try:
+    import re2 as engine  # type: ignore[import-not-found]
+except ImportError:
+    import re as engine
+
+__all__ = ["engine"]
@@ -0,0 +1,92 @@
+"""Content-aware body trimming for extraction prompts.
+
+Prompt prefill time grows linearly with prompt length, and most of a marketing/receipt email is
+boilerplate. Instead of sending the first 20 kB of the body, we split it into paragraphs, score
+each one by how many hint patterns (dates, times, amounts, domain keywords) it matches, and keep
+the best-scoring paragraphs (in original order) up to a small character budget. Paragraphs larger
+than the budget (HTML-to-text bodies often have no blank lines) are split into lines first.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Sequence
+
+from app.analysis.common.regex import engine
+
+# Target size of the trimmed body; roughly 1k tokens.
+SALIENT_BUDGET_CHARS = 4_000
+
+_MONTHS = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*"
+
+DATE_HINT_RE = engine.compile(
+    r"(?i)\b\d{4}-\d{2}-\d{2}\b|\b\d{1,2}/\d{1,2}/\d{2,4}\b"
+    rf"|\b{_MONTHS}\s+\d{{1,2}}\b|\b\d{{1,2}}(?:st|nd|rd|th)?\s+{_MONTHS}\b"
+    r"|\b(?:mon|tues?|wed(?:nes)?|thu(?:rs)?|fri|sat(?:ur)?|sun)(?:day)?\b"
+)
+TIME_HINT_RE = engine.compile(r"(?i)\b\d{1,2}[:.]\d{2}\b|\b\d{1,2}\s?(?:am|pm)\b")
+AMOUNT_HINT_RE = engine.compile(r"(?i)[£€$]\s?\d|\b(?:gbp|usd|eur)\b|\b\d+[.,]\d{2}\b")
+
+_PARAGRAPH_SPLIT_RE = engine.compile(r"\n[ \t]*\n")
+
+
+def _split_chunks(body: str, budget_chars: int) -> list[str]:
+    # Paragraphs that fit the budget are kept whole; larger ones are split into lines, and lines
+    # that are still too large are cut into budget-sized pieces, so every chunk can be selected.
+    chunks: list[str] = []
+    for para in _PARAGRAPH_SPLIT_RE.split(body):
+        para = para.strip()
+        if len(para) <= budget_chars:
+            chunks.append(para)
+            continue
+        for line in para.split("\n"):
+            line = line.strip()
+            chunks.extend(line[i : i + budget_chars] for i in range(0, len(line), budget_chars))
+    return chunks
+
+
+def trim_to_salient_spans(
+    body: str | None,
+    patterns: Sequence[Any],
+    *,
+    budget_chars: int = SALIENT_BUDGET_CHARS,
+) -> str:
+    """Return the most relevant paragraphs of `body` within `budget_chars`.
+
+    Args:
+        body: Email body text.
+        patterns: Compiled hint patterns; a paragraph scores one point per pattern it matches.
+        budget_chars: Maximum size of the trimmed body.
+
+    Returns:
+        The selected paragraphs in original order, joined by blank lines; the head of the body
+        (cut to `budget_chars`) when no paragraph matches any pattern.
+    """
+
+    body = (body or "").strip()
+    if len(body) <= budget_chars:
+        return body
+
+    chunks = _split_chunks(body, budget_chars)
+    scored = []
+    for idx, chunk in enumerate(chunks):
+        if not chunk:
+            continue
+        score = sum(1 for p in patterns if p.search(chunk))
+        if score:
+            scored.append((score, idx))
+
+    # Highest score first; ties keep the earlier paragraph.
+    scored.sort(key=lambda t: (-t[0], t[1]))
+
+    keep: list[int] = []
+    used = 0
+    for _, idx in scored:
+        cost = len(chunks[idx]) + (2 if keep else 0)
+        if used + cost > budget_chars:
+            continue
+        keep.append(idx)
+        used += cost
+
+    if not keep:
+        return body[:budget_chars]
+    return "\n\n".join(chunks[idx] for idx in sorted(keep))
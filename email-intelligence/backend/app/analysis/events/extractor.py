@@ -6,32 +6,45 @@ It is best-effort: failures should be recorded per-message rather than aborting
 
 from __future__ import annotations
 
-import json
 import logging
-import re
-import urllib.request
-from datetime import date, time
+from datetime import time
+from typing import Sequence
 
+from pydantic import TypeAdapter
+
+from app.analysis.batch import DEFAULT_MAX_WORKERS, ExtractionInput
+from app.analysis.common.llm_io import extract_json_object, parse_iso_date
+from app.analysis.common.prefilter import matches_prefilter
+from app.analysis.common.regex import engine as _regex
 from app.analysis.events.heuristics import infer_end_time
 from app.analysis.events.models import EventExtraction, NormalizedEventExtraction
 from app.analysis.events.prompt import PROMPT_VERSION, build_event_extraction_prompt
+from app.analysis.llm_backend import (
+    LLMBackend,
+    generate_cached,
+    generate_many_cached,
+    resolve_backend,
+)
 
 logger = logging.getLogger(__name__)
 
 
-_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.S)
+# Built once per process: the adapter holds the compiled validator, and the schema is passed to the
+# backend for constrained decoding so responses are valid JSON up front.
+_EVENT_ADAPTER = TypeAdapter(EventExtraction)
+_EVENT_JSON_SCHEMA = _EVENT_ADAPTER.json_schema()
 
+_MONTHS = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*"
 
-def _parse_iso_date(value: str | None) -> date | None:
-    if not value:
-        return None
-    s = str(value).strip()
-    if not s:
-        return None
-    try:
-        return date.fromisoformat(s)
-    except ValueError:
-        return None
+# Recall-oriented screen: booking/event vocabulary, or a time/date-shaped token.
+_LOOKS_LIKE_EVENT_RE = _regex.compile(
+    r"(?i)\b(?:ticket|book|reserv|appointment|event|show|perform|concert|gig|theat|cinema|"
+    r"screening|film|movie|doors|venue|seat|admission|itinerar|check-in|festival|match|"
+    r"comedy|opera|ballet|dinner|party|table for)"
+    r"|\b\d{1,2}[:.]\d{2}\b|\b\d{1,2}\s?(?:am|pm)\b"
+    r"|\b\d{4}-\d{2}-\d{2}\b|\b\d{1,2}/\d{1,2}/\d{2,4}\b"
+    rf"|\b{_MONTHS}\s+\d{{1,2}}\b|\b\d{{1,2}}(?:st|nd|rd|th)?\s+{_MONTHS}\b"
+)
 
 
 def _parse_hhmm(value: str | None) -> time | None:
@@ -50,32 +63,7 @@ def _parse_hhmm(value: str | None) -> time | None:
         return None
 
 
-def _extract_json_object(raw: str) -> dict:
-    """Extract the first JSON object from a raw model response."""
-
-    raw = (raw or "").strip()
-    if not raw:
-        raise ValueError("empty model response")
-
-    # Fast path: direct JSON.
-    try:
-        obj = json.loads(raw)
-        if isinstance(obj, dict):
-            return obj
-    except Exception:
-        pass
-
-    # Tolerant path: find {...} region.
-    m = _JSON_OBJECT_RE.search(raw)
-    if not m:
-        raise ValueError("model response did not contain a JSON object")
-
-    snippet = m.group(0)
-    obj = json.loads(snippet)
-    if not isinstance(obj, dict):
-        raise ValueError("extracted JSON was not an object")
-    return obj
-
+_CANONICAL_EVENT_TYPES = ("Theatre", "Comedy", "Opera", "Ballet", "Cinema", "Social", "Other")
 
 _ALLOWED_EVENT_TYPES: dict[str, str] = {
     "theatre": "Theatre",
@@ -90,6 +78,28 @@ _ALLOWED_EVENT_TYPES: dict[str, str] = {
     "other": "Other",
 }
 
+# Older/previous prompt categories mapped into the closest new bucket.
+_LEGACY_EVENT_TYPES: dict[str, str] = {
+    "concert": "Other",
+    "gig": "Other",
+    "music": "Other",
+    "sports": "Other",
+    "sport": "Other",
+    "travel": "Other",
+    "meeting": "Other",
+    "dinner": "Social",
+    "restaurant": "Social",
+    "party": "Social",
+    "appointment": "Other",
+}
+
+# Single casefolded lookup: canonical values, synonyms and legacy categories.
+_EVENT_TYPE_MAP: dict[str, str] = {
+    **_LEGACY_EVENT_TYPES,
+    **_ALLOWED_EVENT_TYPES,
+    **{c.casefold(): c for c in _CANONICAL_EVENT_TYPES},
+}
+
 
 def _normalize_event_type(value: str | None) -> str | None:
     """Normalize a model-provided event type to the canonical allowed set.
@@ -104,88 +114,20 @@ def _normalize_event_type(value: str | None) -> str | None:
     if not raw:
         return None
 
-    # If it's already one of the canonical values, accept it.
-    canonical = {"Theatre", "Comedy", "Opera", "Ballet", "Cinema", "Social", "Other"}
-    if raw in canonical:
-        return raw
-
-    key = raw.casefold()
-
-    # Map common synonyms.
-    if key in _ALLOWED_EVENT_TYPES:
-        return _ALLOWED_EVENT_TYPES[key]
-
-    # Map older/previous prompt categories into the closest new bucket.
-    legacy_to_new = {
-        "concert": "Other",
-        "gig": "Other",
-        "music": "Other",
-        "sports": "Other",
-        "sport": "Other",
-        "travel": "Other",
-        "meeting": "Other",
-        "dinner": "Social",
-        "restaurant": "Social",
-        "party": "Social",
-        "appointment": "Other",
-    }
-    if key in legacy_to_new:
-        return legacy_to_new[key]
-
     # If we can't confidently map it, return Other rather than leaking free-form strings.
-    return "Other"
-
-
-def _call_ollama_generate(*, host: str, model: str, prompt: str, timeout_seconds: int = 60) -> str:
-    host = host.rstrip("/")
-
-    payload = json.dumps({"model": model, "prompt": prompt, "stream": False}).encode("utf-8")
-    req = urllib.request.Request(
-        url=f"{host}/api/generate",
-        data=payload,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-
-    with urllib.request.urlopen(req, timeout=timeout_seconds) as resp:  # noqa: S310
-        data = json.loads(resp.read().decode("utf-8"))
-
-    return (data.get("response") or "").strip()
-
-
-def extract_event_from_email(
-    *,
-    ollama_host: str,
-    ollama_model: str,
-    subject: str | None,
-    from_domain: str | None,
-    internal_date_iso: str | None,
-    body: str,
-) -> NormalizedEventExtraction:
-    """Extract a single event from an email body.
+    return _EVENT_TYPE_MAP.get(raw.casefold(), "Other")
 
-    Returns a normalized object ready for DB persistence.
 
-    Notes:
-        We do not invent end times in the prompt. If end_time is missing but
-        event_type/start_time/date are present, we infer a best-guess and mark it.
-    """
+def _normalize_event_response(raw: str, *, model: str) -> NormalizedEventExtraction:
+    """Parse and normalize a raw model response into a persistable extraction."""
 
-    prompt = build_event_extraction_prompt(
-        subject=subject,
-        from_domain=from_domain,
-        internal_date_iso=internal_date_iso,
-        body=body,
-    )
+    raw_obj = extract_json_object(raw)
 
-    raw = _call_ollama_generate(host=ollama_host, model=ollama_model, prompt=prompt)
-    raw_obj = _extract_json_object(raw)
-
-    parsed = EventExtraction.model_validate(raw_obj)
+    parsed = _EVENT_ADAPTER.validate_python(raw_obj)
 
     normalized_event_type = _normalize_event_type(parsed.event_type)
 
-    ev_date = _parse_iso_date(parsed.event_date)
+    ev_date = parse_iso_date(parsed.event_date)
     start_t = _parse_hhmm(parsed.start_time)
     end_t = _parse_hhmm(parsed.end_time)
 
@@ -217,7 +159,137 @@ def extract_event_from_email(
         end_time_inferred=end_inferred,
         confidence=parsed.confidence,
         raw_json=raw_obj,
-        model=ollama_model,
+        model=model,
         prompt_version=PROMPT_VERSION,
         notes=_clean_str(parsed.notes),
     )
+
+
+def _prefiltered_event(*, model: str) -> NormalizedEventExtraction:
+    """Empty extraction recorded when the pre-filter rules an email out without an LLM call."""
+
+    return NormalizedEventExtraction(
+        event_name=None,
+        event_type=None,
+        event_date=None,
+        start_time=None,
+        end_time=None,
+        timezone=None,
+        confidence=0.0,
+        model=model,
+        prompt_version=PROMPT_VERSION,
+        notes="skipped by pre-filter: no event indicators",
+        prefiltered=True,
+    )
+
+
+def looks_like_event(*, subject: str | None, body: str | None) -> bool:
+    """Cheap screen: False means the email is very unlikely to describe an event."""
+
+    return matches_prefilter(_LOOKS_LIKE_EVENT_RE, subject=subject, body=body)
+
+
+def extract_event_from_email(
+    *,
+    ollama_host: str | None = None,
+    ollama_model: str | None = None,
+    subject: str | None,
+    from_domain: str | None,
+    internal_date_iso: str | None,
+    body: str,
+    backend: LLMBackend | None = None,
+    prefilter: bool = True,
+) -> NormalizedEventExtraction:
+    """Extract a single event from an email body.
+
+    Returns a normalized object ready for DB persistence.
+
+    Notes:
+        We do not invent end times in the prompt. If end_time is missing but
+        event_type/start_time/date are present, we infer a best-guess and mark it.
+
+        With `prefilter` enabled, emails with no event indicators (see `looks_like_event`) return
+        an empty extraction without calling the LLM.
+    """
+
+    llm = resolve_backend(backend, ollama_host=ollama_host, ollama_model=ollama_model)
+    if prefilter and not looks_like_event(subject=subject, body=body):
+        logger.debug("event_extract_prefiltered", extra={"from_domain": from_domain})
+        return _prefiltered_event(model=llm.model)
+
+    prompt = build_event_extraction_prompt(
+        subject=subject,
+        from_domain=from_domain,
+        internal_date_iso=internal_date_iso,
+        body=body,
+    )
+    raw = generate_cached(llm, prompt, namespace=PROMPT_VERSION, json_schema=_EVENT_JSON_SCHEMA)
+    return _normalize_event_response(raw, model=llm.model)
+
+
+def extract_events_batch(
+    emails: Sequence[ExtractionInput],
+    *,
+    ollama_host: str | None = None,
+    ollama_model: str | None = None,
+    backend: LLMBackend | None = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    prefilter: bool = True,
+) -> list[NormalizedEventExtraction | Exception]:
+    """Extract events from many emails, dispatching LLM calls concurrently.
+
+    With the default Ollama backend, prompts are grouped into length bins (see
+    `app.analysis.batch`) so each concurrent wave finishes together.
+
+    Args:
+        emails: Emails to extract from.
+        ollama_host: Ollama base URL (ignored when `backend` is given).
+        ollama_model: Model name (ignored when `backend` is given).
+        backend: LLM backend to use; defaults to Ollama at `ollama_host`.
+        max_workers: Maximum number of concurrent calls for the default Ollama backend.
+        prefilter: Skip the LLM for emails with no event indicators (see `looks_like_event`).
+
+    Returns:
+        One entry per input, in order: the extraction, or the exception raised for that email.
+    """
+
+    llm = resolve_backend(
+        backend, ollama_host=ollama_host, ollama_model=ollama_model, max_workers=max_workers
+    )
+
+    results: list[NormalizedEventExtraction | Exception | None] = [None] * len(emails)
+    kept: list[int] = []
+    for idx, e in enumerate(emails):
+        if prefilter and not looks_like_event(subject=e.subject, body=e.body):
+            results[idx] = _prefiltered_event(model=llm.model)
+        else:
+            kept.append(idx)
+
+    if prefilter:
+        # Per-batch detail only; callers log the aggregate skip count for a whole run.
+        logger.debug(
+            "event_extract_prefilter",
+            extra={"total": len(emails), "skipped": len(emails) - len(kept)},
+        )
+
+    prompts = [
+        build_event_extraction_prompt(
+            subject=emails[idx].subject,
+            from_domain=emails[idx].from_domain,
+            internal_date_iso=emails[idx].internal_date_iso,
+            body=emails[idx].body,
+        )
+        for idx in kept
+    ]
+    raws = generate_many_cached(
+        llm, prompts, namespace=PROMPT_VERSION, json_schema=_EVENT_JSON_SCHEMA
+    )
+    for idx, raw in zip(kept, raws):
+        if isinstance(raw, Exception):
+            results[idx] = raw
+            continue
+        try:
+            results[idx] = _normalize_event_response(raw, model=llm.model)
+        except Exception as e:  # noqa: BLE001
+            results[idx] = e
+    return results  # type: ignore[return-value]
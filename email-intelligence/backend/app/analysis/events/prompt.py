@@ -2,8 +2,43 @@
 
 from __future__ import annotations
 
+from app.analysis.common.regex import engine
+from app.analysis.common.salient import DATE_HINT_RE, TIME_HINT_RE, trim_to_salient_spans
 
-PROMPT_VERSION = "event-extract-v2"
+
+PROMPT_VERSION = "event-extract-v3"
+
+_VENUE_HINT_RE = engine.compile(
+    r"(?i)\b(?:venue|theat|cinema|screen|doors|seat|row|stall|circle|admission|ticket|booking|"
+    r"reservation|appointment|address|location|arrive|performance|show)"
+)
+
+# Paragraph scoring for body trimming (see `app.analysis.common.salient`).
+_EVENT_HINT_PATTERNS = (DATE_HINT_RE, TIME_HINT_RE, _VENUE_HINT_RE)
+
+_EVENT_PREFIX = (
+    "You are an assistant that extracts calendar event details from emails.\n"
+    "Your job is to identify whether this email contains details for a single event (tickets, bookings, reservations, appointments).\n\n"
+    "Return ONLY valid JSON. No markdown. No code fences. No commentary.\n"
+    "If the email does not describe an event, return JSON with event_name/event_date/start_time/end_time all null and confidence <= 0.2.\n\n"
+    "Extract these fields:\n"
+    "- event_name: string|null (a concise human title)\n"
+    "- event_date: string|null in ISO date format YYYY-MM-DD\n"
+    "- start_time: string|null in 24h time HH:MM\n"
+    "- end_time: string|null in 24h time HH:MM (if unknown, set null)\n"
+    "- timezone: string|null (prefer IANA name like 'Europe/London'; else offset like '+01:00')\n"
+    "- event_type: string|null chosen from {Theatre, Comedy, Opera, Ballet, Cinema, Social, Other}\n"
+    "- confidence: number 0..1\n"
+    "- notes: string|null (brief, only if ambiguous)\n\n"
+    "Rules:\n"
+    "- Use only information supported by the email content.\n"
+    "- Do not invent an end_time. If not present, set end_time to null (it may be inferred later by the system).\n"
+    "- If you choose an event_type, it MUST be exactly one of the allowed values (case-sensitive).\n"
+    "- If multiple events are present, pick the most prominent one and mention that in notes.\n\n"
+)
+
+_EVENT_BODY_OPEN = "Email body:\n---\n"
+_EVENT_BODY_CLOSE = "\n---\n"
 
 
 def build_event_extraction_prompt(
@@ -30,33 +65,12 @@ def build_event_extraction_prompt(
     subj = (subject or "").strip()
     dom = (from_domain or "").strip()
 
-    # Keep body bounded; upstream caller should already trim, but belt + braces.
-    body = (body or "").strip()
-    if len(body) > 20_000:
-        body = body[:20_000]
-
-    return (
-        "You are an assistant that extracts calendar event details from emails.\n"
-        "Your job is to identify whether this email contains details for a single event (tickets, bookings, reservations, appointments).\n\n"
-        "Return ONLY valid JSON. No markdown. No code fences. No commentary.\n"
-        "If the email does not describe an event, return JSON with event_name/event_date/start_time/end_time all null and confidence <= 0.2.\n\n"
-        "Extract these fields:\n"
-        "- event_name: string|null (a concise human title)\n"
-        "- event_date: string|null in ISO date format YYYY-MM-DD\n"
-        "- start_time: string|null in 24h time HH:MM\n"
-        "- end_time: string|null in 24h time HH:MM (if unknown, set null)\n"
-        "- timezone: string|null (prefer IANA name like 'Europe/London'; else offset like '+01:00')\n"
-        "- event_type: string|null chosen from {Theatre, Comedy, Opera, Ballet, Cinema, Social, Other}\n"
-        "- confidence: number 0..1\n"
-        "- notes: string|null (brief, only if ambiguous)\n\n"
-        "Rules:\n"
-        "- Use only information supported by the email content.\n"
-        "- Do not invent an end_time. If not present, set end_time to null (it may be inferred later by the system).\n"
-        "- If you choose an event_type, it MUST be exactly one of the allowed values (case-sensitive).\n"
-        "- If multiple events are present, pick the most prominent one and mention that in notes.\n\n"
-        f"Context hints (may be missing): subject={subj!r}, from_domain={dom!r}, received_at={internal_date_iso!r}.\n\n"
-        "Email body:\n"
-        "---\n"
-        f"{body}\n"
-        "---\n"
+    # Keep only the paragraphs that carry hints; prefill cost scales with prompt length.
+    body = trim_to_salient_spans(body, _EVENT_HINT_PATTERNS)
+
+    # Only the hints line and the body vary per email; everything else is a module constant.
+    hints = (
+        f"Context hints (may be missing): subject={subj!r}, from_domain={dom!r}, "
+        f"received_at={internal_date_iso!r}.\n\n"
     )
+    return "".join((_EVENT_PREFIX, hints, _EVENT_BODY_OPEN, body, _EVENT_BODY_CLOSE))
@@ -0,0 +1,381 @@
+"""LLM backends used by the extraction pipelines.
+
+Extraction only needs "prompt in, text out", so we hide the inference server behind a tiny
+protocol. Two implementations exist:
+
+- `OllamaBackend`: the default; talks to Ollama's `/api/generate` one prompt per request and
+  relies on client-side concurrency for batches. Responses are streamed so JSON output can be
+  cut off once the object is complete.
+- `VLLMBackend`: talks to an OpenAI-compatible `/v1/completions` endpoint (e.g. vLLM). It sends
+  a whole batch as a prompt array so the server can schedule it with continuous batching.
+
+The backend is selected via settings (`EMAIL_INTEL_LLM_BACKEND=ollama|vllm`).
+
+Both backends support constrained decoding: when a JSON schema is passed, Ollama is asked for
+`format: "json"` and vLLM for `guided_json: <schema>`, so responses parse without scraping.
+
+`generate_cached` / `generate_many_cached` add an in-process LRU keyed by
+(backend, prompt version, prompt hash), so retries and re-runs skip the LLM entirely.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import http.client
+import threading
+import urllib.parse
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Protocol, Sequence
+
+import orjson
+
+from app.analysis.batch import DEFAULT_MAX_WORKERS, run_binned
+from app.analysis.common.llm_io import find_json_object
+
+if TYPE_CHECKING:
+    from app.settings import Settings
+
+
+class LLMBackend(Protocol):
+    """Minimal text-generation interface used by the extractors."""
+
+    model: str
+
+    def generate(self, prompt: str, *, json_schema: dict | None = None) -> str:
+        """Return the model completion for a single prompt.
+
+        If `json_schema` is given, the backend constrains decoding to JSON (as strictly as the
+        server supports).
+        """
+        ...
+
+    def generate_many(
+        self, prompts: Sequence[str], *, json_schema: dict | None = None
+    ) -> list[str | Exception]:
+        """Return completions for many prompts (in order), isolating per-item failures."""
+        ...
+
+
+# Keep-alive connections, one per (scheme, host) per thread. Batch jobs issue thousands of
+# requests to the same server, so reusing the socket avoids a TCP handshake per email.
+# Thread-local because http.client connections are not thread-safe.
+_local = threading.local()
+
+
+def _connection(scheme: str, netloc: str, timeout_seconds: int) -> http.client.HTTPConnection:
+    conns: dict[tuple[str, str], http.client.HTTPConnection] | None = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+
+    conn = conns.get((scheme, netloc))
+    if conn is None:
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        conn = cls(netloc, timeout=timeout_seconds)
+        conns[(scheme, netloc)] = conn
+
+    conn.timeout = timeout_seconds
+    if conn.sock is not None:
+        conn.sock.settimeout(timeout_seconds)
+    return conn
+
+
+def _send(
+    url: str, payload: dict, *, timeout_seconds: int
+) -> tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+    """POST `payload` as JSON and return the connection with its (unread) response."""
+
+    parts = urllib.parse.urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path = f"{path}?{parts.query}"
+    body = orjson.dumps(payload)
+
+    for attempt in range(2):
+        conn = _connection(parts.scheme, parts.netloc, timeout_seconds)
+        reused = conn.sock is not None
+        try:
+            conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+            resp = conn.getresponse()
+        except (ConnectionError, http.client.BadStatusLine):
+            conn.close()
+            # The server may have closed an idle keep-alive socket; retry once on a fresh one.
+            if reused and attempt == 0:
+                continue
+            raise
+        except Exception:
+            conn.close()
+            raise
+
+        if resp.status >= 400:
+            snippet = resp.read()[:500].decode("utf-8", errors="replace")
+            raise RuntimeError(f"LLM backend returned HTTP {resp.status} for {url}: {snippet}")
+        return conn, resp
+
+    raise AssertionError("unreachable")
+
+
+def _post_json(url: str, payload: dict, *, timeout_seconds: int) -> dict:
+    conn, resp = _send(url, payload, timeout_seconds=timeout_seconds)
+    try:
+        data = resp.read()
+    except Exception:
+        conn.close()
+        raise
+    return orjson.loads(data)
+
+
+def _post_stream_text(
+    url: str, payload: dict, *, timeout_seconds: int, field: str, stop_at_json: bool
+) -> str:
+    """POST a streaming request and concatenate `field` from each NDJSON chunk.
+
+    With `stop_at_json`, reading stops as soon as the text holds a complete `{...}` object; the
+    connection is then closed, which also cancels the rest of the generation server-side.
+    Servers that ignore streaming and return a single JSON body are read in full.
+    """
+
+    conn, resp = _send(url, payload, timeout_seconds=timeout_seconds)
+    try:
+        if "ndjson" not in (resp.getheader("Content-Type") or ""):
+            return orjson.loads(resp.read()).get(field) or ""
+
+        pieces: list[str] = []
+        for line in resp:
+            line = line.strip()
+            if not line:
+                continue
+            chunk = orjson.loads(line)
+            if chunk.get("error"):
+                raise RuntimeError(f"LLM backend stream error for {url}: {chunk['error']}")
+            piece = chunk.get(field) or ""
+            pieces.append(piece)
+            if stop_at_json and "}" in piece:
+                text = "".join(pieces)
+                if find_json_object(text) is not None:
+                    conn.close()
+                    return text
+        # Read to EOF (past the final `done` chunk) so the keep-alive socket can be reused.
+        return "".join(pieces)
+    except Exception:
+        conn.close()
+        raise
+
+
+@dataclass(frozen=True)
+class OllamaBackend:
+    """Ollama `/api/generate` backend."""
+
+    host: str
+    model: str
+    timeout_seconds: int = 60
+    max_workers: int = DEFAULT_MAX_WORKERS
+
+    def generate(self, prompt: str, *, json_schema: dict | None = None) -> str:
+        # Streamed so JSON responses can be cut off as soon as the object is complete, instead
+        # of waiting for the model's trailing tokens.
+        payload: dict = {"model": self.model, "prompt": prompt, "stream": True}
+        if json_schema is not None:
+            # `format: "json"` is supported by every Ollama release; schema objects need >= 0.5.
+            payload["format"] = "json"
+
+        text = _post_stream_text(
+            f"{self.host.rstrip('/')}/api/generate",
+            payload,
+            timeout_seconds=self.timeout_seconds,
+            field="response",
+            stop_at_json=json_schema is not None,
+        )
+        return text.strip()
+
+    def generate_many(
+        self, prompts: Sequence[str], *, json_schema: dict | None = None
+    ) -> list[str | Exception]:
+        return run_binned(
+            prompts,
+            lambda p: self.generate(p, json_schema=json_schema),
+            size_of=len,
+            max_workers=self.max_workers,
+        )
+
+
+@dataclass(frozen=True)
+class VLLMBackend:
+    """OpenAI-compatible `/v1/completions` backend (vLLM, etc.)."""
+
+    host: str
+    model: str
+    timeout_seconds: int = 300
+    max_tokens: int = 512
+
+    def generate(self, prompt: str, *, json_schema: dict | None = None) -> str:
+        out = self.generate_many([prompt], json_schema=json_schema)[0]
+        if isinstance(out, Exception):
+            raise out
+        return out
+
+    def generate_many(
+        self, prompts: Sequence[str], *, json_schema: dict | None = None
+    ) -> list[str | Exception]:
+        if not prompts:
+            return []
+
+        payload: dict = {
+            "model": self.model,
+            "prompt": list(prompts),
+            "max_tokens": int(self.max_tokens),
+            "temperature": 0,
+        }
+        if json_schema is not None:
+            payload["guided_json"] = json_schema
+
+        try:
+            data = _post_json(
+                f"{self.host.rstrip('/')}/v1/completions",
+                payload,
+                timeout_seconds=self.timeout_seconds,
+            )
+        except Exception as e:  # noqa: BLE001
+            # A single request carries the whole batch, so a transport error fails every item.
+            return [e] * len(prompts)
+
+        results: list[str | Exception] = [
+            ValueError("completion missing from response") for _ in prompts
+        ]
+        for choice in data.get("choices") or []:
+            idx = choice.get("index")
+            if isinstance(idx, int) and 0 <= idx < len(prompts):
+                results[idx] = (choice.get("text") or "").strip()
+        return results
+
+
+def build_llm_backend(settings: Settings) -> LLMBackend | None:
+    """Build the configured extraction backend.
+
+    Returns:
+        The backend, or None if the selected backend has no host configured.
+
+    Raises:
+        ValueError: If `llm_backend` names an unknown backend.
+    """
+
+    kind = (settings.llm_backend or "ollama").strip().lower()
+    if kind == "ollama":
+        if not settings.ollama_host:
+            return None
+        return OllamaBackend(host=settings.ollama_host, model=settings.ollama_model)
+    if kind == "vllm":
+        if not settings.vllm_host:
+            return None
+        return VLLMBackend(
+            host=settings.vllm_host,
+            model=settings.vllm_model or settings.ollama_model,
+            max_tokens=int(settings.llm_max_tokens),
+        )
+    raise ValueError(f"Unknown llm_backend: {settings.llm_backend!r} (expected ollama|vllm)")
+
+
+def resolve_backend(
+    backend: LLMBackend | None,
+    *,
+    ollama_host: str | None,
+    ollama_model: str | None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> LLMBackend:
+    """Return `backend`, or an Ollama backend built from the legacy host/model arguments."""
+
+    if backend is not None:
+        return backend
+    if not ollama_host or not ollama_model:
+        raise ValueError("Either backend or ollama_host/ollama_model must be provided")
+    return OllamaBackend(host=ollama_host, model=ollama_model, max_workers=max_workers)
+
+
+class _ResponseCache:
+    """Small thread-safe LRU for raw model responses."""
+
+    def __init__(self, maxsize: int) -> None:
+        self._maxsize = int(maxsize)
+        self._data: OrderedDict[tuple, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> str | None:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: tuple, value: str) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+RESPONSE_CACHE_MAXSIZE = 10_000
+
+_response_cache = _ResponseCache(RESPONSE_CACHE_MAXSIZE)
+
+
+def _cache_key(
+    llm: LLMBackend, prompt: str, *, namespace: str, json_schema: dict | None
+) -> tuple:
+    # Backends are frozen dataclasses, so they hash by (host, model, ...). The namespace is the
+    # prompt version: bumping it invalidates every cached response for the old contract.
+    digest = hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).hexdigest()
+    return (llm, namespace, json_schema is not None, digest)
+
+
+def generate_cached(
+    llm: LLMBackend, prompt: str, *, namespace: str, json_schema: dict | None = None
+) -> str:
+    """`llm.generate` with an in-process LRU in front of it.
+
+    Only successful responses are cached; failures are retried on the next call.
+    """
+
+    key = _cache_key(llm, prompt, namespace=namespace, json_schema=json_schema)
+    hit = _response_cache.get(key)
+    if hit is not None:
+        return hit
+
+    out = llm.generate(prompt, json_schema=json_schema)
+    _response_cache.put(key, out)
+    return out
+
+
+def generate_many_cached(
+    llm: LLMBackend,
+    prompts: Sequence[str],
+    *,
+    namespace: str,
+    json_schema: dict | None = None,
+) -> list[str | Exception]:
+    """`llm.generate_many` that only sends cache misses (deduplicated) to the backend."""
+
+    keys = [_cache_key(llm, p, namespace=namespace, json_schema=json_schema) for p in prompts]
+    results: list[str | Exception | None] = [_response_cache.get(k) for k in keys]
+
+    pending: dict[tuple, list[int]] = {}
+    for idx, (key, hit) in enumerate(zip(keys, results)):
+        if hit is None:
+            pending.setdefault(key, []).append(idx)
+
+    if pending:
+        miss_keys = list(pending)
+        outputs = llm.generate_many(
+            [prompts[pending[k][0]] for k in miss_keys], json_schema=json_schema
+        )
+        for key, out in zip(miss_keys, outputs):
+            if not isinstance(out, Exception):
+                _response_cache.put(key, out)
+            for idx in pending[key]:
+                results[idx] = out
+
+    return results  # type: ignore[return-value]
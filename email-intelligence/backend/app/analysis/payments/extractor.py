@@ -6,54 +6,33 @@ It is best-effort: failures should be recorded per-message rather than aborting
 
 from __future__ import annotations
 
-import json
-import re
-import urllib.request
+import logging
+import math
 from datetime import date
 from decimal import Decimal, InvalidOperation
-
+from typing import Sequence
+
+from pydantic import TypeAdapter
+
+from app.analysis.batch import DEFAULT_MAX_WORKERS, ExtractionInput
+from app.analysis.common.llm_io import extract_json_object, parse_iso_date
+from app.analysis.common.prefilter import matches_prefilter
+from app.analysis.common.regex import engine as _regex
+from app.analysis.llm_backend import (
+    LLMBackend,
+    generate_cached,
+    generate_many_cached,
+    resolve_backend,
+)
 from app.analysis.payments.models import NormalizedPaymentExtraction, PaymentExtraction
 from app.analysis.payments.prompt import PROMPT_VERSION, build_payment_extraction_prompt
 
+logger = logging.getLogger(__name__)
 
-_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.S)
-
-
-def _parse_iso_date(value: str | None) -> date | None:
-    if not value:
-        return None
-    s = str(value).strip()
-    if not s:
-        return None
-    try:
-        return date.fromisoformat(s)
-    except ValueError:
-        return None
-
-
-def _extract_json_object(raw: str) -> dict:
-    """Extract the first JSON object from a raw model response."""
-
-    raw = (raw or "").strip()
-    if not raw:
-        raise ValueError("empty model response")
-
-    try:
-        obj = json.loads(raw)
-        if isinstance(obj, dict):
-            return obj
-    except Exception:
-        pass
-
-    m = _JSON_OBJECT_RE.search(raw)
-    if not m:
-        raise ValueError("model response did not contain a JSON object")
-
-    snippet = m.group(0)
-    obj = json.loads(snippet)
-    if not isinstance(obj, dict):
-        raise ValueError("extracted JSON was not an object")
-    return obj
+# Built once per process: the adapter holds the compiled validator, and the schema is passed to the
+# backend for constrained decoding so responses are valid JSON up front.
+_PAYMENT_ADAPTER = TypeAdapter(PaymentExtraction)
+_PAYMENT_JSON_SCHEMA = _PAYMENT_ADAPTER.json_schema()
 
 
 _CURRENCY_SYMBOLS = {
@@ -62,6 +41,24 @@ _CURRENCY_SYMBOLS = {
     "$": "USD",
 }
 
+# Precompiled: these run for every extracted payment.
+# One scan of the model's cost_amount string yields the currency symbol, a 3-letter currency code
+# and the numeric token together.
+_COST_TOKEN_RE = _regex.compile(r"(?P<sym>[£€$])|\b(?P<code>[A-Za-z]{3})\b|(?P<num>\d[\d.,]*)")
+_AMOUNT_RE = _regex.compile(r"\d+(?:\.\d+)?")
+_NONALNUM_RE = _regex.compile(r"[^a-z0-9]+")
+
+# Recall-oriented screen: payment vocabulary, currency symbols/codes, or a money-shaped number.
+_LOOKS_LIKE_PAYMENT_RE = _regex.compile(
+    r"(?i)\b(?:receipt|invoice|payment|paid|pay|charge|order|purchase|subscri|renew|"
+    r"billing|bill|total|amount|refund|price|cost|fee|direct debit|statement|transaction)"
+    r"|[£€$]|\b(?:gbp|usd|eur)\b|\b\d+[.,]\d{2}\b"
+)
+
+# Translation tables so comma cleanup is one C-level pass instead of a replace per character.
+_DECIMAL_COMMA_TABLE = str.maketrans({",": "."})
+_GROUPING_COMMA_TABLE = str.maketrans("", "", ",")
+
 
 def _normalize_currency(value: str | None) -> str | None:
     if not value:
@@ -72,33 +69,23 @@ def _normalize_currency(value: str | None) -> str | None:
     return raw.upper()
 
 
-def _parse_amount(value: str | float | None) -> Decimal | None:
-    if value is None:
-        return None
-
-    if isinstance(value, (int, float, Decimal)):
-        try:
-            return Decimal(str(value))
-        except InvalidOperation:
-            return None
-
-    raw = str(value).strip()
-    if not raw:
-        return None
-
-    # Remove currency symbols and thousands separators.
-    for sym in _CURRENCY_SYMBOLS:
-        raw = raw.replace(sym, "")
+def _parse_numeric_amount(value: int | float | Decimal) -> Decimal | None:
+    # Numeric JSON values skip the string clean-up.
+    if isinstance(value, Decimal):
+        return value if value.is_finite() else None
+    if isinstance(value, int):
+        return Decimal(value)
+    # repr() is the shortest round-tripping form, so 12.5 -> Decimal("12.5") rather than the
+    # exact binary expansion Decimal(12.5) would give for values like 0.1.
+    return Decimal(repr(value)) if math.isfinite(value) else None
 
-    # Detect decimal comma if no dot present.
-    if "," in raw and "." not in raw:
-        raw = raw.replace(",", ".")
 
-    # Strip remaining grouping commas.
-    raw = raw.replace(",", "")
+def _parse_amount_token(token: str) -> Decimal | None:
+    # Decimal comma if no dot present; otherwise commas are thousands separators.
+    if "," in token:
+        token = token.translate(_DECIMAL_COMMA_TABLE if "." not in token else _GROUPING_COMMA_TABLE)
 
-    # Extract first numeric pattern.
-    m = re.search(r"\d+(?:\.\d+)?", raw)
+    m = _AMOUNT_RE.match(token)
     if not m:
         return None
 
@@ -108,19 +95,32 @@ def _parse_amount(value: str | float | None) -> Decimal | None:
         return None
 
 
-def _parse_currency_from_text(value: str | None) -> str | None:
-    if not value:
-        return None
-    raw = str(value)
-    for sym, code in _CURRENCY_SYMBOLS.items():
-        if sym in raw:
-            return code
-
-    m = re.search(r"\b([A-Za-z]{3})\b", raw)
-    if not m:
-        return None
+def _parse_cost(value: str | float | None) -> tuple[Decimal | None, str | None]:
+    """Split the model's `cost_amount` into (amount, currency inferred from the same text)."""
 
-    return m.group(1).upper()
+    if value is None or isinstance(value, bool):
+        return None, None
+    if isinstance(value, (int, float, Decimal)):
+        return _parse_numeric_amount(value), None
+
+    sym: str | None = None
+    code: str | None = None
+    num: str | None = None
+    for m in _COST_TOKEN_RE.finditer(str(value)):
+        kind = m.lastgroup
+        if kind == "sym":
+            sym = sym or m.group("sym")
+        elif kind == "code":
+            code = code or m.group("code")
+        elif num is None:
+            num = m.group("num")
+        if sym is not None and num is not None:
+            break
+
+    # A currency symbol wins over a 3-letter code.
+    currency = _CURRENCY_SYMBOLS[sym] if sym is not None else (code.upper() if code else None)
+    amount = _parse_amount_token(num) if num is not None else None
+    return amount, currency
 
 
 _ALLOWED_FREQUENCIES = {
@@ -149,6 +149,21 @@ _ALLOWED_CATEGORIES = {
     "other": "Other",
 }
 
+# Single casefolded lookups. "every <period>" aliases are folded into the frequency map so
+# normalization is one dict.get instead of a lookup, a prefix check and a second lookup.
+_FREQUENCY_MAP: dict[str, str] = {
+    **{f"every {k}": v for k, v in _ALLOWED_FREQUENCIES.items()},
+    **_ALLOWED_FREQUENCIES,
+}
+
+_CATEGORY_MAP: dict[str, str] = {
+    **_ALLOWED_CATEGORIES,
+    **{
+        c.casefold(): c
+        for c in ("Food", "Entertainment", "Technology", "Lifestyle", "Domestic Bills", "Other")
+    },
+}
+
 
 def _normalize_frequency(value: str | None) -> str | None:
     if not value:
@@ -157,17 +172,7 @@ def _normalize_frequency(value: str | None) -> str | None:
     if not raw:
         return None
 
-    key = raw.casefold()
-    if key in _ALLOWED_FREQUENCIES:
-        return _ALLOWED_FREQUENCIES[key]
-
-    # Handle "every <period>" patterns.
-    if key.startswith("every "):
-        key = key.replace("every ", "", 1).strip()
-        if key in _ALLOWED_FREQUENCIES:
-            return _ALLOWED_FREQUENCIES[key]
-
-    return None
+    return _FREQUENCY_MAP.get(raw.casefold())
 
 
 def _normalize_name(value: str | None) -> str | None:
@@ -183,7 +188,7 @@ def _normalize_vendor_key(value: str | None) -> str | None:
     raw = str(value).strip().casefold()
     if not raw:
         return None
-    return re.sub(r"[^a-z0-9]+", "", raw)
+    return _NONALNUM_RE.sub("", raw)
 
 
 def _normalize_category(value: str | None) -> str | None:
@@ -193,15 +198,7 @@ def _normalize_category(value: str | None) -> str | None:
     if not raw:
         return None
 
-    canonical = {"Food", "Entertainment", "Technology", "Lifestyle", "Domestic Bills", "Other"}
-    if raw in canonical:
-        return raw
-
-    key = raw.casefold()
-    if key in _ALLOWED_CATEGORIES:
-        return _ALLOWED_CATEGORIES[key]
-
-    return "Other"
+    return _CATEGORY_MAP.get(raw.casefold(), "Other")
 
 
 def _compute_fingerprint(
@@ -222,62 +219,21 @@ def _compute_fingerprint(
     return f"{vendor_key}|{amount_key}|{cost_currency}|{payment_date.isoformat()}"
 
 
-def _call_ollama_generate(*, host: str, model: str, prompt: str, timeout_seconds: int = 60) -> str:
-    host = host.rstrip("/")
+def _normalize_payment_response(raw: str, *, model: str) -> NormalizedPaymentExtraction:
+    """Parse and normalize a raw model response into a persistable extraction."""
 
-    payload = json.dumps({"model": model, "prompt": prompt, "stream": False}).encode("utf-8")
-    req = urllib.request.Request(
-        url=f"{host}/api/generate",
-        data=payload,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
+    raw_obj = extract_json_object(raw)
 
-    with urllib.request.urlopen(req, timeout=timeout_seconds) as resp:  # noqa: S310
-        data = json.loads(resp.read().decode("utf-8"))
-
-    return (data.get("response") or "").strip()
-
-
-def extract_payment_from_email(
-    *,
-    ollama_host: str,
-    ollama_model: str,
-    subject: str | None,
-    from_domain: str | None,
-    internal_date_iso: str | None,
-    body: str,
-) -> NormalizedPaymentExtraction:
-    """Extract a single payment from an email body.
-
-    Returns a normalized object ready for DB persistence.
-    """
-
-    prompt = build_payment_extraction_prompt(
-        subject=subject,
-        from_domain=from_domain,
-        internal_date_iso=internal_date_iso,
-        body=body,
-    )
-
-    raw = _call_ollama_generate(host=ollama_host, model=ollama_model, prompt=prompt)
-    raw_obj = _extract_json_object(raw)
-
-    parsed = PaymentExtraction.model_validate(raw_obj)
+    parsed = _PAYMENT_ADAPTER.validate_python(raw_obj)
 
     item_name = _normalize_name(parsed.item_name)
     vendor_name = _normalize_name(parsed.vendor_name)
     item_category = _normalize_category(parsed.item_category)
 
-    currency_hint = _normalize_currency(parsed.cost_currency)
-    currency_from_amount = _parse_currency_from_text(
-        parsed.cost_amount if parsed.cost_amount is not None else None
-    )
-    cost_currency = currency_hint or currency_from_amount
-
-    cost_amount = _parse_amount(parsed.cost_amount)
+    cost_amount, currency_from_amount = _parse_cost(parsed.cost_amount)
+    cost_currency = _normalize_currency(parsed.cost_currency) or currency_from_amount
 
-    payment_date = _parse_iso_date(parsed.payment_date)
+    payment_date = parse_iso_date(parsed.payment_date)
 
     frequency = _normalize_frequency(parsed.frequency)
     is_recurring = parsed.is_recurring
@@ -306,7 +262,136 @@ def extract_payment_from_email(
         payment_fingerprint=fingerprint,
         confidence=parsed.confidence,
         raw_json=raw_obj,
-        model=ollama_model,
+        model=model,
         prompt_version=PROMPT_VERSION,
         notes=_normalize_name(parsed.notes),
     )
+
+
+def _prefiltered_payment(*, model: str) -> NormalizedPaymentExtraction:
+    """Empty extraction recorded when the pre-filter rules an email out without an LLM call."""
+
+    return NormalizedPaymentExtraction(
+        item_name=None,
+        vendor_name=None,
+        item_category=None,
+        cost_amount=None,
+        cost_currency=None,
+        is_recurring=None,
+        frequency=None,
+        payment_date=None,
+        payment_fingerprint=None,
+        confidence=0.0,
+        model=model,
+        prompt_version=PROMPT_VERSION,
+        notes="skipped by pre-filter: no payment indicators",
+        prefiltered=True,
+    )
+
+
+def looks_like_payment(*, subject: str | None, body: str | None) -> bool:
+    """Cheap screen: False means the email is very unlikely to describe a payment."""
+
+    return matches_prefilter(_LOOKS_LIKE_PAYMENT_RE, subject=subject, body=body)
+
+
+def extract_payment_from_email(
+    *,
+    ollama_host: str | None = None,
+    ollama_model: str | None = None,
+    subject: str | None,
+    from_domain: str | None,
+    internal_date_iso: str | None,
+    body: str,
+    backend: LLMBackend | None = None,
+    prefilter: bool = True,
+) -> NormalizedPaymentExtraction:
+    """Extract a single payment from an email body.
+
+    Returns a normalized object ready for DB persistence.
+
+    With `prefilter` enabled, emails with no payment indicators (see `looks_like_payment`) return
+    an empty extraction without calling the LLM.
+    """
+
+    llm = resolve_backend(backend, ollama_host=ollama_host, ollama_model=ollama_model)
+    if prefilter and not looks_like_payment(subject=subject, body=body):
+        logger.debug("payment_extract_prefiltered", extra={"from_domain": from_domain})
+        return _prefiltered_payment(model=llm.model)
+
+    prompt = build_payment_extraction_prompt(
+        subject=subject,
+        from_domain=from_domain,
+        internal_date_iso=internal_date_iso,
+        body=body,
+    )
+    raw = generate_cached(llm, prompt, namespace=PROMPT_VERSION, json_schema=_PAYMENT_JSON_SCHEMA)
+    return _normalize_payment_response(raw, model=llm.model)
+
+
+def extract_payments_batch(
+    emails: Sequence[ExtractionInput],
+    *,
+    ollama_host: str | None = None,
+    ollama_model: str | None = None,
+    backend: LLMBackend | None = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    prefilter: bool = True,
+) -> list[NormalizedPaymentExtraction | Exception]:
+    """Extract payments from many emails, dispatching LLM calls concurrently.
+
+    With the default Ollama backend, prompts are grouped into length bins (see
+    `app.analysis.batch`) so each concurrent wave finishes together.
+
+    Args:
+        emails: Emails to extract from.
+        ollama_host: Ollama base URL (ignored when `backend` is given).
+        ollama_model: Model name (ignored when `backend` is given).
+        backend: LLM backend to use; defaults to Ollama at `ollama_host`.
+        max_workers: Maximum number of concurrent calls for the default Ollama backend.
+        prefilter: Skip the LLM for emails with no payment indicators (see `looks_like_payment`).
+
+    Returns:
+        One entry per input, in order: the extraction, or the exception raised for that email.
+    """
+
+    llm = resolve_backend(
+        backend, ollama_host=ollama_host, ollama_model=ollama_model, max_workers=max_workers
+    )
+
+    results: list[NormalizedPaymentExtraction | Exception | None] = [None] * len(emails)
+    kept: list[int] = []
+    for idx, e in enumerate(emails):
+        if prefilter and not looks_like_payment(subject=e.subject, body=e.body):
+            results[idx] = _prefiltered_payment(model=llm.model)
+        else:
+            kept.append(idx)
+
+    if prefilter:
+        # Per-batch detail only; callers log the aggregate skip count for a whole run.
+        logger.debug(
+            "payment_extract_prefilter",
+            extra={"total": len(emails), "skipped": len(emails) - len(kept)},
+        )
+
+    prompts = [
+        build_payment_extraction_prompt(
+            subject=emails[idx].subject,
+            from_domain=emails[idx].from_domain,
+            internal_date_iso=emails[idx].internal_date_iso,
+            body=emails[idx].body,
+        )
+        for idx in kept
+    ]
+    raws = generate_many_cached(
+        llm, prompts, namespace=PROMPT_VERSION, json_schema=_PAYMENT_JSON_SCHEMA
+    )
+    for idx, raw in zip(kept, raws):
+        if isinstance(raw, Exception):
+            results[idx] = raw
+            continue
+        try:
+            results[idx] = _normalize_payment_response(raw, model=llm.model)
+        except Exception as e:  # noqa: BLE001
+            results[idx] = e
+    return results  # type: ignore[return-value]
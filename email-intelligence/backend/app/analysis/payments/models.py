@@ -65,3 +65,5 @@ class NormalizedPaymentExtraction(BaseModel):
     model: str | None = None
     prompt_version: str | None = None
     notes: str | None = None
+    # True when the relevance pre-filter ruled the email out without an LLM call.
+    prefiltered: bool = False
@@ -2,7 +2,46 @@
 
 from __future__ import annotations
 
-PROMPT_VERSION = "payment-extract-v1"
+from app.analysis.common.regex import engine
+from app.analysis.common.salient import AMOUNT_HINT_RE, DATE_HINT_RE, trim_to_salient_spans
+
+PROMPT_VERSION = "payment-extract-v2"
+
+_PAYMENT_HINT_RE = engine.compile(
+    r"(?i)\b(?:total|subtotal|amount|paid|charge|price|cost|invoice|receipt|order|subscri|"
+    r"renew|billing|payment|vat|tax|refund|monthly|annual|yearly)"
+)
+
+# Paragraph scoring for body trimming (see `app.analysis.common.salient`).
+_PAYMENT_HINT_PATTERNS = (AMOUNT_HINT_RE, DATE_HINT_RE, _PAYMENT_HINT_RE)
+
+_PAYMENT_PREFIX = (
+    "You are an assistant that extracts payment details from emails.\n"
+    "Your job is to identify whether this email contains a payment or charge (receipts, invoices, renewals).\n\n"
+    "Return ONLY valid JSON. No markdown. No code fences. No commentary.\n"
+    "If the email does not describe a payment, return JSON with item_name/vendor_name/cost_amount/cost_currency/payment_date all null and confidence <= 0.2.\n\n"
+    "Extract these fields:\n"
+    "- item_name: string|null (concise name of the purchased item or service)\n"
+    "- vendor_name: string|null (merchant or supplier)\n"
+    "- item_category: string|null chosen from {Food, Entertainment, Technology, Lifestyle, Domestic Bills, Other}\n"
+    "- cost_amount: number|string|null (numeric amount, no currency symbols preferred)\n"
+    "- cost_currency: string|null (ISO-4217 like GBP, USD, EUR)\n"
+    "- is_recurring: boolean|null (true if recurring, false if one-off)\n"
+    "- frequency: string|null chosen from {daily, weekly, biweekly, monthly, quarterly, yearly}\n"
+    "- payment_date: string|null in ISO date format YYYY-MM-DD\n"
+    "- confidence: number 0..1\n"
+    "- notes: string|null (brief, only if ambiguous)\n\n"
+    "Rules:\n"
+    "- Use only information supported by the email content.\n"
+    "- If you choose a category, it MUST be exactly one of the allowed values (case-sensitive).\n"
+    "- If recurring, set is_recurring=true and include frequency.\n"
+    "- If one-off, set is_recurring=false and frequency=null.\n"
+    "- If you choose a frequency, it MUST be exactly one of the allowed values (lowercase).\n"
+    "- If multiple payments are present, pick the most prominent one and mention that in notes.\n\n"
+)
+
+_PAYMENT_BODY_OPEN = "Email body:\n---\n"
+_PAYMENT_BODY_CLOSE = "\n---\n"
 
 
 def build_payment_extraction_prompt(
@@ -27,36 +66,12 @@ def build_payment_extraction_prompt(
     subj = (subject or "").strip()
     dom = (from_domain or "").strip()
 
-    body = (body or "").strip()
-    if len(body) > 20_000:
-        body = body[:20_000]
-
-    return (
-        "You are an assistant that extracts payment details from emails.\n"
-        "Your job is to identify whether this email contains a payment or charge (receipts, invoices, renewals).\n\n"
-        "Return ONLY valid JSON. No markdown. No code fences. No commentary.\n"
-        "If the email does not describe a payment, return JSON with item_name/vendor_name/cost_amount/cost_currency/payment_date all null and confidence <= 0.2.\n\n"
-        "Extract these fields:\n"
-        "- item_name: string|null (concise name of the purchased item or service)\n"
-        "- vendor_name: string|null (merchant or supplier)\n"
-        "- item_category: string|null chosen from {Food, Entertainment, Technology, Lifestyle, Domestic Bills, Other}\n"
-        "- cost_amount: number|string|null (numeric amount, no currency symbols preferred)\n"
-        "- cost_currency: string|null (ISO-4217 like GBP, USD, EUR)\n"
-        "- is_recurring: boolean|null (true if recurring, false if one-off)\n"
-        "- frequency: string|null chosen from {daily, weekly, biweekly, monthly, quarterly, yearly}\n"
-        "- payment_date: string|null in ISO date format YYYY-MM-DD\n"
-        "- confidence: number 0..1\n"
-        "- notes: string|null (brief, only if ambiguous)\n\n"
-        "Rules:\n"
-        "- Use only information supported by the email content.\n"
-        "- If you choose a category, it MUST be exactly one of the allowed values (case-sensitive).\n"
-        "- If recurring, set is_recurring=true and include frequency.\n"
-        "- If one-off, set is_recurring=false and frequency=null.\n"
-        "- If you choose a frequency, it MUST be exactly one of the allowed values (lowercase).\n"
-        "- If multiple payments are present, pick the most prominent one and mention that in notes.\n\n"
-        f"Context hints (may be missing): subject={subj!r}, from_domain={dom!r}, received_at={internal_date_iso!r}.\n\n"
-        "Email body:\n"
-        "---\n"
-        f"{body}\n"
-        "---\n"
+    # Keep only the paragraphs that carry hints; prefill cost scales with prompt length.
+    body = trim_to_salient_spans(body, _PAYMENT_HINT_PATTERNS)
+
+    # Only the hints line and the body vary per email; everything else is a module constant.
+    hints = (
+        f"Context hints (may be missing): subject={subj!r}, from_domain={dom!r}, "
+        f"received_at={internal_date_iso!r}.\n\n"
     )
+    return "".join((_PAYMENT_PREFIX, hints, _PAYMENT_BODY_OPEN, body, _PAYMENT_BODY_CLOSE))
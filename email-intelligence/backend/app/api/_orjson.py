@@ -0,0 +1,40 @@
+"""orjson-backed JSON responses for large read endpoints.
+
+Returning a `Response` from a route bypasses FastAPI's `jsonable_encoder` walk and response-model
+re-validation. Routes keep `response_model=` for the OpenAPI schema; the payload they return must
+already match it.
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# Match pydantic's JSON: aware UTC datetimes end in "Z"; naive ones are emitted without an offset.
+_OPTIONS = orjson.OPT_UTC_Z
+
+
+def _default(obj: Any) -> Any:
+    # orjson handles datetime/date/time natively; only the leftovers land here.
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize `content` the same way `ORJSONResponse` does."""
+
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (UTC datetimes with `Z`, Decimals as floats)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -7,183 +7,261 @@ Builds a hierarchy suitable for both:
 Hierarchy: taxonomy category → subcategory → cluster → sender.
 
 This endpoint is designed to be cheap and deterministic. It does not fetch bodies.
+
+The serialized tree is cached in-process and revalidated on each call with a cheap change key
+(a sequence bumped by statement-level triggers on email_message/email_cluster), so UI polling
+does not re-run the aggregation while nothing has changed.
 """
 
 from __future__ import annotations
 
-from collections import defaultdict
-from dataclasses import dataclass
+import threading
+import time
 from datetime import datetime, timezone
+from itertools import groupby
+from operator import itemgetter
+from typing import Any
 
 from fastapi import APIRouter
+from fastapi.responses import Response
+from sqlalchemy import text
 
-from app.api.models import DashboardNode, DashboardTreeResponse
+from app.api._orjson import ORJSONResponse, dumps
+from app.api.models import DashboardTreeResponse
 
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 
 
-@dataclass
-class _Agg:
-    count: int = 0
-    unread_count: int = 0
+# Pure reads: run without BEGIN/COMMIT round-trips or a held transaction snapshot.
+_READ_OPTS = {"isolation_level": "AUTOCOMMIT"}
 
+# GROUPING(category, subcategory, cluster_id, from_domain) bitmask for each rollup level.
+_LEVEL_SENDER = 0b0000
+_LEVEL_CLUSTER = 0b0001
+_LEVEL_SUB = 0b0011
+_LEVEL_CATEGORY = 0b0111
+_LEVEL_ROOT = 0b1111
 
-def _ratio(unread: int, count: int) -> float:
-    return 0.0 if count <= 0 else unread / count
 
+# A matching change key is trusted for at most this long. The change sequence is bumped before
+# the writer commits, so a tree built in between can be stored under the new key; the TTL bounds
+# how long such a change can go unseen.
+_TREE_CACHE_TTL_SECONDS = 15.0
 
-def _node_id(kind: str, *parts: str) -> str:
-    safe = [p.replace("/", "-") for p in parts if p]
-    return f"{kind}:{':'.join(safe)}" if safe else f"{kind}"
+_tree_cache_lock = threading.Lock()
+_tree_cache: tuple[tuple, float, bytes] | None = None  # (change key, built at, JSON bytes)
 
 
-@router.get("/tree", response_model=DashboardTreeResponse)
-def dashboard_tree():
-    # Lazy import to keep editor environments happy.
-    from sqlalchemy import text
+def _id_segment(part: str) -> str:
+    # One ":part" segment of a node id ("/" is reserved by the UI); empty parts are omitted.
+    return f":{part.replace('/', '-')}" if part else ""
 
-    from app.db.postgres import engine
 
-    # Aggregate at the finest granularity we need (cluster+sender).
-    # NOTE: We keep a "Pending labelling" bucket rather than "Unknown".
-    q = text(
-        """
+def _cached_tree(key: tuple) -> bytes | None:
+    with _tree_cache_lock:
+        if _tree_cache is None:
+            return None
+        cached_key, built_at, payload = _tree_cache
+    if cached_key != key or time.monotonic() - built_at > _TREE_CACHE_TTL_SECONDS:
+        return None
+    return payload
+
+
+def _store_tree(key: tuple, payload: bytes) -> None:
+    global _tree_cache
+    with _tree_cache_lock:
+        _tree_cache = (key, time.monotonic(), payload)
+
+
+# Cheap change key: one read of the change sequence (inserts, updates and deletes all bump it).
+_Q_TREE_CACHE_KEY = text("SELECT last_value, is_called FROM email_intel_change_seq")
+
+# Aggregate every level of the hierarchy in one pass: Postgres emits the sender rows plus the
+# cluster/sub/category/root rollups, tagged by GROUPING() (see the _LEVEL_* bitmasks).
+# Labels are normalized in SQL so each rollup groups on the displayed names.
+# NOTE: We keep a "Pending labelling" bucket rather than "Unknown".
+_Q_TREE_AGG = text(
+    """
+    WITH m AS (
         SELECT
-            COALESCE(category, '__pending__') AS category,
-            COALESCE(subcategory, '') AS subcategory,
-            cluster_id::text AS cluster_id,
+            COALESCE(category, 'Pending labelling') AS category,
+            COALESCE(NULLIF(btrim(subcategory, E' \\t\\r\\n'), ''), '(unspecified)') AS subcategory,
+            COALESCE(cluster_id::text, '__unclustered__') AS cluster_id,
             from_domain,
-            COUNT(*)::int AS count,
-            SUM(CASE WHEN is_unread THEN 1 ELSE 0 END)::int AS unread_count
+            is_unread
         FROM email_message
         WHERE NOT ('TRASH' = ANY(COALESCE(label_ids, ARRAY[]::text[])))
-        GROUP BY 1, 2, 3, 4
-        """
     )
-
-    # Optional cluster metadata: name + frequency.
-    qc = text(
-        """
-        SELECT
-            id::text,
-            COALESCE(display_name, seed_gmail_message_id) AS display_name,
-            frequency_label
-        FROM email_cluster
-        """
+    SELECT
+        GROUPING(category, subcategory, cluster_id, from_domain)::int AS level,
+        category,
+        subcategory,
+        cluster_id,
+        from_domain,
+        COUNT(*)::int AS count,
+        COALESCE(SUM(CASE WHEN is_unread THEN 1 ELSE 0 END), 0)::int AS unread_count
+    FROM m
+    GROUP BY GROUPING SETS (
+        (category, subcategory, cluster_id, from_domain),
+        (category, subcategory, cluster_id),
+        (category, subcategory),
+        (category),
+        ()
     )
+    """
+)
+
+# Optional cluster metadata: name (with the display fallback resolved in SQL) + frequency.
+_Q_CLUSTER_META = text(
+    """
+    SELECT
+        id::text,
+        COALESCE(display_name, seed_gmail_message_id, 'Cluster ' || left(id::text, 8)) AS display_name,
+        frequency_label
+    FROM email_cluster
+    """
+)
+
+
+@router.get("/tree", response_model=DashboardTreeResponse, response_class=ORJSONResponse)
+def dashboard_tree() -> Response:
+    # Lazy import: the engine connects on import.
+    from app.db.postgres import engine
 
-    with engine.begin() as conn:
-        rows = conn.execute(q).fetchall()
-        crows = conn.execute(qc).fetchall()
-
-    cluster_meta: dict[str, tuple[str, str | None]] = {
-        r[0]: (r[1], r[2]) for r in crows
-    }
-
-    # Build nested aggregation: category → sub → cluster → sender
-    cats: dict[str, dict] = defaultdict(lambda: defaultdict(lambda: defaultdict(dict)))
-    cluster_aggs: dict[tuple[str, str, str], _Agg] = defaultdict(_Agg)
-    sub_aggs: dict[tuple[str, str], _Agg] = defaultdict(_Agg)
-    cat_aggs: dict[str, _Agg] = defaultdict(_Agg)
-    root = _Agg()
-
-    for category, subcategory, cluster_id, sender, count, unread_count in rows:
-        category_name = "Pending labelling" if category == "__pending__" else category
-        sub_name = subcategory.strip() or "(unspecified)"
-        cluster_key = cluster_id or "__unclustered__"
-
-        # Store sender agg
-        cats[category_name][sub_name][cluster_key][sender] = _Agg(count=count, unread_count=unread_count)
-
-        # rollups
-        cluster_aggs[(category_name, sub_name, cluster_key)].count += count
-        cluster_aggs[(category_name, sub_name, cluster_key)].unread_count += unread_count
-        sub_aggs[(category_name, sub_name)].count += count
-        sub_aggs[(category_name, sub_name)].unread_count += unread_count
-        cat_aggs[category_name].count += count
-        cat_aggs[category_name].unread_count += unread_count
-        root.count += count
-        root.unread_count += unread_count
-
-    # Build response nodes
-    category_nodes: list[DashboardNode] = []
-
-    for category_name in sorted(cats.keys()):
-        sub_nodes: list[DashboardNode] = []
-        for sub_name in sorted(cats[category_name].keys()):
-            cluster_nodes: list[DashboardNode] = []
-            for cluster_key in sorted(cats[category_name][sub_name].keys()):
-                sender_nodes: list[DashboardNode] = []
-                for sender in sorted(cats[category_name][sub_name][cluster_key].keys()):
-                    a = cats[category_name][sub_name][cluster_key][sender]
+    with engine.connect().execution_options(**_READ_OPTS) as conn:
+        cache_key = tuple(conn.execute(_Q_TREE_CACHE_KEY).one())
+
+    cached = _cached_tree(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    # Dispatch rows by level: senders into one flat list, rollups into per-level lookups.
+    # Each aggregate is a plain (count, unread_count) pair; sender rows are unique per
+    # (category, sub, cluster, sender) and kept as (category, sub, cluster, sender, count, unread).
+    leaves: list[tuple[str, str, str, str, int, int]] = []
+    cluster_aggs: dict[tuple[str, str, str], tuple[int, int]] = {}
+    sub_aggs: dict[tuple[str, str], tuple[int, int]] = {}
+    cat_aggs: dict[str, tuple[int, int]] = {}
+    root = (0, 0)
+
+    with engine.connect().execution_options(**_READ_OPTS) as conn:
+        crows = conn.execute(_Q_CLUSTER_META).fetchall()
+
+        # The aggregation can return one row per sender, so iterate the DBAPI cursor's plain
+        # tuples directly rather than materializing SQLAlchemy Row objects.
+        cur = conn.connection.cursor()
+        try:
+            cur.execute(_Q_TREE_AGG.text)
+            for row in cur:
+                level = row[0]
+                if level == _LEVEL_SENDER:
+                    leaves.append(row[1:])
+                    continue
+                _, category_name, sub_name, cluster_key, _, count, unread_count = row
+                agg = (count, unread_count)
+                if level == _LEVEL_CLUSTER:
+                    cluster_aggs[(category_name, sub_name, cluster_key)] = agg
+                elif level == _LEVEL_SUB:
+                    sub_aggs[(category_name, sub_name)] = agg
+                elif level == _LEVEL_CATEGORY:
+                    cat_aggs[category_name] = agg
+                elif level == _LEVEL_ROOT:
+                    root = agg
+        finally:
+            cur.close()
+
+    cluster_names: dict[str, str] = {r[0]: r[1] for r in crows}
+    cluster_freqs: dict[str, str | None] = {r[0]: r[2] for r in crows}
+
+    # Build response nodes as plain dicts in DashboardNode's field order: every value comes from
+    # our own SQL, so there is nothing to validate and orjson walks the dicts natively.
+    # One in-place sort of the sender tuples yields the hierarchical order (keys are unique, so
+    # counts never take part in comparisons); groupby then emits a node at each prefix boundary.
+    category_nodes: list[dict[str, Any]] = []
+
+    leaves.sort()
+    # Id segments are computed once per level and shared by every node below it.
+    for category_name, cat_items in groupby(leaves, key=itemgetter(0)):
+        cat_seg = _id_segment(category_name)
+        sub_nodes: list[dict[str, Any]] = []
+        for sub_name, sub_items in groupby(cat_items, key=itemgetter(1)):
+            sub_seg = _id_segment(sub_name)
+            cluster_nodes: list[dict[str, Any]] = []
+            for cluster_key, cluster_items in groupby(sub_items, key=itemgetter(2)):
+                sender_nodes: list[dict[str, Any]] = []
+                for _, _, _, sender, c, u in cluster_items:
                     sender_nodes.append(
-                        DashboardNode(
-                            id=_node_id("sender", sender),
-                            name=sender,
-                            count=a.count,
-                            unread_count=a.unread_count,
-                            unread_ratio=_ratio(a.unread_count, a.count),
-                            frequency=None,
-                            children=[],
-                        )
+                        {
+                            "id": f"sender{_id_segment(sender)}",
+                            "name": sender,
+                            "count": c,
+                            "unread_count": u,
+                            "unread_ratio": 0.0 if c <= 0 else u / c,
+                            "frequency": None,
+                            "children": [],
+                        }
                     )
 
-                cagg = cluster_aggs[(category_name, sub_name, cluster_key)]
+                c, u = cluster_aggs[(category_name, sub_name, cluster_key)]
                 if cluster_key == "__unclustered__":
                     cluster_name, freq = "Unclustered", None
-                    cluster_id_out = _node_id("cluster", "unclustered", category_name, sub_name)
+                    cluster_id_out = f"cluster:unclustered{cat_seg}{sub_seg}"
                 else:
-                    meta = cluster_meta.get(cluster_key)
-                    cluster_name = meta[0] if meta else f"Cluster {cluster_key[:8]}"
-                    freq = meta[1] if meta else None
-                    cluster_id_out = _node_id("cluster", cluster_key)
+                    # Clusters missing from email_cluster still get a readable name.
+                    cluster_name = cluster_names.get(cluster_key) or f"Cluster {cluster_key[:8]}"
+                    freq = cluster_freqs.get(cluster_key)
+                    cluster_id_out = f"cluster{_id_segment(cluster_key)}"
 
                 cluster_nodes.append(
-                    DashboardNode(
-                        id=cluster_id_out,
-                        name=cluster_name,
-                        count=cagg.count,
-                        unread_count=cagg.unread_count,
-                        unread_ratio=_ratio(cagg.unread_count, cagg.count),
-                        frequency=freq,
-                        children=sender_nodes,
-                    )
+                    {
+                        "id": cluster_id_out,
+                        "name": cluster_name,
+                        "count": c,
+                        "unread_count": u,
+                        "unread_ratio": 0.0 if c <= 0 else u / c,
+                        "frequency": freq,
+                        "children": sender_nodes,
+                    }
                 )
 
-            sagg = sub_aggs[(category_name, sub_name)]
+            c, u = sub_aggs[(category_name, sub_name)]
             sub_nodes.append(
-                DashboardNode(
-                    id=_node_id("sub", category_name, sub_name),
-                    name=sub_name,
-                    count=sagg.count,
-                    unread_count=sagg.unread_count,
-                    unread_ratio=_ratio(sagg.unread_count, sagg.count),
-                    frequency=None,
-                    children=cluster_nodes,
-                )
+                {
+                    "id": f"sub{cat_seg}{sub_seg}",
+                    "name": sub_name,
+                    "count": c,
+                    "unread_count": u,
+                    "unread_ratio": 0.0 if c <= 0 else u / c,
+                    "frequency": None,
+                    "children": cluster_nodes,
+                }
             )
 
-        cagg = cat_aggs[category_name]
+        c, u = cat_aggs[category_name]
         category_nodes.append(
-            DashboardNode(
-                id=_node_id("cat", category_name),
-                name=category_name,
-                count=cagg.count,
-                unread_count=cagg.unread_count,
-                unread_ratio=_ratio(cagg.unread_count, cagg.count),
-                frequency=None,
-                children=sub_nodes,
-            )
+            {
+                "id": f"cat{cat_seg}",
+                "name": category_name,
+                "count": c,
+                "unread_count": u,
+                "unread_ratio": 0.0 if c <= 0 else u / c,
+                "frequency": None,
+                "children": sub_nodes,
+            }
         )
 
-    root_node = DashboardNode(
-        id="root",
-        name="All Email",
-        count=root.count,
-        unread_count=root.unread_count,
-        unread_ratio=_ratio(root.unread_count, root.count),
-        frequency=None,
-        children=category_nodes,
-    )
+    c, u = root
+    root_node: dict[str, Any] = {
+        "id": "root",
+        "name": "All Email",
+        "count": c,
+        "unread_count": u,
+        "unread_ratio": 0.0 if c <= 0 else u / c,
+        "frequency": None,
+        "children": category_nodes,
+    }
 
-    return DashboardTreeResponse(generated_at=datetime.now(timezone.utc), root=root_node)
+    # Serialize the tree in one orjson pass instead of FastAPI's jsonable_encoder walk.
+    payload = dumps({"generated_at": datetime.now(timezone.utc), "root": root_node})
+    _store_tree(cache_key, payload)
+    return Response(content=payload, media_type="application/json")
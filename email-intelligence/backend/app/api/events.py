@@ -7,30 +7,40 @@ Google Calendar publish/check actions.
 from __future__ import annotations
 
 from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache, partial
 from pathlib import Path
 from typing import Any
 from zoneinfo import ZoneInfo
 
+from anyio import CapacityLimiter, to_thread
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 
+from app.api._orjson import ORJSONResponse
 from app.api.models import CalendarCheckResponse
 from app.api.models import CalendarPublishResponse
 from app.api.models import FutureEventsResponse
 from app.api.models import HideEventResponse
 from app.db.postgres import engine
-from app.google.calendar_client import get_calendar_service_from_files
+from app.google.calendar_client import get_calendar_service_cached
+from app.google.calendar_client import list_event_ids_by_ical_uid
 from app.repository.event_metadata_repository import get_event_row_for_message
 from app.repository.event_metadata_repository import hide_event
 from app.repository.event_metadata_repository import list_future_events
+from app.repository.event_metadata_repository import list_future_events_needing_calendar_check
 from app.repository.event_metadata_repository import set_calendar_status
+from app.repository.event_metadata_repository import set_calendar_status_bulk
 from app.repository.event_metadata_repository import unhide_event
-from app.settings import Settings
+from app.settings import get_settings
 
 router = APIRouter(prefix="/api/events", tags=["events"])
 
 
 _CALENDAR_CHECK_TTL = timedelta(hours=24)
 
+# Caps concurrent background Calendar syncs across /future requests (Google API quota).
+_calendar_sync_limiter = CapacityLimiter(5)
+
 
 def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
@@ -41,6 +51,17 @@ def _normalize_tz_name(tz_name: str | None, *, fallback: str) -> str:
     return raw or fallback or "UTC"
 
 
+@lru_cache(maxsize=256)
+def _resolve_tz(tz_name: str, fallback: str) -> tuple[ZoneInfo, str]:
+    """Return (tz, name) for `tz_name`, falling back to `fallback` (or UTC) if it is unknown."""
+
+    try:
+        return ZoneInfo(tz_name), tz_name
+    except Exception:
+        tz = ZoneInfo(fallback or "UTC")
+        return tz, getattr(tz, "key", "UTC")
+
+
 def _ical_uid_for_message(message_id: int) -> str:
     # Deterministic + stable so we can de-dupe publishes (and check existence) safely.
     # iCalUID must be globally unique; the domain doesn't need to exist.
@@ -51,7 +72,10 @@ def _sync_calendar_status_for_rows(*, rows: list[dict[str, Any]]) -> None:
     """Best-effort: fill calendar_checked_at/calendar_event_id for future events.
 
     We do this efficiently by listing *all* calendar events for the date window covering the
-    rows in a small number of Google Calendar API calls (paging), then matching on iCalUID.
+    rows in a few batched Google Calendar API round-trips, then matching on iCalUID.
+
+    Checked rows are updated in place with the stored status, so callers can return `rows`
+    without re-reading them.
 
     This is intentionally best-effort and must never break the /future endpoint; if calendar
     auth isn't configured or calls fail, we simply return without updating.
@@ -60,18 +84,7 @@ def _sync_calendar_status_for_rows(*, rows: list[dict[str, Any]]) -> None:
     if not rows:
         return
 
-    # Only check rows that have never been checked or are stale.
-    now = _now_utc()
-    to_check: list[dict[str, Any]] = []
-    for r in rows:
-        checked_at: datetime | None = r.get("calendar_checked_at")
-        if checked_at is None or (now - checked_at) > _CALENDAR_CHECK_TTL:
-            to_check.append(r)
-
-    if not to_check:
-        return
-
-    settings = Settings()
+    settings = get_settings()
 
     # If Calendar credentials/tokens are not available, silently skip.
     # (We must not trigger interactive auth from a GET endpoint.)
@@ -80,13 +93,22 @@ def _sync_calendar_status_for_rows(*, rows: list[dict[str, Any]]) -> None:
     if not creds_path.exists() or not token_path.exists():
         return
 
-    # Build a date range that covers the returned rows. Clamp to ~1 year so we don't
-    # accidentally scan a multi-year window if a far-future event slips into the list.
-    min_date = min((r.get("event_date") for r in rows if r.get("event_date") is not None), default=None)
-    max_date = max((r.get("event_date") for r in rows if r.get("event_date") is not None), default=None)
-    if min_date is None or max_date is None:
+    # Only check rows that have never been checked or are stale (filtered in SQL, together with
+    # the date range they span).
+    now = _now_utc()
+    try:
+        to_check, min_date, max_date = list_future_events_needing_calendar_check(
+            engine=engine,
+            message_ids=[int(r["message_id"]) for r in rows],
+            ttl=_CALENDAR_CHECK_TTL,
+        )
+    except Exception:
+        return
+    if not to_check or min_date is None or max_date is None:
         return
 
+    # Clamp to ~1 year so we don't accidentally scan a multi-year window if a far-future event
+    # slips into the list.
     horizon = date.today() + timedelta(days=366)
     if max_date > horizon:
         max_date = horizon
@@ -103,7 +125,7 @@ def _sync_calendar_status_for_rows(*, rows: list[dict[str, Any]]) -> None:
         wanted_uids[mid] = uid
 
     try:
-        service = get_calendar_service_from_files(
+        service = get_calendar_service_cached(
             credentials_path=settings.calendar_credentials_path,
             token_path=settings.calendar_token_path,
             auth_mode=settings.calendar_auth_mode,
@@ -111,49 +133,39 @@ def _sync_calendar_status_for_rows(*, rows: list[dict[str, Any]]) -> None:
             allow_interactive=False,
         )
 
-        # List events in the window and build a map from iCalUID -> calendar event id.
-        uid_to_event_id: dict[str, str] = {}
-        page_token: str | None = None
-        while True:
-            resp = (
-                service.events()
-                .list(
-                    calendarId=settings.calendar_id,
-                    timeMin=time_min.isoformat().replace("+00:00", "Z"),
-                    timeMax=time_max.isoformat().replace("+00:00", "Z"),
-                    singleEvents=True,
-                    showDeleted=False,
-                    maxResults=2500,
-                    pageToken=page_token,
-                )
-                .execute()
-            )
-            items = resp.get("items") or []
-            for it in items:
-                uid = (it.get("iCalUID") or "").strip()
-                eid = (it.get("id") or "").strip()
-                if uid and eid:
-                    uid_to_event_id[uid] = eid
-
-            page_token = resp.get("nextPageToken")
-            if not page_token:
-                break
-
-        # Persist cache results.
-        for mid, uid in wanted_uids.items():
-            set_calendar_status(
-                engine=engine,
-                message_id=mid,
-                calendar_ical_uid=uid,
-                calendar_event_id=uid_to_event_id.get(uid),
-                checked_at_utc=now,
-                published_at_utc=None,
-            )
+        # Map iCalUID -> calendar event id for the whole window (batched Google calls).
+        uid_to_event_id = list_event_ids_by_ical_uid(
+            service,
+            calendar_id=settings.calendar_id,
+            time_min=time_min,
+            time_max=time_max,
+        )
+
+        # Persist cache results (one statement for all rows).
+        set_calendar_status_bulk(
+            engine=engine,
+            rows=[
+                {
+                    "message_id": mid,
+                    "calendar_ical_uid": uid,
+                    "calendar_event_id": uid_to_event_id.get(uid),
+                }
+                for mid, uid in wanted_uids.items()
+            ],
+            checked_at_utc=now,
+        )
 
     except Exception:
         # Best-effort only: do not break the future events view if Calendar isn't available.
         return
 
+    # Mirror what was just persisted onto the caller's rows.
+    for r in rows:
+        uid = wanted_uids.get(int(r["message_id"]))
+        if uid is not None:
+            r["calendar_event_id"] = uid_to_event_id.get(uid)
+            r["calendar_checked_at"] = now
+
 
 def _build_calendar_event_body(
     *,
@@ -172,16 +184,22 @@ def _build_calendar_event_body(
 
     summary = (row.get("event_name") or "").strip() or (row.get("subject") or "").strip() or "Event"
 
-    desc_parts: list[str] = []
-    if row.get("subject"):
-        desc_parts.append(f"Email subject: {row['subject']}")
-    if row.get("from_domain"):
-        desc_parts.append(f"From domain: {row['from_domain']}")
-    desc_parts.append(f"Email Intelligence message_id: {row.get('message_id')}")
+    subject = row.get("subject")
+    from_domain = row.get("from_domain")
+    description = "\n".join(
+        filter(
+            None,
+            (
+                subject and f"Email subject: {subject}",
+                from_domain and f"From domain: {from_domain}",
+                f"Email Intelligence message_id: {row.get('message_id')}",
+            ),
+        )
+    )
 
     body: dict[str, Any] = {
         "summary": summary,
-        "description": "\n".join(desc_parts),
+        "description": description,
         "iCalUID": calendar_ical_uid,
         # Ensure a consistent reminder regardless of a user's default calendar settings.
         # We explicitly disable defaults to avoid common 10-minute popups.
@@ -201,11 +219,7 @@ def _build_calendar_event_body(
         return body
 
     # Timed event
-    try:
-        tz = ZoneInfo(tz_name)
-    except Exception:
-        tz = ZoneInfo(default_tz_name or "UTC")
-        tz_name = getattr(tz, "key", "UTC")
+    tz, tz_name = _resolve_tz(tz_name, default_tz_name)
 
     start_dt = datetime.combine(event_date, start_time).replace(tzinfo=tz)
 
@@ -223,21 +237,27 @@ def _build_calendar_event_body(
     return body
 
 
-@router.get("/future", response_model=FutureEventsResponse)
-def get_future_events(
+@router.get("/future", response_model=FutureEventsResponse, response_class=ORJSONResponse)
+async def get_future_events(
     limit: int = 200,
     include_hidden: bool = False,
     auto_calendar_check: bool = True,
-) -> FutureEventsResponse:
-    rows = list_future_events(engine=engine, limit=limit, include_hidden=include_hidden)
+) -> ORJSONResponse:
+    # The DB driver and Google client are blocking; run them on worker threads so the event
+    # loop keeps serving other requests while Calendar paging is in flight.
+    rows = await run_in_threadpool(
+        partial(list_future_events, engine=engine, limit=limit, include_hidden=include_hidden)
+    )
 
     if auto_calendar_check:
-        _sync_calendar_status_for_rows(rows=rows)
-        # Re-read to return fresh cached calendar status to the UI.
-        rows = list_future_events(engine=engine, limit=limit, include_hidden=include_hidden)
+        # Updates the checked rows in place with the freshly cached calendar status.
+        await to_thread.run_sync(
+            partial(_sync_calendar_status_for_rows, rows=rows),
+            limiter=_calendar_sync_limiter,
+        )
 
-    # Pydantic response model handles conversion.
-    return FutureEventsResponse(generated_at=_now_utc(), events=rows)  # type: ignore[arg-type]
+    # Rows already carry exactly the FutureEventItem fields; serialize them as-is.
+    return ORJSONResponse({"generated_at": _now_utc(), "events": rows})
 
 
 @router.post("/{message_id}/hide", response_model=HideEventResponse)
@@ -252,9 +272,13 @@ def post_unhide_event(message_id: int) -> HideEventResponse:
     return HideEventResponse(message_id=int(message_id), hidden=False, hidden_at=None)
 
 
-@router.post("/{message_id}/calendar/check", response_model=CalendarCheckResponse)
-def post_calendar_check(message_id: int) -> CalendarCheckResponse:
-    settings = Settings()
+@router.post(
+    "/{message_id}/calendar/check",
+    response_model=CalendarCheckResponse,
+    response_class=ORJSONResponse,
+)
+def post_calendar_check(message_id: int) -> ORJSONResponse:
+    settings = get_settings()
 
     row = get_event_row_for_message(engine=engine, message_id=message_id)
     if not row:
@@ -263,7 +287,7 @@ def post_calendar_check(message_id: int) -> CalendarCheckResponse:
     calendar_ical_uid = (row.get("calendar_ical_uid") or "").strip() or _ical_uid_for_message(message_id)
 
     try:
-        service = get_calendar_service_from_files(
+        service = get_calendar_service_cached(
             credentials_path=settings.calendar_credentials_path,
             token_path=settings.calendar_token_path,
             auth_mode=settings.calendar_auth_mode,
@@ -300,18 +324,24 @@ def post_calendar_check(message_id: int) -> CalendarCheckResponse:
         published_at_utc=None,
     )
 
-    return CalendarCheckResponse(
-        message_id=int(message_id),
-        calendar_ical_uid=calendar_ical_uid,
-        exists=event_id is not None,
-        calendar_event_id=event_id,
-        calendar_checked_at=checked_at,
+    return ORJSONResponse(
+        {
+            "message_id": int(message_id),
+            "calendar_ical_uid": calendar_ical_uid,
+            "exists": event_id is not None,
+            "calendar_event_id": event_id,
+            "calendar_checked_at": checked_at,
+        }
     )
 
 
-@router.post("/{message_id}/calendar/publish", response_model=CalendarPublishResponse)
-def post_calendar_publish(message_id: int) -> CalendarPublishResponse:
-    settings = Settings()
+@router.post(
+    "/{message_id}/calendar/publish",
+    response_model=CalendarPublishResponse,
+    response_class=ORJSONResponse,
+)
+def post_calendar_publish(message_id: int) -> ORJSONResponse:
+    settings = get_settings()
 
     row = get_event_row_for_message(engine=engine, message_id=message_id)
     if not row:
@@ -327,7 +357,7 @@ def post_calendar_publish(message_id: int) -> CalendarPublishResponse:
     calendar_ical_uid = (row.get("calendar_ical_uid") or "").strip() or _ical_uid_for_message(message_id)
 
     try:
-        service = get_calendar_service_from_files(
+        service = get_calendar_service_cached(
             credentials_path=settings.calendar_credentials_path,
             token_path=settings.calendar_token_path,
             auth_mode=settings.calendar_auth_mode,
@@ -358,12 +388,14 @@ def post_calendar_publish(message_id: int) -> CalendarPublishResponse:
                 checked_at_utc=checked_at,
                 published_at_utc=None,
             )
-            return CalendarPublishResponse(
-                message_id=int(message_id),
-                calendar_ical_uid=calendar_ical_uid,
-                already_existed=True,
-                calendar_event_id=str(found.get("id")),
-                calendar_published_at=None,
+            return ORJSONResponse(
+                {
+                    "message_id": int(message_id),
+                    "calendar_ical_uid": calendar_ical_uid,
+                    "already_existed": True,
+                    "calendar_event_id": str(found.get("id")),
+                    "calendar_published_at": None,
+                }
             )
 
         body = _build_calendar_event_body(
@@ -401,10 +433,12 @@ def post_calendar_publish(message_id: int) -> CalendarPublishResponse:
         published_at_utc=now,
     )
 
-    return CalendarPublishResponse(
-        message_id=int(message_id),
-        calendar_ical_uid=calendar_ical_uid,
-        already_existed=False,
-        calendar_event_id=str(event_id),
-        calendar_published_at=now,
+    return ORJSONResponse(
+        {
+            "message_id": int(message_id),
+            "calendar_ical_uid": calendar_ical_uid,
+            "already_existed": False,
+            "calendar_event_id": str(event_id),
+            "calendar_published_at": now,
+        }
     )
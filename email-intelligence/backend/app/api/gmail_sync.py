@@ -11,18 +11,26 @@ This module intentionally avoids removed policy engine concepts.
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from functools import lru_cache
+import logging
+import threading
+import time
 import unicodedata
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
+from sqlalchemy import text
 
+from app.api._orjson import ORJSONResponse
 from app.db.postgres import engine
 from app.repository.taxonomy_admin_repository import (
     GMAIL_ARCHIVED_LABEL_NAME,
     TaxonomyAdminRepository,
     gmail_label_name,
 )
-from app.settings import Settings
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/gmail-sync", tags=["gmail-sync"])
 
@@ -42,6 +50,9 @@ class SyncExistenceResponse(BaseModel):
 
 class PushBulkRequest(BaseModel):
     limit: int = Field(default=200, ge=1, le=5000)
+    # Keyset cursor: only messages with id > after. Pass the previous response's next_after.
+    after: int = Field(default=0, ge=0)
+    # Legacy OFFSET paging (scans every skipped row); prefer `after`.
     offset: int = Field(default=0, ge=0)
 
 
@@ -50,6 +61,8 @@ class PushResponse(BaseModel):
     succeeded: int
     failed: int
     generated_at: datetime
+    # Cursor for the next bulk page (last message id in this page); None when the page was empty.
+    next_after: int | None = None
 
 
 class PushIncrementalRequest(BaseModel):
@@ -117,11 +130,11 @@ class GmailAuthStatusResponse(BaseModel):
 
 
 def _gmail_service(*, modify: bool) -> object:
-    from app.gmail.client import GMAIL_SCOPE_MODIFY, GMAIL_SCOPE_READONLY, get_gmail_service_from_files
+    from app.gmail.client import GMAIL_SCOPE_MODIFY, GMAIL_SCOPE_READONLY, get_gmail_service_cached
 
-    s = Settings()
+    s = get_settings()
     scopes = [GMAIL_SCOPE_MODIFY] if modify else [GMAIL_SCOPE_READONLY]
-    return get_gmail_service_from_files(
+    return get_gmail_service_cached(
         credentials_path=s.gmail_credentials_path,
         token_path=s.gmail_token_path,
         scopes=scopes,
@@ -130,6 +143,65 @@ def _gmail_service(*, modify: bool) -> object:
     )
 
 
+# HTTP batch requests in flight at once when draining the label push outbox. Each batch already
+# carries HTTP_BATCH_MAX_CALLS modifies (5 quota units each), so a couple of concurrent batches is
+# enough to saturate the per-user quota; rate-limited calls are retried with backoff.
+_PUSH_BATCH_WORKERS = 2
+
+# Gmail label maps (name -> id, id -> name), shared across requests for a short TTL. Our own
+# create/rename calls invalidate them; the TTL bounds how long a change made elsewhere (e.g. in
+# the Gmail UI) goes unseen, and the 409 handling in sync_label_existence refreshes on conflict.
+_LABEL_MAPS_TTL_SECONDS = 60.0
+
+_label_maps_lock = threading.Lock()
+_label_maps_cache: dict[str, tuple[float, dict[str, str], dict[str, str]]] = {}  # by user id
+
+
+def _label_maps(
+    service, *, user_id: str, refresh: bool = False
+) -> tuple[dict[str, str], dict[str, str]]:
+    """Return (name -> id, id -> name) for the user's Gmail labels.
+
+    Callers get their own copies, so they may patch them for the remainder of a run.
+    """
+
+    from app.gmail.client import label_maps
+
+    if not refresh:
+        with _label_maps_lock:
+            hit = _label_maps_cache.get(user_id)
+        if hit is not None and time.monotonic() - hit[0] <= _LABEL_MAPS_TTL_SECONDS:
+            return dict(hit[1]), dict(hit[2])
+
+    name_to_id, id_to_name = label_maps(service, user_id=user_id)
+    with _label_maps_lock:
+        _label_maps_cache[user_id] = (time.monotonic(), name_to_id, id_to_name)
+    return dict(name_to_id), dict(id_to_name)
+
+
+def _invalidate_label_maps() -> None:
+    with _label_maps_lock:
+        _label_maps_cache.clear()
+
+
+@lru_cache(maxsize=4096)
+def _norm_label_name_unicode(name: str) -> str:
+    # The NFKC quick check usually answers "already normalized" without building a new string.
+    if not unicodedata.is_normalized("NFKC", name):
+        name = unicodedata.normalize("NFKC", name)
+    return name.strip().casefold()
+
+
+def _norm_label_name(name: str) -> str:
+    # Gmail treats some name variants as conflicting (e.g., case/whitespace differences).
+    # We normalize to improve our ability to link to existing labels rather than repeatedly
+    # attempting a create/rename that yields HttpError 409.
+    # NFKC is the identity on ASCII and casefold() equals lower() there, so most label names
+    # skip normalization entirely.
+    name = str(name)
+    return name.strip().lower() if name.isascii() else _norm_label_name_unicode(name)
+
+
 @router.get("/auth/status", response_model=GmailAuthStatusResponse)
 def gmail_auth_status() -> GmailAuthStatusResponse:
     """Return the scopes currently recorded in token.json.
@@ -141,7 +213,7 @@ def gmail_auth_status() -> GmailAuthStatusResponse:
 
     from app.gmail.client import GMAIL_SCOPE_MODIFY
 
-    s = Settings()
+    s = get_settings()
 
     scopes: list[str] = []
     try:
@@ -167,33 +239,35 @@ def gmail_auth_status() -> GmailAuthStatusResponse:
 def sync_label_existence(req: SyncExistenceRequest) -> SyncExistenceResponse:
     """Ensure all active taxonomy labels exist as Gmail labels and store gmail_label_id."""
 
-    from app.gmail.client import create_label, label_name_to_id, list_label_names, update_label
+    from app.gmail.client import create_label, update_label
     from googleapiclient.errors import HttpError
 
-    s = Settings()
+    s = get_settings()
     service = _gmail_service(modify=True)
 
     repo = TaxonomyAdminRepository(engine)
-    labels = [l for l in repo.list_labels(include_inactive=False) if l.is_active]
-    by_id = {l.id: l for l in repo.list_labels(include_inactive=True)}
-
-    name_to_id = label_name_to_id(service, user_id=s.gmail_user_id)
-    id_to_name = list_label_names(service, user_id=s.gmail_user_id)
+    all_labels = repo.list_labels(include_inactive=True)
+    by_id = {l.id: l for l in all_labels}
+    labels = [l for l in all_labels if l.is_active]
 
-    def _norm_label_name(name: str) -> str:
-        # Gmail treats some name variants as conflicting (e.g., case/whitespace differences).
-        # We normalize to improve our ability to link to existing labels rather than repeatedly
-        # attempting a create/rename that yields HttpError 409.
-        return unicodedata.normalize("NFKC", str(name)).strip().casefold()
-
-    name_to_id_norm: dict[str, str] = {_norm_label_name(k): str(v) for k, v in name_to_id.items()}
+    # Gmail label id -> name is the source of truth; name_to_id_norm indexes it by normalized
+    # name (an exact name always matches its own normalized form).
+    _, id_to_name = _label_maps(service, user_id=s.gmail_user_id)
+    name_to_id_norm = {_norm_label_name(name): lid for lid, name in id_to_name.items()}
 
     def _lookup_existing_id(label_name: str) -> str | None:
-        existing = name_to_id.get(label_name)
-        if existing:
-            return str(existing)
         return name_to_id_norm.get(_norm_label_name(label_name))
 
+    def _set_label_name(gmail_id: str, name: str) -> None:
+        # Keep both maps in step for the remainder of this run (after a create or rename).
+        old_name = id_to_name.get(gmail_id)
+        if old_name is not None:
+            old_norm = _norm_label_name(old_name)
+            if name_to_id_norm.get(old_norm) == gmail_id:
+                del name_to_id_norm[old_norm]
+        id_to_name[gmail_id] = name
+        name_to_id_norm[_norm_label_name(name)] = gmail_id
+
     def _http_status(err: Exception) -> int | None:
         try:
             resp = getattr(err, "resp", None)
@@ -203,20 +277,58 @@ def sync_label_existence(req: SyncExistenceRequest) -> SyncExistenceResponse:
             return None
 
     def _refresh_label_maps() -> None:
-        nonlocal name_to_id, id_to_name, name_to_id_norm
-        name_to_id = label_name_to_id(service, user_id=s.gmail_user_id)
-        id_to_name = list_label_names(service, user_id=s.gmail_user_id)
-        name_to_id_norm = {_norm_label_name(k): str(v) for k, v in name_to_id.items()}
+        nonlocal id_to_name, name_to_id_norm
+        _, id_to_name = _label_maps(service, user_id=s.gmail_user_id, refresh=True)
+        name_to_id_norm = {_norm_label_name(name): lid for lid, name in id_to_name.items()}
+
+    desired = [
+        (l, gmail_label_name(label=l, parent=by_id.get(l.parent_id) if l.parent_id else None))
+        for l in labels
+    ]
+
+    if req.dry_run:
+        # Nothing is written, so the outcome is pure arithmetic over the label maps: labels whose
+        # stored id still exists may need a rename; the rest are linked by name or created.
+        known = [(l, n) for l, n in desired if l.gmail_label_id and l.gmail_label_id in id_to_name]
+        pending_norm = [
+            _norm_label_name(n)
+            for l, n in desired
+            if not (l.gmail_label_id and l.gmail_label_id in id_to_name)
+        ]
+        missing = set(pending_norm) - name_to_id_norm.keys()
+        created = sum(1 for n in pending_norm if n in missing)
+        return SyncExistenceResponse(
+            dry_run=True,
+            created=created,
+            updated=sum(1 for l, n in known if id_to_name[l.gmail_label_id] != n),
+            linked_existing=len(pending_norm) - created,
+            errors=0,
+            generated_at=datetime.now(timezone.utc),
+        )
+
+    # Sync field writes per taxonomy label id: (gmail_label_id, sync_status, sync_error). A later
+    # write for a label replaces an earlier one; all of them are flushed in one UPDATE at the end.
+    pending: dict[int, tuple[str | None, str, str | None]] = {}
+
+    def _record(
+        label, gmail_label_id: str | None, sync_status: str, sync_error: str | None = None
+    ) -> None:
+        state = (gmail_label_id, sync_status, sync_error)
+        if label.id not in pending and state == (
+            label.gmail_label_id,
+            label.sync_status,
+            label.sync_error,
+        ):
+            # Already stored: steady-state syncs should not rewrite every label.
+            return
+        pending[int(label.id)] = state
 
     created = 0
     updated = 0
     linked_existing = 0
     errors = 0
 
-    for l in labels:
-        parent = by_id.get(l.parent_id) if l.parent_id else None
-        desired_name = gmail_label_name(label=l, parent=parent)
-
+    for l, desired_name in desired:
         try:
             if l.gmail_label_id:
                 # If we know the Gmail id, rename if needed.
@@ -225,78 +337,48 @@ def sync_label_existence(req: SyncExistenceRequest) -> SyncExistenceResponse:
                 # Stored mapping may be stale if labels were deleted in Gmail.
                 # If the id is unknown, clear mapping and treat as missing.
                 if current_name is None:
-                    if not req.dry_run:
-                        repo.set_gmail_sync_fields(
-                            label_id=l.id,
-                            gmail_label_id=None,
-                            sync_status="stale",
-                            sync_error="stored gmail_label_id not found in Gmail label list",
-                        )
+                    _record(l, None, "stale", "stored gmail_label_id not found in Gmail label list")
                     # Fall through to name-based link/create.
                 else:
                     if current_name != desired_name:
-                        if not req.dry_run:
-                            try:
-                                update_label(
-                                    service,
-                                    label_id=l.gmail_label_id,
-                                    name=desired_name,
-                                    user_id=s.gmail_user_id,
-                                )
-                                # Keep in-memory maps in sync for the remainder of this run.
-                                id_to_name[str(l.gmail_label_id)] = str(desired_name)
-                                name_to_id.pop(str(current_name), None)
-                                name_to_id[str(desired_name)] = str(l.gmail_label_id)
-                                name_to_id_norm[_norm_label_name(desired_name)] = str(l.gmail_label_id)
-                            except HttpError as he:
-                                # Common case when we've previously created the *new* label name
-                                # (e.g. after removing a prefix) and we're now attempting to rename
-                                # the old Gmail label to that already-existing name.
-                                if _http_status(he) == 409:
-                                    _refresh_label_maps()
-                                    existing_id = _lookup_existing_id(desired_name)
-                                    if existing_id:
-                                        repo.set_gmail_sync_fields(
-                                            label_id=l.id,
-                                            gmail_label_id=str(existing_id),
-                                            sync_status="ok",
-                                        )
-                                        linked_existing += 1
-                                        continue
-                                raise
-
-                        repo.set_gmail_sync_fields(
-                            label_id=l.id,
-                            gmail_label_id=l.gmail_label_id,
-                            sync_status="ok",
-                        )
+                        try:
+                            update_label(
+                                service,
+                                label_id=l.gmail_label_id,
+                                name=desired_name,
+                                user_id=s.gmail_user_id,
+                            )
+                            _invalidate_label_maps()
+                            _set_label_name(str(l.gmail_label_id), str(desired_name))
+                        except HttpError as he:
+                            # Common case when we've previously created the *new* label name
+                            # (e.g. after removing a prefix) and we're now attempting to rename
+                            # the old Gmail label to that already-existing name.
+                            if _http_status(he) == 409:
+                                _refresh_label_maps()
+                                existing_id = _lookup_existing_id(desired_name)
+                                if existing_id:
+                                    _record(l, str(existing_id), "ok")
+                                    linked_existing += 1
+                                    continue
+                            raise
+
+                        _record(l, l.gmail_label_id, "ok")
                         updated += 1
                     else:
-                        repo.set_gmail_sync_fields(
-                            label_id=l.id,
-                            gmail_label_id=l.gmail_label_id,
-                            sync_status="ok",
-                        )
+                        _record(l, l.gmail_label_id, "ok")
                     continue
 
             # No stored id: link by name or create.
             existing_id = _lookup_existing_id(desired_name)
             if existing_id:
-                if not req.dry_run:
-                    repo.set_gmail_sync_fields(
-                        label_id=l.id,
-                        gmail_label_id=str(existing_id),
-                        sync_status="ok",
-                    )
+                _record(l, str(existing_id), "ok")
                 linked_existing += 1
                 continue
 
-            if req.dry_run:
-                created += 1
-                continue
-
             try:
                 created_label = create_label(service, name=desired_name, user_id=s.gmail_user_id)
+                _invalidate_label_maps()
             except HttpError as he:
                 # Another process/run (or a previous partial run) may have created the label.
                 # Treat 409 as a link-existing rather than a hard error.
@@ -304,34 +386,28 @@ def sync_label_existence(req: SyncExistenceRequest) -> SyncExistenceResponse:
                     _refresh_label_maps()
                     existing_id = _lookup_existing_id(desired_name)
                     if existing_id:
-                        repo.set_gmail_sync_fields(
-                            label_id=l.id,
-                            gmail_label_id=str(existing_id),
-                            sync_status="ok",
-                        )
+                        _record(l, str(existing_id), "ok")
                         linked_existing += 1
                         continue
                 raise
 
             gmail_id = str(created_label.get("id"))
             if gmail_id:
-                repo.set_gmail_sync_fields(
-                    label_id=l.id,
-                    gmail_label_id=gmail_id,
-                    sync_status="ok",
-                )
-                # Keep in-memory maps in sync for the remainder of this run.
-                name_to_id[str(desired_name)] = str(gmail_id)
-                name_to_id_norm[_norm_label_name(desired_name)] = str(gmail_id)
-                id_to_name[str(gmail_id)] = str(desired_name)
+                _record(l, gmail_id, "ok")
+                _set_label_name(gmail_id, str(desired_name))
             created += 1
         except Exception as e:
             errors += 1
-            if not req.dry_run:
-                repo.set_gmail_sync_fields(label_id=l.id, sync_status="error", sync_error=str(e))
+            # Keep whatever mapping this run already recorded (or the stored one).
+            gmail_label_id = pending[l.id][0] if l.id in pending else l.gmail_label_id
+            _record(l, gmail_label_id, "error", str(e))
+
+    repo.bulk_set_gmail_sync_fields(
+        items=[(label_id, *fields) for label_id, fields in pending.items()]
+    )
 
     return SyncExistenceResponse(
-        dry_run=req.dry_run,
+        dry_run=False,
         created=created,
         updated=updated,
         linked_existing=linked_existing,
@@ -340,35 +416,50 @@ def sync_label_existence(req: SyncExistenceRequest) -> SyncExistenceResponse:
     )
 
 
+# One page of messages with active taxonomy labels, keyset-paged by message id.
+_Q_PUSH_BULK_PAGE = text(
+    """
+    SELECT
+        em.id AS message_id,
+        em.gmail_message_id AS gmail_message_id,
+        ARRAY_AGG(mtl.taxonomy_label_id) AS taxonomy_label_ids
+    FROM email_message em
+    JOIN message_taxonomy_label mtl ON mtl.message_id = em.id
+    JOIN taxonomy_label tl ON tl.id = mtl.taxonomy_label_id
+    WHERE tl.is_active = TRUE
+      AND em.id > :after
+    GROUP BY em.id, em.gmail_message_id
+    ORDER BY em.id ASC
+    LIMIT :limit OFFSET :offset
+    """
+)
+
+_Q_TAXONOMY_GMAIL_IDS = text(
+    """
+    SELECT id, gmail_label_id
+    FROM taxonomy_label
+    WHERE id = ANY(:ids)
+    """
+)
+
+
 @router.post("/messages/push-bulk", response_model=PushResponse)
 def push_labels_bulk(req: PushBulkRequest) -> PushResponse:
     """Bulk push taxonomy labels to Gmail messages based on DB assignments."""
 
-    from sqlalchemy import text
-
-    from app.gmail.client import modify_message_labels
+    from app.gmail.client import (
+        BATCH_MODIFY_MAX_IDS,
+        batch_modify_message_labels,
+        is_invalid_id_error,
+        modify_message_labels,
+    )
 
-    s = Settings()
+    s = get_settings()
     service = _gmail_service(modify=True)
 
-    q = text(
-        """
-        SELECT
-            em.id AS message_id,
-            em.gmail_message_id AS gmail_message_id,
-            ARRAY_AGG(mtl.taxonomy_label_id) AS taxonomy_label_ids
-        FROM email_message em
-        JOIN message_taxonomy_label mtl ON mtl.message_id = em.id
-        JOIN taxonomy_label tl ON tl.id = mtl.taxonomy_label_id
-        WHERE tl.is_active = TRUE
-        GROUP BY em.id, em.gmail_message_id
-        ORDER BY em.id ASC
-        LIMIT :limit OFFSET :offset
-        """
-    )
-
+    params = {"limit": int(req.limit), "after": int(req.after), "offset": int(req.offset)}
     with engine.begin() as conn:
-        rows = conn.execute(q, {"limit": int(req.limit), "offset": int(req.offset)}).mappings().all()
+        rows = conn.execute(_Q_PUSH_BULK_PAGE, params).mappings().all()
 
     if not rows:
         return PushResponse(attempted=0, succeeded=0, failed=0, generated_at=datetime.now(timezone.utc))
@@ -381,13 +472,7 @@ def push_labels_bulk(req: PushBulkRequest) -> PushResponse:
 
     with engine.begin() as conn:
         label_rows = conn.execute(
-            text(
-                """
-                SELECT id, gmail_label_id
-                FROM taxonomy_label
-                WHERE id = ANY(:ids)
-                """
-            ),
+            _Q_TAXONOMY_GMAIL_IDS,
             {"ids": list(label_ids)},
         ).fetchall()
 
@@ -395,154 +480,180 @@ def push_labels_bulk(req: PushBulkRequest) -> PushResponse:
         int(r[0]): str(r[1]) for r in label_rows if r[1] is not None and str(r[1]).strip()
     }
 
-    attempted = 0
+    attempted = len(rows)
     succeeded = 0
     failed = 0
 
+    # Group messages by their (sorted) label set so each group can go out as batchModify calls.
+    groups: dict[tuple[str, ...], list[str]] = {}
     for r in rows:
-        msg_id = int(r["message_id"])
-        gmail_message_id = str(r["gmail_message_id"])
         tids = [int(x) for x in (r["taxonomy_label_ids"] or [])]
-        add_ids = [taxonomy_to_gmail.get(tid) for tid in tids]
-        add_ids = [x for x in add_ids if x]
-
-        attempted += 1
+        add_ids = tuple(sorted({taxonomy_to_gmail[tid] for tid in tids if tid in taxonomy_to_gmail}))
         if not add_ids:
             # Missing mapping; treat as a failure (actionable).
             failed += 1
             continue
+        groups.setdefault(add_ids, []).append(str(r["gmail_message_id"]))
 
-        try:
-            modify_message_labels(
-                service,
-                message_id=gmail_message_id,
-                add_label_ids=add_ids,
-                remove_label_ids=None,
-                user_id=s.gmail_user_id,
-            )
-            succeeded += 1
-        except Exception:
-            failed += 1
+    for add_ids, gmail_message_ids in groups.items():
+        for start in range(0, len(gmail_message_ids), BATCH_MODIFY_MAX_IDS):
+            chunk = gmail_message_ids[start : start + BATCH_MODIFY_MAX_IDS]
+            try:
+                batch_modify_message_labels(
+                    service,
+                    message_ids=chunk,
+                    add_label_ids=list(add_ids),
+                    user_id=s.gmail_user_id,
+                )
+                succeeded += len(chunk)
+                continue
+            except Exception as e:
+                # batchModify is all-or-nothing; retry per message so one bad id only fails itself.
+                # Rate-limit/server errors would only multiply quota use: fail the chunk instead.
+                if not is_invalid_id_error(e):
+                    logger.warning(
+                        "push_labels_batch_modify_failed",
+                        extra={"chunk_size": len(chunk), "add_label_ids": list(add_ids)},
+                        exc_info=True,
+                    )
+                    failed += len(chunk)
+                    continue
+
+            for gmail_message_id in chunk:
+                try:
+                    modify_message_labels(
+                        service,
+                        message_id=gmail_message_id,
+                        add_label_ids=list(add_ids),
+                        remove_label_ids=None,
+                        user_id=s.gmail_user_id,
+                    )
+                    succeeded += 1
+                except Exception:
+                    failed += 1
 
     return PushResponse(
         attempted=attempted,
         succeeded=succeeded,
         failed=failed,
         generated_at=datetime.now(timezone.utc),
+        next_after=int(rows[-1]["message_id"]),
     )
 
 
+_Q_OUTBOX_PENDING = text(
+    """
+    SELECT o.id, o.message_id, em.gmail_message_id
+    FROM label_push_outbox o
+    JOIN email_message em ON em.id = o.message_id
+    WHERE o.processed_at IS NULL
+    ORDER BY o.created_at ASC
+    LIMIT :limit
+    """
+)
+
+# Gmail label ids of each message's active taxonomy labels.
+_Q_OUTBOX_GMAIL_LABELS = text(
+    """
+    SELECT mtl.message_id, ARRAY_AGG(tl.gmail_label_id ORDER BY tl.id)
+    FROM message_taxonomy_label mtl
+    JOIN taxonomy_label tl ON tl.id = mtl.taxonomy_label_id
+    WHERE mtl.message_id = ANY(:ids)
+      AND tl.is_active = TRUE
+      AND NULLIF(btrim(tl.gmail_label_id), '') IS NOT NULL
+    GROUP BY mtl.message_id
+    """
+)
+
+# Close out a chunk of outbox rows; error is NULL for rows that succeeded.
+_Q_OUTBOX_CLOSE = text(
+    """
+    UPDATE label_push_outbox AS o
+    SET processed_at = NOW(), error = v.error
+    FROM unnest(CAST(:ids AS bigint[]), CAST(:errors AS text[])) AS v(id, error)
+    WHERE o.id = v.id
+    """
+)
+
+
 @router.post("/messages/push-incremental", response_model=PushResponse)
 def push_labels_incremental(req: PushIncrementalRequest) -> PushResponse:
-    """Incremental push using outbox table."""
+    """Incremental push using outbox table.
 
-    from sqlalchemy import text
+    Outbox rows are drained in chunks: each chunk's Gmail modifies go out as one HTTP batch
+    request (a few chunks in flight at once), and each chunk is closed out with a single UPDATE
+    as soon as its batch returns.
+    """
 
-    from app.gmail.client import modify_message_labels
+    from concurrent.futures import ThreadPoolExecutor, as_completed
 
-    s = Settings()
-    service = _gmail_service(modify=True)
+    from app.gmail.client import HTTP_BATCH_MAX_CALLS, modify_message_labels_batch
+
+    s = get_settings()
+    # Fail fast on auth problems before touching the outbox.
+    _gmail_service(modify=True)
 
     with engine.begin() as conn:
         outbox = conn.execute(
-            text(
-                """
-                SELECT o.id, o.message_id, em.gmail_message_id
-                FROM label_push_outbox o
-                JOIN email_message em ON em.id = o.message_id
-                WHERE o.processed_at IS NULL
-                ORDER BY o.created_at ASC
-                LIMIT :limit
-                """
-            ),
+            _Q_OUTBOX_PENDING,
             {"limit": int(req.limit)},
         ).mappings().all()
 
-    if not outbox:
-        return PushResponse(attempted=0, succeeded=0, failed=0, generated_at=datetime.now(timezone.utc))
-
-    attempted = 0
-    succeeded = 0
-    failed = 0
+        if not outbox:
+            return PushResponse(
+                attempted=0, succeeded=0, failed=0, generated_at=datetime.now(timezone.utc)
+            )
 
-    for o in outbox:
-        outbox_id = int(o["id"])
-        message_id = int(o["message_id"])
-        gmail_message_id = str(o["gmail_message_id"])
+        # Gmail label ids for every outbox message's active taxonomy labels, fetched once up front.
+        label_rows = conn.execute(
+            _Q_OUTBOX_GMAIL_LABELS,
+            {"ids": sorted({int(o["message_id"]) for o in outbox})},
+        ).fetchall()
 
-        attempted += 1
-        try:
-            # Compute current active taxonomy labels for the message.
-            with engine.begin() as conn:
-                tids = conn.execute(
-                    text(
-                        """
-                        SELECT mtl.taxonomy_label_id
-                        FROM message_taxonomy_label mtl
-                        JOIN taxonomy_label tl ON tl.id = mtl.taxonomy_label_id
-                        WHERE mtl.message_id = :mid AND tl.is_active = TRUE
-                        """
-                    ),
-                    {"mid": message_id},
-                ).fetchall()
-
-                tset = [int(r[0]) for r in tids]
-                label_rows = conn.execute(
-                    text(
-                        """
-                        SELECT id, gmail_label_id
-                        FROM taxonomy_label
-                        WHERE id = ANY(:ids)
-                        """
-                    ),
-                    {"ids": list(tset)},
-                ).fetchall()
-
-                taxonomy_to_gmail = {
-                    int(r[0]): str(r[1]) for r in label_rows if r[1] is not None and str(r[1]).strip()
-                }
-
-            add_ids = [taxonomy_to_gmail.get(tid) for tid in tset]
-            add_ids = [x for x in add_ids if x]
+    msg_to_gmail_labels: dict[int, list[str]] = {int(r[0]): list(r[1]) for r in label_rows}
 
+    # Per chunk: errors known before sending (outbox id -> error) and the Gmail changes to send.
+    chunks: list[tuple[dict[int, str | None], list[tuple[str, str, list[str], None]]]] = []
+    for start in range(0, len(outbox), HTTP_BATCH_MAX_CALLS):
+        errors: dict[int, str | None] = {}
+        changes: list[tuple[str, str, list[str], None]] = []
+        for o in outbox[start : start + HTTP_BATCH_MAX_CALLS]:
+            outbox_id = int(o["id"])
+            add_ids = msg_to_gmail_labels.get(int(o["message_id"]))
             if not add_ids:
-                raise RuntimeError("missing gmail label mapping for message")
+                errors[outbox_id] = "missing gmail label mapping for message"
+                continue
+            changes.append((str(outbox_id), str(o["gmail_message_id"]), add_ids, None))
+        chunks.append((errors, changes))
 
-            modify_message_labels(
-                service,
-                message_id=gmail_message_id,
-                add_label_ids=add_ids,
-                remove_label_ids=None,
-                user_id=s.gmail_user_id,
-            )
+    def _send(changes: list[tuple[str, str, list[str], None]]) -> dict[str, Exception | None]:
+        # The service is cached per thread, so each worker uses its own HTTP connection.
+        service = _gmail_service(modify=True)
+        return modify_message_labels_batch(service, changes=changes, user_id=s.gmail_user_id)
 
-            with engine.begin() as conn:
-                conn.execute(
-                    text(
-                        """
-                        UPDATE label_push_outbox
-                        SET processed_at = NOW(), error = NULL
-                        WHERE id = :id
-                        """
-                    ),
-                    {"id": outbox_id},
-                )
+    attempted = 0
+    succeeded = 0
+    failed = 0
 
-            succeeded += 1
-        except Exception as e:
-            failed += 1
-            with engine.begin() as conn:
+    # One connection closes out every chunk; each close still commits on its own.
+    workers = max(1, min(_PUSH_BATCH_WORKERS, len(chunks)))
+    with engine.connect() as conn, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_send, changes): errors for errors, changes in chunks}
+        for fut in as_completed(futures):
+            errors = futures[fut]
+            for request_id, exc in fut.result().items():
+                errors[int(request_id)] = None if exc is None else str(exc)[:5000]
+
+            with conn.begin():
                 conn.execute(
-                    text(
-                        """
-                        UPDATE label_push_outbox
-                        SET processed_at = NOW(), error = :error
-                        WHERE id = :id
-                        """
-                    ),
-                    {"id": outbox_id, "error": str(e)[:5000]},
+                    _Q_OUTBOX_CLOSE, {"ids": list(errors), "errors": list(errors.values())}
                 )
 
+            attempted += len(errors)
+            ok = sum(1 for err in errors.values() if err is None)
+            succeeded += ok
+            failed += len(errors) - ok
+
     return PushResponse(
         attempted=attempted,
         succeeded=succeeded,
@@ -551,16 +662,15 @@ def push_labels_incremental(req: PushIncrementalRequest) -> PushResponse:
     )
 
 
+_Q_OUTBOX_PENDING_COUNT = text("SELECT COUNT(*) FROM label_push_outbox WHERE processed_at IS NULL")
+
+
 @router.get("/messages/push-outbox/status", response_model=PushOutboxStatusResponse)
 def push_outbox_status() -> PushOutboxStatusResponse:
     """Return the number of pending label push outbox rows."""
 
-    from sqlalchemy import text
-
     with engine.begin() as conn:
-        pending = conn.execute(
-            text("SELECT COUNT(*) FROM label_push_outbox WHERE processed_at IS NULL")
-        ).scalar()
+        pending = conn.execute(_Q_OUTBOX_PENDING_COUNT).scalar()
 
     return PushOutboxStatusResponse(
         pending_outbox=int(pending or 0),
@@ -568,36 +678,12 @@ def push_outbox_status() -> PushOutboxStatusResponse:
     )
 
 
-@router.post("/retention/preview", response_model=RetentionPreviewResponse)
-def retention_preview(req: RetentionPreviewRequest) -> RetentionPreviewResponse:
-    """Preview messages eligible for retention archive sweep (Option A).
-
-    Retention is computed relative to the email's received time (email_message.internal_date),
-    not when the taxonomy label was assigned.
+# Eligible count and newest-first sample in one pass over the eligibility join: the window
+# count is taken before LIMIT, so every sample row carries the total. No rows means nothing
+# is eligible (limit >= 1).
+_Q_RETENTION_PREVIEW = text(
     """
-
-    from sqlalchemy import text
-
-    from app.repository.pipeline_kv_repository import get_retention_default_days
-
-    default_days = int(get_retention_default_days(engine))
-
-    q_count = text(
-        """
-        SELECT COUNT(DISTINCT em.id)
-        FROM email_message em
-        JOIN message_taxonomy_label mtl ON mtl.message_id = em.id
-        JOIN taxonomy_label tl ON tl.id = mtl.taxonomy_label_id
-                LEFT JOIN taxonomy_label p ON p.id = tl.parent_id
-        WHERE em.archived_at IS NULL
-                    AND em.internal_date <= (
-                        NOW() - (COALESCE(tl.retention_days, p.retention_days, :default_days)::text || ' days')::interval
-                    )
-        """
-    )
-
-    q_sample = text(
-        """
+    WITH e AS (
         SELECT DISTINCT
             em.id,
             em.gmail_message_id,
@@ -609,39 +695,84 @@ def retention_preview(req: RetentionPreviewRequest) -> RetentionPreviewResponse:
         JOIN taxonomy_label tl ON tl.id = mtl.taxonomy_label_id
                 LEFT JOIN taxonomy_label p ON p.id = tl.parent_id
         WHERE em.archived_at IS NULL
-                    AND em.internal_date <= (
-                        NOW() - (COALESCE(tl.retention_days, p.retention_days, :default_days)::text || ' days')::interval
+                    AND em.internal_date <= NOW() - make_interval(
+                        days => COALESCE(tl.retention_days, p.retention_days, CAST(:default_days AS int))
                     )
-        ORDER BY em.internal_date DESC
-        LIMIT :limit
-        """
     )
+    SELECT id, gmail_message_id, subject, from_domain, internal_date, COUNT(*) OVER () AS total
+    FROM e
+    ORDER BY internal_date DESC
+    LIMIT :limit
+    """
+)
+
+
+@router.post(
+    "/retention/preview",
+    response_model=RetentionPreviewResponse,
+    response_class=ORJSONResponse,
+)
+def retention_preview(req: RetentionPreviewRequest) -> ORJSONResponse:
+    """Preview messages eligible for retention archive sweep (Option A).
+
+    Retention is computed relative to the email's received time (email_message.internal_date),
+    not when the taxonomy label was assigned.
+    """
+
+    from app.repository.pipeline_kv_repository import get_retention_default_days
+
+    default_days = int(get_retention_default_days(engine))
 
     with engine.begin() as conn:
-        eligible = int(conn.execute(q_count, {"default_days": int(default_days)}).scalar() or 0)
         rows = conn.execute(
-            q_sample,
+            _Q_RETENTION_PREVIEW,
             {"limit": int(req.limit), "default_days": int(default_days)},
         ).fetchall()
 
+    eligible = int(rows[0][5]) if rows else 0
+
+    # Plain dicts in RetentionPreviewItem's shape: the values come straight from our own SQL, so
+    # there is nothing to validate per row.
     sample = [
-        RetentionPreviewItem(
-            message_id=int(r[0]),
-            gmail_message_id=str(r[1]),
-            subject=r[2],
-            from_domain=str(r[3]),
-            internal_date=r[4],
-        )
+        {
+            "message_id": int(r[0]),
+            "gmail_message_id": str(r[1]),
+            "subject": r[2],
+            "from_domain": str(r[3]),
+            "internal_date": r[4],
+        }
         for r in rows
     ]
 
-    return RetentionPreviewResponse(
-        eligible_count=eligible,
-        sample=sample,
-        generated_at=datetime.now(timezone.utc),
+    return ORJSONResponse(
+        {
+            "eligible_count": eligible,
+            "sample": sample,
+            "generated_at": datetime.now(timezone.utc),
+        }
     )
 
 
+# Messages past their effective retention, oldest id first.
+_Q_RETENTION_DUE = text(
+    """
+    SELECT DISTINCT em.id, em.gmail_message_id
+    FROM email_message em
+    JOIN message_taxonomy_label mtl ON mtl.message_id = em.id
+    JOIN taxonomy_label tl ON tl.id = mtl.taxonomy_label_id
+            LEFT JOIN taxonomy_label p ON p.id = tl.parent_id
+    WHERE em.archived_at IS NULL
+                AND em.internal_date <= NOW() - make_interval(
+                    days => COALESCE(tl.retention_days, p.retention_days, CAST(:default_days AS int))
+                )
+    ORDER BY em.id ASC
+    LIMIT :limit
+    """
+)
+
+_Q_MARK_ARCHIVED = text("UPDATE email_message SET archived_at = NOW() WHERE id = ANY(:ids)")
+
+
 @router.post("/retention/run", response_model=RetentionRunResponse)
 def retention_run(req: RetentionRunRequest) -> RetentionRunResponse:
     """Run retention archive sweep (Option A).
@@ -650,71 +781,95 @@ def retention_run(req: RetentionRunRequest) -> RetentionRunResponse:
     not when the taxonomy label was assigned.
     """
 
-    from sqlalchemy import text
-
-    from app.gmail.client import create_label, label_name_to_id, modify_message_labels
+    from app.gmail.client import (
+        BATCH_MODIFY_MAX_IDS,
+        batch_modify_message_labels,
+        create_label,
+        is_invalid_id_error,
+        modify_message_labels,
+    )
     from app.repository.pipeline_kv_repository import get_retention_default_days
 
-    s = Settings()
+    s = get_settings()
     service = _gmail_service(modify=True)
 
     default_days = int(get_retention_default_days(engine))
 
     # Ensure archive label exists.
-    name_to_id = label_name_to_id(service, user_id=s.gmail_user_id)
+    name_to_id, _ = _label_maps(service, user_id=s.gmail_user_id)
     archived_label_id = name_to_id.get(GMAIL_ARCHIVED_LABEL_NAME)
     if not archived_label_id and not req.dry_run:
         try:
             created = create_label(service, name=GMAIL_ARCHIVED_LABEL_NAME, user_id=s.gmail_user_id)
+            _invalidate_label_maps()
             archived_label_id = str(created.get("id"))
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"failed to ensure archive label: {e}") from e
 
-    q = text(
-        """
-        SELECT DISTINCT em.id, em.gmail_message_id
-        FROM email_message em
-        JOIN message_taxonomy_label mtl ON mtl.message_id = em.id
-        JOIN taxonomy_label tl ON tl.id = mtl.taxonomy_label_id
-                LEFT JOIN taxonomy_label p ON p.id = tl.parent_id
-        WHERE em.archived_at IS NULL
-                    AND em.internal_date <= (
-                        NOW() - (COALESCE(tl.retention_days, p.retention_days, :default_days)::text || ' days')::interval
-                    )
-        ORDER BY em.id ASC
-        LIMIT :limit
-        """
-    )
-
     with engine.begin() as conn:
         rows = conn.execute(
-            q,
+            _Q_RETENTION_DUE,
             {"limit": int(req.limit), "default_days": int(default_days)},
         ).fetchall()
 
-    attempted = 0
-    succeeded = 0
+    if req.dry_run:
+        return RetentionRunResponse(
+            dry_run=True,
+            attempted=len(rows),
+            succeeded=len(rows),
+            failed=0,
+            generated_at=datetime.now(timezone.utc),
+        )
+
+    add_label_ids = [archived_label_id] if archived_label_id else None
+    archived_ids: list[int] = []
     failed = 0
 
-    for msg_id, gmail_message_id in rows:
-        attempted += 1
+    # Every message gets the same label change, so send them as batchModify calls.
+    for start in range(0, len(rows), BATCH_MODIFY_MAX_IDS):
+        chunk = rows[start : start + BATCH_MODIFY_MAX_IDS]
         try:
-            if not req.dry_run:
+            batch_modify_message_labels(
+                service,
+                message_ids=[str(gmail_message_id) for _, gmail_message_id in chunk],
+                add_label_ids=add_label_ids,
+                remove_label_ids=["INBOX"],
+                user_id=s.gmail_user_id,
+            )
+            archived_ids.extend(int(msg_id) for msg_id, _ in chunk)
+            continue
+        except Exception as e:
+            # batchModify is all-or-nothing; retry per message so one bad id only fails itself.
+            # Rate-limit/server errors would only multiply quota use: fail the chunk instead.
+            if not is_invalid_id_error(e):
+                logger.warning(
+                    "retention_batch_modify_failed",
+                    extra={"chunk_size": len(chunk)},
+                    exc_info=True,
+                )
+                failed += len(chunk)
+                continue
+
+        for msg_id, gmail_message_id in chunk:
+            try:
                 modify_message_labels(
                     service,
                     message_id=str(gmail_message_id),
-                    add_label_ids=[archived_label_id] if archived_label_id else None,
+                    add_label_ids=add_label_ids,
                     remove_label_ids=["INBOX"],
                     user_id=s.gmail_user_id,
                 )
-                with engine.begin() as conn:
-                    conn.execute(
-                        text("UPDATE email_message SET archived_at = NOW() WHERE id = :id"),
-                        {"id": int(msg_id)},
-                    )
-            succeeded += 1
-        except Exception:
-            failed += 1
+                archived_ids.append(int(msg_id))
+            except Exception:
+                failed += 1
+
+    # Record every archived message in one statement.
+    if archived_ids:
+        with engine.begin() as conn:
+            conn.execute(_Q_MARK_ARCHIVED, {"ids": archived_ids})
+
+    attempted = len(rows)
+    succeeded = len(archived_ids)
 
     return RetentionRunResponse(
         dry_run=req.dry_run,
@@ -725,6 +880,37 @@ def retention_run(req: RetentionRunRequest) -> RetentionRunResponse:
     )
 
 
+# Capped retention plan: enqueue at most :limit eligible messages (lowest ids first).
+_Q_RETENTION_PLAN_CAPPED = text(
+    """
+    WITH eligible AS (
+        SELECT DISTINCT em.id AS message_id
+        FROM email_message em
+        JOIN message_taxonomy_label mtl ON mtl.message_id = em.id
+        JOIN taxonomy_label tl ON tl.id = mtl.taxonomy_label_id
+        LEFT JOIN taxonomy_label p ON p.id = tl.parent_id
+        WHERE em.archived_at IS NULL
+          AND em.gmail_message_id IS NOT NULL
+          AND em.internal_date <= NOW() - make_interval(
+              days => COALESCE(tl.retention_days, p.retention_days, CAST(:default_days AS int))
+          )
+        ORDER BY em.id ASC
+        LIMIT :limit
+    )
+    INSERT INTO archive_push_outbox (message_id, reason)
+    SELECT e.message_id, 'retention_eligible'
+    FROM eligible e
+    ON CONFLICT (message_id)
+    DO UPDATE SET
+        created_at = NOW(),
+        processed_at = NULL,
+        error = NULL
+    WHERE archive_push_outbox.processed_at IS NOT NULL
+    RETURNING message_id
+    """
+)
+
+
 @router.post("/retention/plan", response_model=RetentionPlanResponse)
 def retention_plan(req: RetentionPlanRequest) -> RetentionPlanResponse:
     """Plan retention archive actions in Postgres (DB-only).
@@ -736,8 +922,6 @@ def retention_plan(req: RetentionPlanRequest) -> RetentionPlanResponse:
     This endpoint does NOT call Gmail.
     """
 
-    from sqlalchemy import text
-
     from app.repository.pipeline_kv_repository import get_retention_default_days
     from app.repository.retention_archive_repository import count_pending_outbox, plan_archive_outbox
 
@@ -747,37 +931,9 @@ def retention_plan(req: RetentionPlanRequest) -> RetentionPlanResponse:
     if req.max_rows is not None:
         # We implement the cap by selecting a bounded set of eligible message ids.
         # This is still idempotent due to UNIQUE(message_id) in the outbox.
-        q = text(
-            """
-            WITH eligible AS (
-                SELECT DISTINCT em.id AS message_id
-                FROM email_message em
-                JOIN message_taxonomy_label mtl ON mtl.message_id = em.id
-                JOIN taxonomy_label tl ON tl.id = mtl.taxonomy_label_id
-                LEFT JOIN taxonomy_label p ON p.id = tl.parent_id
-                WHERE em.archived_at IS NULL
-                  AND em.gmail_message_id IS NOT NULL
-                                    AND em.internal_date <= (
-                    NOW() - (COALESCE(tl.retention_days, p.retention_days, :default_days)::text || ' days')::interval
-                  )
-                ORDER BY em.id ASC
-                LIMIT :limit
-            )
-            INSERT INTO archive_push_outbox (message_id, reason)
-            SELECT e.message_id, 'retention_eligible'
-            FROM eligible e
-            ON CONFLICT (message_id)
-            DO UPDATE SET
-                created_at = NOW(),
-                processed_at = NULL,
-                error = NULL
-            RETURNING message_id
-            """
-        )
-
         with engine.begin() as conn:
             planned_rows = conn.execute(
-                q,
+                _Q_RETENTION_PLAN_CAPPED,
                 {"default_days": int(default_days), "limit": int(req.max_rows)},
             ).fetchall()
         planned = int(len(planned_rows))
@@ -10,50 +10,132 @@ This is an in-memory job runner suitable for Phase 1 UI wiring.
 
 from __future__ import annotations
 
+import heapq
+import secrets
 import threading
 import time
-import uuid
-import queue
 import json
-from dataclasses import dataclass
+import logging
+import queue
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Iterator
 
 from fastapi import APIRouter
-from fastapi import HTTPException
-from fastapi.encoders import jsonable_encoder
+from fastapi import Depends, Header, HTTPException, Response
+from sqlalchemy import text
 from starlette.responses import StreamingResponse
 
+from app.api._orjson import dumps
 from app.api.models import CurrentJobResponse, JobCounters, JobProgress, JobStatusResponse
 from app.clustering.pipeline import cluster_and_label
 from app.ingestion.metadata_ingestion import ingest_metadata
 from app.labeling.incremental_pipeline import label_unlabelled_individual
 from app.repository.email_query_repository import count_total, count_unlabelled
 from app.repository.pipeline_kv_repository import clear_checkpoint_internal_date
-from app.settings import Settings
+from app.settings import Settings, get_settings
 from app.vector.qdrant import ensure_collection
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/jobs", tags=["jobs"])
 
+# Most recent error samples kept per job (UI/debug visibility only).
+_ERROR_SAMPLES_MAX = 20
+
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class _Job:
     job_id: str
     type: str
     state: str
     phase: str | None
     started_at: datetime
-    updated_at: datetime
     progress_total: int | None
     progress_processed: int
-    counters: JobCounters
     message: str | None
-    error_samples: list[str]
+    error_samples: tuple[str, ...]
     eta_hint: str | None
+    # Internal timing is monotonic nanoseconds; the wall-clock updated_at is only derived when
+    # a response is built. last_progress_ns marks the last update that changed anything and
+    # drives poll back-off.
+    started_ns: int = field(default_factory=time.monotonic_ns)
+    updated_at_ns: int = field(default_factory=time.monotonic_ns)
+    last_progress_ns: int = field(default_factory=time.monotonic_ns)
+    last_broadcast_ns: int = 0
+    # Pre-serialized `"job_id":…,"type":…,"started_at":…,` for SSE payloads (set on register).
+    json_prefix: str = ""
+    # Counters are plain ints on the hot path; JobCounters is only built for responses.
+    inserted: int = 0
+    skipped_existing: int = 0
+    failed: int = 0
+    # Serializes writers of this job only (shared by all of its snapshots).
+    lock: threading.Lock = field(default_factory=threading.Lock, compare=False, repr=False)
+    # Writer-side ring buffer behind error_samples (shared by all snapshots, mutated under
+    # lock); readers only ever see the error_samples tuple.
+    error_buf: deque[str] = field(
+        default_factory=lambda: deque(maxlen=_ERROR_SAMPLES_MAX), compare=False, repr=False
+    )
 
-
-_jobs: dict[str, _Job] = {}
-_lock = threading.Lock()
+    @property
+    def updated_at(self) -> datetime:
+        elapsed_us = (self.updated_at_ns - self.started_ns) // 1000
+        return self.started_at + timedelta(microseconds=elapsed_us)
+
+
+# Each job lives in a single-slot list ("cell") holding an immutable _Job snapshot. Writers build
+# a new snapshot and swap it in with one (GIL-atomic) item assignment, so readers (status polls,
+# /current, SSE) just dereference cell[0] and never take a lock. Concurrent writers of one job
+# serialize on that job's own lock; _registry_lock only guards the shape of _jobs (inserts,
+# reordering, eviction).
+# Finished jobs are moved to the end as they complete and the oldest are evicted beyond
+# Settings.job_history_limit, so memory stays bounded on long-running servers.
+_jobs: OrderedDict[str, list[_Job]] = OrderedDict()
+_TERMINAL_STATES = frozenset({"succeeded", "failed", "cancelled"})
+_registry_lock = threading.Lock()
+
+# Ids of jobs currently in the "running" state, maintained by _set_job so /current
+# does not scan every job ever started.
+_running: set[str] = set()
+
+# Each job type runs on its own lane: one daemon worker draining a FIFO of futures. Jobs of the
+# same type write the same tables, so a second submission waits (state "queued") behind the
+# first, while other job types are not held up by it. Daemon workers never block interpreter
+# exit or a reload; jobs still queued at shutdown are cancelled (see cancel_queued_jobs).
+# Futures of queued/running jobs are kept so queued jobs can be cancelled.
+_lanes: dict[str, queue.SimpleQueue] = {}
+_lanes_lock = threading.Lock()
+_futures: dict[str, Future] = {}
+
+# Idempotency-Key -> (job_id, registered at monotonic), bounded and short-lived: lets clients
+# retry a start request without launching a second job.
+_IDEMPOTENCY_TTL_SECONDS = 600.0
+_IDEMPOTENCY_MAX_KEYS = 256
+_idempotency_keys: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+# Polling cadence hints (ms). The UI's fixed cadences (2s for /status, 5s for /current) are
+# floors: running jobs are polled at the base interval while they make progress and backed
+# off (x4 after 2s idle, x10 after 10s) when they stall.
+_POLL_QUEUED_MS = 2000
+_POLL_RUNNING_MS = 2000
+_POLL_TERMINAL_MS = 30000
+_POLL_CURRENT_MIN_MS = 5000  # /current, with or without an active job
+_POLL_MAX_MS = 25000
+
+# Progress hooks fire once per page/batch. Instead of taking the job lock on every call they drop
+# their latest snapshot (a dict of _set_job kwargs) into this mailbox with one GIL-atomic store;
+# one shared flusher thread (see _flush_progress) applies it at most every
+# _PROGRESS_FLUSH_SECONDS, and any direct _set_job call drains it first so ordering is preserved.
+_progress_mailbox: dict[str, dict] = {}
+_progress_posted = threading.Event()
+_PROGRESS_FLUSH_SECONDS = 0.1
+
+# SSE pushes for plain progress ticks are limited to one per job per interval; state/phase
+# changes (including the terminal update) always go out.
+_BROADCAST_MIN_INTERVAL_NS = 100_000_000
 
 # Simple in-memory pub/sub for pushing job status updates (SSE).
 #
@@ -63,46 +145,43 @@ _lock = threading.Lock()
 #
 # Note: in multi-worker deployments, clients must reconnect to the same worker
 # to receive updates (sticky sessions) OR we should switch to Redis/pubsub.
-_subscribers: dict[str, set[queue.Queue[str]]] = {}
+# Each subscriber is a bounded deque (appends are GIL-atomic and maxlen drops the oldest
+# update for slow clients) plus an Event that wakes the SSE generator.
+_SUBSCRIBER_BUFFER = 25
+
+
+@dataclass(eq=False, slots=True)
+class _Subscriber:
+    buf: deque[str] = field(default_factory=lambda: deque(maxlen=_SUBSCRIBER_BUFFER))
+    ready: threading.Event = field(default_factory=threading.Event)
+
+
+_subscribers: dict[str, set[_Subscriber]] = {}
 _sub_lock = threading.Lock()
 
 
-def _subscribe(job_id: str) -> queue.Queue[str]:
-    q: queue.Queue[str] = queue.Queue(maxsize=25)
+def _subscribe(job_id: str) -> _Subscriber:
+    sub = _Subscriber()
     with _sub_lock:
-        _subscribers.setdefault(job_id, set()).add(q)
-    return q
+        _subscribers.setdefault(job_id, set()).add(sub)
+    return sub
 
 
-def _unsubscribe(job_id: str, q: queue.Queue[str]) -> None:
+def _unsubscribe(job_id: str, sub: _Subscriber) -> None:
     with _sub_lock:
         subs = _subscribers.get(job_id)
         if not subs:
             return
-        subs.discard(q)
+        subs.discard(sub)
         if not subs:
             _subscribers.pop(job_id, None)
 
 
 def _broadcast(job_id: str, payload: str) -> None:
-    # Never block the job runner thread.
-    with _sub_lock:
-        subs = list(_subscribers.get(job_id, set()))
-
-    for q in subs:
-        try:
-            q.put_nowait(payload)
-        except queue.Full:
-            # Drop oldest and retry once.
-            try:
-                _ = q.get_nowait()
-            except queue.Empty:
-                pass
-            try:
-                q.put_nowait(payload)
-            except queue.Full:
-                # Still full, drop this update.
-                pass
+    # Never block the job runner thread: tuple() snapshots the set without taking _sub_lock.
+    for sub in tuple(_subscribers.get(job_id, ())):
+        sub.buf.append(payload)
+        sub.ready.set()
 
 
 def _now() -> datetime:
@@ -115,18 +194,26 @@ def _format_eta(seconds: float | None) -> str | None:
     if seconds < 0:
         return None
 
+    # Snap to the displayed granularity (5s steps under a minute, rounded up so work still left
+    # never reads "~0s"; whole minutes above) so progress ticks map onto a few cached strings.
     s = int(seconds)
+    if s < 60:
+        return _format_eta_bucket(max(5, s + (-s % 5)))
+    return _format_eta_bucket(s - s % 60)
+
+
+@lru_cache(maxsize=256)
+def _format_eta_bucket(s: int) -> str:
     if s < 60:
         return f"~{s}s"
     if s < 3600:
-        m = max(1, s // 60)
-        return f"~{m}m"
+        return f"~{s // 60}m"
     h = s // 3600
     m = (s % 3600) // 60
     return f"~{h}h {m}m"
 
 
-def _compute_eta_hint(*, started_at: datetime, processed: int, total: int | None) -> str | None:
+def _compute_eta_hint(*, elapsed: float, processed: int, total: int | None) -> str | None:
     if not total or total <= 0:
         return None
     if processed <= 0:
@@ -134,7 +221,6 @@ def _compute_eta_hint(*, started_at: datetime, processed: int, total: int | None
     if processed >= total:
         return "~0s"
 
-    elapsed = (_now() - started_at).total_seconds()
     if elapsed <= 0:
         return None
 
@@ -146,9 +232,54 @@ def _compute_eta_hint(*, started_at: datetime, processed: int, total: int | None
     return _format_eta(remaining / rate)
 
 
+def _register_job(
+    job: _Job,
+    *,
+    exclusive: bool = False,
+    idempotency_key: str | None = None,
+) -> str:
+    """Register a new job and return the job_id callers should report.
+
+    With `exclusive`, an existing queued/running job of the same type is returned instead of
+    registering `job`; a known `idempotency_key` likewise returns its original job. Callers must
+    only start `job` when the returned id is `job.job_id`.
+    """
+
+    now = time.monotonic()
+    with _registry_lock:
+        if idempotency_key:
+            while _idempotency_keys:
+                oldest_key, (_, at) = next(iter(_idempotency_keys.items()))
+                if now - at <= _IDEMPOTENCY_TTL_SECONDS:
+                    break
+                del _idempotency_keys[oldest_key]
+            hit = _idempotency_keys.get(idempotency_key)
+            if hit is not None and hit[0] in _jobs:
+                return hit[0]
+
+        if exclusive:
+            for cell in _jobs.values():
+                other = cell[0]
+                if other.type == job.type and other.state in ("queued", "running"):
+                    return other.job_id
+
+        _jobs[job.job_id] = [replace(job, json_prefix=_json_prefix(job))]
+        if idempotency_key:
+            _idempotency_keys[idempotency_key] = (job.job_id, now)
+            _idempotency_keys.move_to_end(idempotency_key)
+            while len(_idempotency_keys) > _IDEMPOTENCY_MAX_KEYS:
+                _idempotency_keys.popitem(last=False)
+    return job.job_id
+
+
+def _get_job(job_id: str) -> _Job | None:
+    cell = _jobs.get(job_id)
+    return cell[0] if cell is not None else None
+
+
 def _make_job_id(prefix: str) -> str:
-    stamp = _now().strftime("%Y%m%d-%H%M%S")
-    return f"job-{stamp}-{prefix}-{uuid.uuid4().hex[:6]}"
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+    return f"job-{stamp}-{prefix}-{secrets.token_hex(3)}"
 
 
 def _set_job(
@@ -163,44 +294,128 @@ def _set_job(
     failed: int | None = None,
     message: str | None = None,
 ):
-    with _lock:
-        job = _jobs[job_id]
-        if state is not None:
-            job.state = state
-        if phase is not None:
-            job.phase = phase
-        if processed is not None:
-            job.progress_processed = processed
-        if total is not None:
-            job.progress_total = total
-        if inserted is not None:
-            job.counters.inserted = inserted
-        if skipped_existing is not None:
-            job.counters.skipped_existing = skipped_existing
-        if failed is not None:
-            job.counters.failed = failed
-        if message is not None:
-            job.message = message
+    cell = _jobs[job_id]
+    # Read the clock before taking the lock; only merging and the ETA run under it.
+    now_ns = time.monotonic_ns()
+    with cell[0].lock:
+        job = cell[0]
+
+        # Coalesced hook progress goes first; explicit arguments win over it.
+        updates = _progress_mailbox.pop(job_id, None) or {}
+        for key, value in (
+            ("state", state),
+            ("phase", phase),
+            ("processed", processed),
+            ("total", total),
+            ("inserted", inserted),
+            ("skipped_existing", skipped_existing),
+            ("failed", failed),
+            ("message", message),
+        ):
+            if value is not None:
+                updates[key] = value
+
+        changes: dict = {}
+        for key, attr in (
+            ("state", "state"),
+            ("phase", "phase"),
+            ("processed", "progress_processed"),
+            ("total", "progress_total"),
+            ("inserted", "inserted"),
+            ("skipped_existing", "skipped_existing"),
+            ("failed", "failed"),
+            ("message", "message"),
+        ):
+            if updates.get(key) is not None:
+                changes[attr] = updates[key]
+
+        if any(getattr(job, k) != v for k, v in changes.items()):
+            changes["last_progress_ns"] = now_ns
 
         # Best-effort ETA based on elapsed time and processed/total.
-        job.eta_hint = _compute_eta_hint(
-            started_at=job.started_at,
-            processed=job.progress_processed,
-            total=job.progress_total,
+        changes["eta_hint"] = _compute_eta_hint(
+            elapsed=(now_ns - job.started_ns) / 1e9,
+            processed=changes.get("progress_processed", job.progress_processed),
+            total=changes.get("progress_total", job.progress_total),
         )
-        job.updated_at = _now()
+        # A writer that waited on the lock may hold an older reading; never move backwards.
+        changes["updated_at_ns"] = max(now_ns, job.updated_at_ns)
 
-        # Push best-effort status update to any SSE subscribers.
+        broadcast = (
+            changes.get("state", job.state) != job.state
+            or changes.get("phase", job.phase) != job.phase
+            or now_ns - job.last_broadcast_ns >= _BROADCAST_MIN_INTERVAL_NS
+        )
+        if broadcast:
+            changes["last_broadcast_ns"] = now_ns
+
+        job = replace(job, **changes)
+        cell[0] = job
+
+        if job.state == "running":
+            _running.add(job_id)
+        else:
+            _running.discard(job_id)
+
+    finished = state in _TERMINAL_STATES
+    if finished:
+        with _registry_lock:
+            if job_id in _jobs:
+                _jobs.move_to_end(job_id)
+
+    # Push best-effort status update to any SSE subscribers (dirty read: skip encoding when
+    # nobody is listening).
+    if broadcast and _subscribers.get(job_id):
         try:
-            status = _as_response(job)
-            payload = json.dumps(jsonable_encoder(status))
-            _broadcast(job_id, payload)
+            _broadcast(job_id, _status_payload(job))
         except Exception:
             # Do not let notification failures affect job execution.
             pass
 
+    if finished:
+        _evict_finished_jobs(limit=get_settings().job_history_limit)
+
+
+def _evict_finished_jobs(*, limit: int) -> None:
+    """Drop the oldest finished jobs beyond `limit` (running/queued jobs are never evicted)."""
+
+    with _registry_lock:
+        # Terminal jobs sit in completion order, so the first ones found are the oldest.
+        finished = [jid for jid, cell in _jobs.items() if cell[0].state in _TERMINAL_STATES]
+        for jid in finished[: max(0, len(finished) - max(0, int(limit)))]:
+            del _jobs[jid]
+
+
+def _post_progress(job_id: str, **updates) -> None:
+    """Record the latest progress for a job without locking (applied by the shared flusher).
+
+    Takes the same keyword arguments as _set_job.
+    """
+
+    _progress_mailbox[job_id] = updates
+    if not _progress_posted.is_set():
+        _progress_posted.set()
+
+
+def _flush_progress() -> None:
+    # Sleeps on the event while no hook is posting; otherwise drains every
+    # _PROGRESS_FLUSH_SECONDS. Clearing before the drain re-arms the event for racing posts.
+    while True:
+        _progress_posted.wait()
+        time.sleep(_PROGRESS_FLUSH_SECONDS)
+        _progress_posted.clear()
+        for job_id in tuple(_progress_mailbox):
+            try:
+                _set_job(job_id)
+            except Exception:
+                # Evicted job or a failed broadcast: drop the update, keep the thread alive.
+                _progress_mailbox.pop(job_id, None)
+
+
+threading.Thread(target=_flush_progress, name="jobs-progress", daemon=True).start()
+
 
-def _add_job_error(job_id: str, sample: str, *, limit: int = 20) -> None:
+def _add_job_error(job_id: str, sample: str) -> None:
     """Attach a small number of error samples to a job.
 
     This is meant for UI/debug visibility ("why did it fail?") without requiring
@@ -209,24 +424,44 @@ def _add_job_error(job_id: str, sample: str, *, limit: int = 20) -> None:
 
     if not sample:
         return
-    with _lock:
-        job = _jobs.get(job_id)
-        if not job:
-            return
-        job.error_samples.append(sample)
-        if limit > 0 and len(job.error_samples) > int(limit):
-            job.error_samples = job.error_samples[-int(limit) :]
-        job.updated_at = _now()
+    cell = _jobs.get(job_id)
+    if cell is None:
+        return
+    with cell[0].lock:
+        job = cell[0]
+        # The deque drops the oldest sample past _ERROR_SAMPLES_MAX; snapshot it once.
+        job.error_buf.append(sample)
+        job = replace(
+            job, error_samples=tuple(job.error_buf), updated_at_ns=time.monotonic_ns()
+        )
+        cell[0] = job
 
-        # Push best-effort update (non-fatal).
+    # Push best-effort update (non-fatal).
+    if _subscribers.get(job_id):
         try:
-            status = _as_response(job)
-            payload = json.dumps(jsonable_encoder(status))
-            _broadcast(job_id, payload)
+            _broadcast(job_id, _status_payload(job))
         except Exception:
             pass
 
 
+def _poll_after_ms(job: _Job) -> int:
+    """Suggest how long a client should wait before polling this job again."""
+
+    if job.state == "queued":
+        return _POLL_QUEUED_MS
+    if job.state != "running":
+        return _POLL_TERMINAL_MS
+
+    idle = (time.monotonic_ns() - job.last_progress_ns) / 1e9
+    if idle < 2.0:
+        factor = 1
+    elif idle <= 10.0:
+        factor = 4
+    else:
+        factor = 10
+    return min(_POLL_RUNNING_MS * factor, _POLL_MAX_MS)
+
+
 def _as_response(job: _Job) -> JobStatusResponse:
     percent = None
     if job.progress_total and job.progress_total > 0:
@@ -240,27 +475,77 @@ def _as_response(job: _Job) -> JobStatusResponse:
         started_at=job.started_at,
         updated_at=job.updated_at,
         progress=JobProgress(total=job.progress_total, processed=job.progress_processed, percent=percent),
-        counters=job.counters,
+        counters=JobCounters(
+            inserted=job.inserted, skipped_existing=job.skipped_existing, failed=job.failed
+        ),
         message=job.message,
         error_samples=list(job.error_samples) if job.error_samples else None,
         eta_hint=job.eta_hint,
+        poll_after_ms=_poll_after_ms(job),
     )
 
 
+def _json_prefix(job: _Job) -> str:
+    static = dumps({"job_id": job.job_id, "type": job.type, "started_at": job.started_at})
+    return static[1:-1].decode("utf-8") + ","
+
+
+def _status_payload(job: _Job) -> str:
+    """Serialize a job as JobStatusResponse JSON for SSE.
+
+    Progress ticks are frequent, so this skips building the pydantic model: only the mutable
+    fields are serialized and spliced after the job's pre-serialized static prefix. Polling
+    endpoints keep using _as_response.
+    """
+
+    percent = None
+    if job.progress_total and job.progress_total > 0:
+        percent = 100.0 * (job.progress_processed / job.progress_total)
+
+    mutable = dumps(
+        {
+            "state": job.state,
+            "phase": job.phase,
+            "updated_at": job.updated_at,
+            "progress": {
+                "total": job.progress_total,
+                "processed": job.progress_processed,
+                "percent": percent,
+            },
+            "counters": {
+                "inserted": job.inserted,
+                "skipped_existing": job.skipped_existing,
+                "failed": job.failed,
+            },
+            "message": job.message,
+            "error_samples": list(job.error_samples) if job.error_samples else None,
+            "eta_hint": job.eta_hint,
+            "poll_after_ms": _poll_after_ms(job),
+        }
+    )
+    return "{" + job.json_prefix + mutable[1:].decode("utf-8")
+
+
 def _active_job() -> _Job | None:
-    with _lock:
-        for job in _jobs.values():
-            if job.state == "running":
-                return job
+    # tuple() snapshots the set in one step, so writers can't change it mid-iteration.
+    for job_id in tuple(_running):
+        job = _get_job(job_id)
+        if job is not None and job.state == "running":
+            return job
     return None
 
 
+# Polling endpoints are async: they only read job cells, so polls skip the threadpool hop.
 @router.get("/current", response_model=CurrentJobResponse)
-def current_job() -> CurrentJobResponse:
+async def current_job() -> CurrentJobResponse:
     job = _active_job()
     if not job:
-        return CurrentJobResponse(active=None)
-    return CurrentJobResponse(active={"job_id": job.job_id, "type": job.type, "state": job.state})
+        return CurrentJobResponse(active=None, poll_after_ms=_POLL_CURRENT_MIN_MS)
+    return CurrentJobResponse(
+        active={"job_id": job.job_id, "type": job.type, "state": job.state},
+        # Status updates come over SSE or /status; /current only backs off from its 5s.
+        poll_after_ms=max(_POLL_CURRENT_MIN_MS, _poll_after_ms(job)),
+    )
 
 
 @router.get("/recent", response_model=list[JobStatusResponse])
@@ -273,20 +558,41 @@ def recent_jobs(limit: int = 25) -> list[JobStatusResponse]:
     """
 
     limit = max(1, min(int(limit), 200))
-    with _lock:
-        jobs = list(_jobs.values())
-    jobs.sort(key=lambda j: j.started_at, reverse=True)
-    return [_as_response(j) for j in jobs[:limit]]
+    # Partial selection of the newest `limit` jobs instead of sorting the whole history.
+    jobs = heapq.nlargest(
+        limit, (cell[0] for cell in list(_jobs.values())), key=lambda j: j.started_at
+    )
+    return [_as_response(j) for j in jobs]
 
 
 @router.get("/{job_id}/status", response_model=JobStatusResponse)
-def job_status(job_id: str) -> JobStatusResponse:
-    with _lock:
-        job = _jobs.get(job_id)
+async def job_status(job_id: str, response: Response) -> JobStatusResponse:
+    job = _get_job(job_id)
     if not job:
         # Use a proper HTTP error so clients don't see a 500.
         raise HTTPException(status_code=404, detail=f"Unknown job_id: {job_id}")
-    return _as_response(job)
+    status = _as_response(job)
+    # Never serve a cached snapshot: a finished job must not keep looking "running".
+    response.headers["Cache-Control"] = "no-cache"
+    return status
+
+
+@router.post("/{job_id}/cancel", response_model=JobStatusResponse)
+def cancel_job(job_id: str) -> JobStatusResponse:
+    """Cancel a job that is still queued behind another job of the same type.
+
+    Running jobs can't be interrupted; they return 409.
+    """
+
+    job = _get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Unknown job_id: {job_id}")
+    fut = _futures.get(job_id)
+    if fut is not None and not fut.cancel() and not fut.cancelled():
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is already {job.state}")
+    if fut is None and job.state not in _TERMINAL_STATES:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is already {job.state}")
+    return _as_response(_get_job(job_id) or job)
 
 
 @router.get("/{job_id}/events")
@@ -300,12 +606,11 @@ def job_events(job_id: str):
     Keepalive comments are sent periodically.
     """
 
-    with _lock:
-        job = _jobs.get(job_id)
+    job = _get_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail=f"Unknown job_id: {job_id}")
 
-    q = _subscribe(job_id)
+    sub = _subscribe(job_id)
 
     def gen() -> Iterator[bytes]:
         try:
@@ -314,45 +619,116 @@ def job_events(job_id: str):
 
             # Emit the current snapshot immediately.
             try:
-                with _lock:
-                    cur = _jobs.get(job_id)
+                cur = _get_job(job_id)
                 if cur is not None:
-                    payload = json.dumps(jsonable_encoder(_as_response(cur)))
+                    payload = _status_payload(cur)
                     yield f"event: job_status\ndata: {payload}\n\n".encode("utf-8")
             except Exception:
                 pass
 
-            # Stream subsequent updates.
+            # Stream subsequent updates. Keepalives are only due after 15s without output.
+            deadline = time.monotonic() + 15.0
             while True:
-                try:
-                    payload = q.get(timeout=15.0)
-                    yield f"event: job_status\ndata: {payload}\n\n".encode("utf-8")
-                except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not sub.ready.wait(timeout=remaining):
                     # Keepalive
                     yield b": keep-alive\n\n"
+                    deadline = time.monotonic() + 15.0
+                    continue
+                # Clear before draining so an append racing the drain re-arms the event.
+                sub.ready.clear()
+                # Emit everything buffered since the last wakeup as one chunk.
+                drained: list[str] = []
+                while sub.buf:
+                    drained.append(sub.buf.popleft())
+                if drained:
+                    yield "".join(
+                        f"event: job_status\ndata: {payload}\n\n" for payload in drained
+                    ).encode("utf-8")
+                    deadline = time.monotonic() + 15.0
         finally:
-            _unsubscribe(job_id, q)
+            _unsubscribe(job_id, sub)
 
     return StreamingResponse(gen(), media_type="text/event-stream")
 
 
+def _lane_worker(lane: queue.SimpleQueue) -> None:
+    while True:
+        fut, fn = lane.get()
+        # False when the job was cancelled while queued; its done-callback already ran.
+        if not fut.set_running_or_notify_cancel():
+            continue
+        try:
+            fut.set_result(fn())
+        except BaseException as exc:  # noqa: BLE001
+            fut.set_exception(exc)
+
+
+def _submit_to_lane(job_type: str, fn) -> Future:
+    fut: Future = Future()
+    with _lanes_lock:
+        lane = _lanes.get(job_type)
+        if lane is None:
+            lane = _lanes[job_type] = queue.SimpleQueue()
+            threading.Thread(
+                target=_lane_worker, args=(lane,), name=f"jobs-{job_type}", daemon=True
+            ).start()
+    lane.put((fut, fn))
+    return fut
+
+
+def cancel_queued_jobs() -> None:
+    """Cancel every job that has not started yet (called on application shutdown)."""
+
+    for fut in list(_futures.values()):
+        fut.cancel()
+
+
 def _run_in_thread(job_id: str, fn):
+    """Queue `fn` on its job type's lane; terminal state is set by a done-callback."""
+
     def runner():
         _set_job(job_id, state="running")
-        try:
-            fn()
-            # Preserve any final summary message set by the job task.
-            with _lock:
-                msg = _jobs.get(job_id).message if job_id in _jobs else None
-            _set_job(job_id, state="succeeded", message=msg or "Done")
-        except Exception as exc:  # noqa: BLE001
+        fn()
+
+    def finish(fut: Future) -> None:
+        _futures.pop(job_id, None)
+        if fut.cancelled():
+            _set_job(job_id, state="cancelled", message="Cancelled before it started")
+            return
+        exc = fut.exception()
+        if exc is not None:
             _set_job(job_id, state="failed", message=str(exc))
+            return
+        # Apply the last coalesced hook update before reading the summary message.
+        if job_id in _progress_mailbox:
+            _set_job(job_id)
+        # Preserve any final summary message set by the job task.
+        cur = _get_job(job_id)
+        msg = cur.message if cur is not None else None
+        _set_job(job_id, state="succeeded", message=msg or "Done")
+
+    job = _get_job(job_id)
+    fut = _submit_to_lane(job.type if job is not None else "", runner)
+    _futures[job_id] = fut
+    fut.add_done_callback(finish)
 
-    t = threading.Thread(target=runner, daemon=True)
-    t.start()
+
+# resultSizeEstimate is only a rough UI total, so repeat jobs (e.g. refresh clicks) within the
+# TTL reuse it instead of paying another Gmail round trip.
+_ESTIMATE_TTL_NS = 60 * 1_000_000_000
+_estimate_lock = threading.Lock()
+_estimate_cache: dict[tuple[str, str | None], tuple[int, int]] = {}  # key -> (total, expires)
 
 
 def _gmail_total_estimate(service, *, user_id: str, q: str | None) -> int | None:
+    key = (user_id, q)
+    now_ns = time.monotonic_ns()
+    with _estimate_lock:
+        hit = _estimate_cache.get(key)
+    if hit is not None and hit[1] > now_ns:
+        return hit[0]
+
     try:
         resp = (
             service.users()
@@ -361,16 +737,81 @@ def _gmail_total_estimate(service, *, user_id: str, q: str | None) -> int | None
             .execute()
         )
         est = resp.get("resultSizeEstimate")
-        return int(est) if est is not None else None
+        total = int(est) if est is not None else None
     except Exception:
         return None
 
+    if total is not None:
+        with _estimate_lock:
+            # Drop expired entries so distinct checkpoint queries don't accumulate.
+            for stale in [k for k, (_, exp) in _estimate_cache.items() if exp <= now_ns]:
+                del _estimate_cache[stale]
+            _estimate_cache[key] = (total, now_ns + _ESTIMATE_TTL_NS)
+    return total
+
+
+# Ingest jobs hand their total estimate to one long-lived daemon thread so the round trip
+# overlaps the first ingest page. The thread keeps its own cached Gmail service (httplib2 is not
+# thread-safe) and never runs the interactive OAuth flow, so only job threads write token.json.
+_estimate_requests: queue.SimpleQueue = queue.SimpleQueue()
+
+
+def _estimate_worker() -> None:
+    while True:
+        job_id, settings, q = _estimate_requests.get()
+        try:
+            from app.gmail.client import get_gmail_service_cached
+
+            service = get_gmail_service_cached(
+                credentials_path=settings.gmail_credentials_path,
+                token_path=settings.gmail_token_path,
+                allow_interactive=False,
+            )
+            total = _gmail_total_estimate(service, user_id=settings.gmail_user_id, q=q)
+        except Exception:
+            logger.warning("gmail_total_estimate_failed", extra={"job_id": job_id}, exc_info=True)
+            continue
+        # The job may already be finished and evicted by the time the estimate arrives.
+        if total is not None and _get_job(job_id) is not None:
+            _set_job(job_id, total=total)
+
+
+threading.Thread(target=_estimate_worker, name="jobs-estimate", daemon=True).start()
+
+
+def _start_total_estimate(job_id: str, *, settings: Settings, q: str | None) -> None:
+    """Queue a Gmail total estimate for the job; it is applied when it lands."""
+
+    _estimate_requests.put((job_id, settings, q))
+
+
+# Exact counts page through every matching id. The query is split into yearly internal-date
+# slices whose pages are fetched side by side in batch requests, so a count costs roughly as
+# many round trips as the busiest year has pages instead of the whole mailbox. Anything before
+# _COUNT_FIRST_YEAR (Gmail launched in 2004) falls into the first slice.
+# Each messages.list costs 5 quota units, so batches are kept small (50 units) and spaced out
+# to stay well under the per-user rate limit (250 units/s) while other jobs use Gmail too.
+_COUNT_FIRST_YEAR = 2005
+_COUNT_BATCH_MAX = 10
+_COUNT_BATCH_INTERVAL_S = 0.5
+
+
+def _count_query_slices(q: str | None) -> list[str]:
+    # Gmail date bounds: after: includes the day, before: excludes it, so the slices tile.
+    base = f"({q}) " if q else ""
+    bounds = [f"{y}/01/01" for y in range(_COUNT_FIRST_YEAR, _now().year + 1)]
+    slices = [f"{base}before:{bounds[0]}"]
+    slices.extend(f"{base}after:{lo} before:{hi}" for lo, hi in zip(bounds, bounds[1:]))
+    slices.append(f"{base}after:{bounds[-1]}")
+    return slices
+
 
 def _gmail_count_messages(service, *, user_id: str, q: str | None, page_size: int = 500) -> int | None:
     """Count matching Gmail messages by paging users.messages.list.
 
     Gmail's resultSizeEstimate can be quite inaccurate for some queries. For long-running
     destructive-ish jobs we prefer an exact pre-count so progress indicators remain sane.
+    Returns None if any page fails (e.g. rate limits); callers fall back to the estimate.
     """
 
     if page_size < 1:
@@ -378,35 +819,83 @@ def _gmail_count_messages(service, *, user_id: str, q: str | None, page_size: in
     if page_size > 500:
         page_size = 500
 
-    try:
-        total = 0
-        page_token: str | None = None
-        while True:
-            resp = (
-                service.users()
-                .messages()
-                .list(
-                    userId=user_id,
-                    maxResults=int(page_size),
-                    includeSpamTrash=True,
-                    q=q,
-                    pageToken=page_token,
-                )
-                .execute()
-            )
+    slices = _count_query_slices(q)
+    pending: dict[int, str | None] = {i: None for i in range(len(slices))}  # slice -> page token
+    total = 0
+    next_batch_at = 0.0
 
-            msgs = resp.get("messages", []) or []
-            total += len(msgs)
-            page_token = resp.get("nextPageToken")
-            if not page_token:
-                return int(total)
+    try:
+        while pending:
+            items = list(pending.items())
+            for start in range(0, len(items), _COUNT_BATCH_MAX):
+                delay = next_batch_at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                next_batch_at = time.monotonic() + _COUNT_BATCH_INTERVAL_S
+                responses: dict[str, dict] = {}
+                errors: list[Exception] = []
+
+                def _on_response(request_id, response, exception) -> None:
+                    if exception is not None:
+                        errors.append(exception)
+                    else:
+                        responses[request_id] = response or {}
+
+                batch = service.new_batch_http_request(callback=_on_response)
+                for idx, page_token in items[start : start + _COUNT_BATCH_MAX]:
+                    batch.add(
+                        service.users()
+                        .messages()
+                        .list(
+                            userId=user_id,
+                            maxResults=int(page_size),
+                            includeSpamTrash=True,
+                            q=slices[idx],
+                            pageToken=page_token,
+                            fields="messages/id,nextPageToken",
+                        ),
+                        request_id=str(idx),
+                    )
+                batch.execute()
+                if errors:
+                    logger.warning(
+                        "gmail_count_fallback",
+                        extra={
+                            "q": q,
+                            "reason": "page_failed",
+                            "failed": len(errors),
+                            "error": str(errors[0]),
+                        },
+                    )
+                    return None
+
+                for request_id, resp in responses.items():
+                    idx = int(request_id)
+                    total += len(resp.get("messages", []) or [])
+                    next_token = resp.get("nextPageToken")
+                    if next_token:
+                        pending[idx] = next_token
+                    else:
+                        pending.pop(idx, None)
+        return int(total)
     except Exception:
+        logger.warning("gmail_count_fallback", extra={"q": q, "reason": "batch_failed"}, exc_info=True)
         return None
 
 
+# HTTP batch requests in flight at once during a bulk Gmail push. Each batch already carries
+# HTTP_BATCH_MAX_CALLS modifies (5 quota units each), so a couple of concurrent batches is
+# enough to reach the per-user quota.
+_GMAIL_PUSH_WORKERS = 2
+
+
+# The dedup-guarded start endpoints are async: they only register the job and submit it to the
+# job type's lane, which never blocks the event loop.
 @router.post("/ingest/full")
-def start_ingest_full():
-    settings = Settings()
+async def start_ingest_full(
+    idempotency_key: str | None = Header(default=None),
+    settings: Settings = Depends(get_settings),
+):
     job_id = _make_job_id("ingest-full")
     job = _Job(
         job_id=job_id,
@@ -414,16 +903,16 @@ def start_ingest_full():
         state="queued",
         phase="metadata_ingestion",
         started_at=_now(),
-        updated_at=_now(),
         progress_total=None,
         progress_processed=0,
-        counters=JobCounters(),
         message="Queued",
-        error_samples=[],
+        error_samples=(),
         eta_hint=None,
     )
-    with _lock:
-        _jobs[job_id] = job
+    # Double-clicks and retries must not start a second Gmail traversal of the same kind.
+    registered = _register_job(job, exclusive=True, idempotency_key=idempotency_key)
+    if registered != job_id:
+        return {"job_id": registered}
 
     def task():
         from app.db.postgres import engine
@@ -437,12 +926,10 @@ def start_ingest_full():
             token_path=settings.gmail_token_path,
         )
 
-        total = _gmail_total_estimate(service, user_id=settings.gmail_user_id, q=None)
-        if total is not None:
-            _set_job(job_id, total=total)
+        _start_total_estimate(job_id, settings=settings, q=None)
 
         def hook(*, processed: int, skipped: int, failed: int, message: str | None):
-            _set_job(
+            _post_progress(
                 job_id,
                 phase="metadata_ingestion",
                 processed=processed,
@@ -466,8 +953,10 @@ def start_ingest_full():
 
 
 @router.post("/ingest/refresh")
-def start_ingest_refresh():
-    settings = Settings()
+async def start_ingest_refresh(
+    idempotency_key: str | None = Header(default=None),
+    settings: Settings = Depends(get_settings),
+):
     job_id = _make_job_id("ingest-refresh")
     job = _Job(
         job_id=job_id,
@@ -475,16 +964,16 @@ def start_ingest_refresh():
         state="queued",
         phase="metadata_ingestion",
         started_at=_now(),
-        updated_at=_now(),
         progress_total=None,
         progress_processed=0,
-        counters=JobCounters(),
         message="Queued",
-        error_samples=[],
+        error_samples=(),
         eta_hint=None,
     )
-    with _lock:
-        _jobs[job_id] = job
+    # Double-clicks and retries must not start a second Gmail traversal of the same kind.
+    registered = _register_job(job, exclusive=True, idempotency_key=idempotency_key)
+    if registered != job_id:
+        return {"job_id": registered}
 
     def task():
         from app.db.postgres import engine
@@ -506,12 +995,10 @@ def start_ingest_refresh():
         if checkpoint:
             q = f"after:{int(checkpoint.timestamp())}"
 
-        total = _gmail_total_estimate(service, user_id=settings.gmail_user_id, q=q)
-        if total is not None:
-            _set_job(job_id, total=total)
+        _start_total_estimate(job_id, settings=settings, q=q)
 
         def hook(*, processed: int, skipped: int, failed: int, message: str | None):
-            _set_job(
+            _post_progress(
                 job_id,
                 phase="metadata_ingestion",
                 processed=processed,
@@ -535,8 +1022,10 @@ def start_ingest_refresh():
 
 
 @router.post("/cluster-label/run")
-def start_cluster_label():
-    settings = Settings()
+async def start_cluster_label(
+    idempotency_key: str | None = Header(default=None),
+    settings: Settings = Depends(get_settings),
+):
     job_id = _make_job_id("cluster-label")
     job = _Job(
         job_id=job_id,
@@ -544,16 +1033,16 @@ def start_cluster_label():
         state="queued",
         phase="cluster_label",
         started_at=_now(),
-        updated_at=_now(),
         progress_total=None,
         progress_processed=0,
-        counters=JobCounters(),
         message="Queued",
-        error_samples=[],
+        error_samples=(),
         eta_hint=None,
     )
-    with _lock:
-        _jobs[job_id] = job
+    # Double-clicks and retries must not start a second clustering run.
+    registered = _register_job(job, exclusive=True, idempotency_key=idempotency_key)
+    if registered != job_id:
+        return {"job_id": registered}
 
     def task():
         from app.db.postgres import engine
@@ -570,7 +1059,7 @@ def start_cluster_label():
         )
 
         def hook(*, clusters_done: int, emails_labeled: int, message: str | None):
-            _set_job(
+            _post_progress(
                 job_id,
                 phase="cluster_label",
                 processed=emails_labeled,
@@ -595,7 +1084,7 @@ def start_cluster_label():
 
 
 @router.post("/label/auto")
-def start_label_auto(threshold: int = 200):
+def start_label_auto(threshold: int = 200, settings: Settings = Depends(get_settings)):
     """Automatically label unlabelled emails using a simple heuristic.
 
     Heuristic:
@@ -608,7 +1097,6 @@ def start_label_auto(threshold: int = 200):
     if threshold < 1 or threshold > 50_000:
         raise HTTPException(status_code=400, detail="threshold must be between 1 and 50000")
 
-    settings = Settings()
     job_id = _make_job_id("label-auto")
     job = _Job(
         job_id=job_id,
@@ -616,16 +1104,13 @@ def start_label_auto(threshold: int = 200):
         state="queued",
         phase="label_auto",
         started_at=_now(),
-        updated_at=_now(),
         progress_total=None,
         progress_processed=0,
-        counters=JobCounters(),
         message="Queued",
-        error_samples=[],
+        error_samples=(),
         eta_hint=None,
     )
-    with _lock:
-        _jobs[job_id] = job
+    _register_job(job)
 
     def task():
         from app.db.postgres import engine
@@ -664,7 +1149,7 @@ def start_label_auto(threshold: int = 200):
                 emails_failed: int,
                 message: str | None,
             ):
-                _set_job(
+                _post_progress(
                     job_id,
                     phase="incremental_label",
                     processed=emails_labeled,
@@ -693,7 +1178,7 @@ def start_label_auto(threshold: int = 200):
         )
 
         def hook(*, clusters_done: int, emails_labeled: int, message: str | None):
-            _set_job(
+            _post_progress(
                 job_id,
                 phase="cluster_label",
                 processed=emails_labeled,
@@ -717,8 +1202,43 @@ def start_label_auto(threshold: int = 200):
     return {"job_id": job_id}
 
 
+# Messages eligible for the bulk Gmail push (best-effort progress total).
+_Q_PUSH_BULK_COUNT = text(
+    """
+    SELECT COUNT(*)
+    FROM (
+        SELECT em.id
+        FROM email_message em
+        JOIN message_taxonomy_label mtl ON mtl.message_id = em.id
+        JOIN taxonomy_label tl ON tl.id = mtl.taxonomy_label_id
+        WHERE tl.is_active = TRUE
+        GROUP BY em.id
+    ) s
+    """
+)
+
+# One keyset page of messages to push with their Gmail label ids.
+_Q_PUSH_BULK_PAGE = text(
+    """
+    SELECT
+        em.id AS message_id,
+        em.gmail_message_id AS gmail_message_id,
+        ARRAY_AGG(DISTINCT tl.gmail_label_id) AS gmail_label_ids
+    FROM email_message em
+    JOIN message_taxonomy_label mtl ON mtl.message_id = em.id
+    JOIN taxonomy_label tl ON tl.id = mtl.taxonomy_label_id
+    WHERE tl.is_active = TRUE
+      AND em.gmail_message_id IS NOT NULL
+      AND em.id > :after_id
+    GROUP BY em.id, em.gmail_message_id
+    ORDER BY em.id ASC
+    LIMIT :limit
+    """
+)
+
+
 @router.post("/gmail/push/bulk")
-def start_gmail_push_bulk(batch_size: int = 200):
+def start_gmail_push_bulk(batch_size: int = 200, settings: Settings = Depends(get_settings)):
     """Push taxonomy label membership to Gmail for all labeled messages.
 
     This is intentionally implemented as a backend job so it can:
@@ -726,14 +1246,14 @@ def start_gmail_push_bulk(batch_size: int = 200):
     - report progress (% + ETA) via the existing /api/jobs polling + SSE
 
     Args:
-        batch_size: Number of messages to process per DB batch. Gmail API calls are still
-            per-message; batch_size controls DB paging and status update cadence.
+        batch_size: Number of messages to process per DB batch. Messages in a batch that share
+            a label set are pushed with one batchModify call (a few in flight at once);
+            batch_size controls DB paging and status update cadence.
     """
 
     if batch_size < 1 or batch_size > 2000:
         raise HTTPException(status_code=400, detail="batch_size must be between 1 and 2000")
 
-    settings = Settings()
     job_id = _make_job_id("gmail-push-bulk")
     job = _Job(
         job_id=job_id,
@@ -741,51 +1261,76 @@ def start_gmail_push_bulk(batch_size: int = 200):
         state="queued",
         phase="gmail_push",
         started_at=_now(),
-        updated_at=_now(),
         progress_total=None,
         progress_processed=0,
-        counters=JobCounters(),
         message="Queued",
-        error_samples=[],
+        error_samples=(),
         eta_hint=None,
     )
-    with _lock:
-        _jobs[job_id] = job
+    _register_job(job)
 
     def task():
-        from sqlalchemy import text
-
         from app.db.postgres import engine
-        from app.gmail.client import GMAIL_SCOPE_MODIFY, get_gmail_service_from_files, modify_message_labels
-        from googleapiclient.errors import HttpError
-
-        # Use modify scope: required for users.messages.modify.
-        service = get_gmail_service_from_files(
-            credentials_path=settings.gmail_credentials_path,
-            token_path=settings.gmail_token_path,
-            scopes=[GMAIL_SCOPE_MODIFY],
-            auth_mode=settings.gmail_auth_mode,
-            # Background jobs must not block waiting for OAuth consent.
-            allow_interactive=False,
+        from app.gmail.client import (
+            BATCH_MODIFY_MAX_IDS,
+            GMAIL_SCOPE_MODIFY,
+            HTTP_BATCH_MAX_CALLS,
+            batch_modify_message_labels,
+            get_gmail_service_cached,
+            modify_message_labels_batch,
         )
 
+        def gmail_service():
+            # Cached per thread: each push worker gets its own HTTP connection.
+            # Use modify scope: required for users.messages.modify.
+            return get_gmail_service_cached(
+                credentials_path=settings.gmail_credentials_path,
+                token_path=settings.gmail_token_path,
+                scopes=[GMAIL_SCOPE_MODIFY],
+                auth_mode=settings.gmail_auth_mode,
+                # Background jobs must not block waiting for OAuth consent.
+                allow_interactive=False,
+            )
+
+        # Fail fast on auth problems before touching the DB.
+        gmail_service()
+
+        def send(group: tuple[tuple[str, ...], list[tuple[str, str]]]) -> tuple[int, int]:
+            # One batchModify per label set; 429/5xx are retried with backoff by the client.
+            add_ids, items = group
+            service = gmail_service()
+            try:
+                batch_modify_message_labels(
+                    service,
+                    message_ids=[gmail_id for _, gmail_id in items],
+                    add_label_ids=list(add_ids),
+                    user_id=settings.gmail_user_id,
+                )
+                return len(items), 0
+            except Exception:
+                logger.warning(
+                    "gmail_push_batch_modify_failed",
+                    extra={"job_id": job_id, "chunk_size": len(items), "add_label_ids": list(add_ids)},
+                    exc_info=True,
+                )
+
+            # batchModify is all-or-nothing: fall back to per-message modifies (sent as HTTP
+            # batches) so one bad id does not fail the whole group.
+            ok = 0
+            for start in range(0, len(items), HTTP_BATCH_MAX_CALLS):
+                changes = [
+                    (mid, gmail_id, list(add_ids), None)
+                    for mid, gmail_id in items[start : start + HTTP_BATCH_MAX_CALLS]
+                ]
+                results = modify_message_labels_batch(
+                    service, changes=changes, user_id=settings.gmail_user_id
+                )
+                ok += sum(1 for exc in results.values() if exc is None)
+            return ok, len(items) - ok
+
         # Total messages eligible to be pushed (best-effort).
         with engine.begin() as conn:
-            total = conn.execute(
-                text(
-                    """
-                    SELECT COUNT(*)
-                    FROM (
-                        SELECT em.id
-                        FROM email_message em
-                        JOIN message_taxonomy_label mtl ON mtl.message_id = em.id
-                        JOIN taxonomy_label tl ON tl.id = mtl.taxonomy_label_id
-                        WHERE tl.is_active = TRUE
-                        GROUP BY em.id
-                    ) s
-                    """
-                )
-            ).scalar()
+            total = conn.execute(_Q_PUSH_BULK_COUNT).scalar()
 
         if total is not None:
             _set_job(job_id, total=int(total), message=f"Starting Gmail push for ~{int(total)} messages")
@@ -797,102 +1342,61 @@ def start_gmail_push_bulk(batch_size: int = 200):
         after_id = 0
         batch_num = 0
 
-        q = text(
-            """
-            SELECT
-                em.id AS message_id,
-                em.gmail_message_id AS gmail_message_id,
-                ARRAY_AGG(DISTINCT tl.gmail_label_id) AS gmail_label_ids
-            FROM email_message em
-            JOIN message_taxonomy_label mtl ON mtl.message_id = em.id
-            JOIN taxonomy_label tl ON tl.id = mtl.taxonomy_label_id
-            WHERE tl.is_active = TRUE
-                            AND em.gmail_message_id IS NOT NULL
-              AND em.id > :after_id
-            GROUP BY em.id, em.gmail_message_id
-            ORDER BY em.id ASC
-            LIMIT :limit
-            """
-        )
-
-        while True:
-            with engine.begin() as conn:
-                rows = conn.execute(q, {"after_id": int(after_id), "limit": int(batch_size)}).mappings().all()
-
-            if not rows:
-                break
-
-            batch_num += 1
-            for r in rows:
-                mid = int(r["message_id"])
-                gmail_message_id = str(r["gmail_message_id"])
-                after_id = max(after_id, mid)
-
-                processed += 1
-                add_ids = [str(x) for x in (r["gmail_label_ids"] or []) if x is not None and str(x).strip()]
+        # Keyset-paged: each page is read in its own short transaction, and the Gmail calls
+        # for it run after that transaction has closed, so a long push holds no snapshot open.
+        with ThreadPoolExecutor(max_workers=_GMAIL_PUSH_WORKERS) as pool:
+            while True:
+                with engine.begin() as conn:
+                    rows = (
+                        conn.execute(_Q_PUSH_BULK_PAGE, {"after_id": after_id, "limit": batch_size})
+                        .mappings()
+                        .all()
+                    )
+                if not rows:
+                    break
 
-                if not add_ids:
-                    failed += 1
-                else:
-                    try:
-                        modify_message_labels(
-                            service,
-                            message_id=gmail_message_id,
-                            add_label_ids=add_ids,
-                            remove_label_ids=None,
-                            user_id=settings.gmail_user_id,
-                        )
-                        succeeded += 1
-                    except HttpError as he:
-                        # Best-effort retry for transient Gmail/API/network errors.
-                        status = getattr(getattr(he, "resp", None), "status", None)
-                        if status in {429, 500, 502, 503, 504}:
-                            try:
-                                time.sleep(0.25)
-                                modify_message_labels(
-                                    service,
-                                    message_id=gmail_message_id,
-                                    add_label_ids=add_ids,
-                                    remove_label_ids=None,
-                                    user_id=settings.gmail_user_id,
-                                )
-                                succeeded += 1
-                                continue
-                            except Exception:
-                                pass
-                        failed += 1
-                    except Exception:
+                batch_num += 1
+                # Messages sharing a label set are pushed together via batchModify.
+                by_labels: dict[tuple[str, ...], list[tuple[str, str]]] = {}
+                for r in rows:
+                    mid = int(r["message_id"])
+                    after_id = max(after_id, mid)
+                    processed += 1
+                    add_ids = sorted(
+                        {
+                            str(x)
+                            for x in (r["gmail_label_ids"] or [])
+                            if x is not None and str(x).strip()
+                        }
+                    )
+                    if not add_ids:
                         failed += 1
-
-                # Update status occasionally (every 50 messages) to keep UI responsive without
-                # overwhelming SSE/polling with updates.
-                if processed % 50 == 0:
-                    _set_job(
-                        job_id,
-                        phase="gmail_push",
-                        processed=processed,
-                        inserted=succeeded,
-                        failed=failed,
-                        message=(
-                            f"Pushing Gmail labels… batch {batch_num}, last_id {after_id} "
-                            f"(ok {succeeded}, failed {failed})"
-                        ),
+                        continue
+                    by_labels.setdefault(tuple(add_ids), []).append(
+                        (str(mid), str(r["gmail_message_id"]))
                     )
 
-            # Batch boundary update.
-            _set_job(
-                job_id,
-                phase="gmail_push",
-                processed=processed,
-                inserted=succeeded,
-                failed=failed,
-                message=(
-                    f"Pushing Gmail labels… completed batch {batch_num} (ok {succeeded}, failed {failed})"
-                ),
-            )
+                groups = [
+                    (add_ids, items[start : start + BATCH_MODIFY_MAX_IDS])
+                    for add_ids, items in by_labels.items()
+                    for start in range(0, len(items), BATCH_MODIFY_MAX_IDS)
+                ]
+                for ok, bad in pool.map(send, groups):
+                    succeeded += ok
+                    failed += bad
 
-            # Be gentle to the Gmail API.
-            time.sleep(0.05)
+                # Batch boundary update.
+                _set_job(
+                    job_id,
+                    phase="gmail_push",
+                    processed=processed,
+                    inserted=succeeded,
+                    failed=failed,
+                    message=(
+                        f"Pushing Gmail labels… completed batch {batch_num}, last_id {after_id} "
+                        f"(ok {succeeded}, failed {failed})"
+                    ),
+                )
 
         _set_job(
             job_id,
@@ -915,8 +1419,47 @@ def start_gmail_push_bulk(batch_size: int = 200):
     return {"job_id": job_id}
 
 
+_Q_PUSH_OUTBOX_COUNT = text("SELECT COUNT(*) FROM label_push_outbox WHERE processed_at IS NULL")
+
+# Oldest pending outbox rows that can be pushed (messages with a Gmail id).
+_Q_PUSH_OUTBOX_PENDING = text(
+    """
+    SELECT o.id, o.message_id, em.gmail_message_id
+    FROM label_push_outbox o
+    JOIN email_message em ON em.id = o.message_id
+    WHERE o.processed_at IS NULL
+      AND em.gmail_message_id IS NOT NULL
+    ORDER BY o.created_at ASC
+    LIMIT :limit
+    """
+)
+
+# Gmail label ids of each message's active taxonomy labels.
+_Q_PUSH_OUTBOX_GMAIL_LABELS = text(
+    """
+    SELECT mtl.message_id, ARRAY_AGG(tl.gmail_label_id ORDER BY tl.id)
+    FROM message_taxonomy_label mtl
+    JOIN taxonomy_label tl ON tl.id = mtl.taxonomy_label_id
+    WHERE mtl.message_id = ANY(:ids)
+      AND tl.is_active = TRUE
+      AND NULLIF(btrim(tl.gmail_label_id), '') IS NOT NULL
+    GROUP BY mtl.message_id
+    """
+)
+
+# Close out a chunk of outbox rows; error is NULL for rows that succeeded.
+_Q_PUSH_OUTBOX_CLOSE = text(
+    """
+    UPDATE label_push_outbox AS o
+    SET processed_at = NOW(), error = v.error
+    FROM unnest(CAST(:ids AS bigint[]), CAST(:errors AS text[])) AS v(id, error)
+    WHERE o.id = v.id
+    """
+)
+
+
 @router.post("/gmail/push/outbox")
-def start_gmail_push_outbox(batch_size: int = 250):
+def start_gmail_push_outbox(batch_size: int = 250, settings: Settings = Depends(get_settings)):
     """Push taxonomy labels to Gmail for messages currently in label_push_outbox.
 
     This is the background-job equivalent of /api/gmail-sync/messages/push-incremental.
@@ -926,7 +1469,6 @@ def start_gmail_push_outbox(batch_size: int = 250):
     if batch_size < 1 or batch_size > 2000:
         raise HTTPException(status_code=400, detail="batch_size must be between 1 and 2000")
 
-    settings = Settings()
     job_id = _make_job_id("gmail-push-outbox")
     job = _Job(
         job_id=job_id,
@@ -934,23 +1476,22 @@ def start_gmail_push_outbox(batch_size: int = 250):
         state="queued",
         phase="gmail_push_outbox",
         started_at=_now(),
-        updated_at=_now(),
         progress_total=None,
         progress_processed=0,
-        counters=JobCounters(),
         message="Queued",
-        error_samples=[],
+        error_samples=(),
         eta_hint=None,
     )
-    with _lock:
-        _jobs[job_id] = job
+    _register_job(job)
 
     def task():
-        from sqlalchemy import text
-
         from app.db.postgres import engine
-        from app.gmail.client import GMAIL_SCOPE_MODIFY, get_gmail_service_from_files, modify_message_labels
-        from googleapiclient.errors import HttpError
+        from app.gmail.client import (
+            GMAIL_SCOPE_MODIFY,
+            HTTP_BATCH_MAX_CALLS,
+            get_gmail_service_from_files,
+            modify_message_labels_batch,
+        )
 
         service = get_gmail_service_from_files(
             credentials_path=settings.gmail_credentials_path,
@@ -962,9 +1503,7 @@ def start_gmail_push_outbox(batch_size: int = 250):
         )
 
         with engine.begin() as conn:
-            total = conn.execute(
-                text("SELECT COUNT(*) FROM label_push_outbox WHERE processed_at IS NULL")
-            ).scalar()
+            total = conn.execute(_Q_PUSH_OUTBOX_COUNT).scalar()
 
         if total is not None:
             _set_job(
@@ -978,124 +1517,56 @@ def start_gmail_push_outbox(batch_size: int = 250):
         failed = 0
         batch_num = 0
 
-        q_fetch = text(
-            """
-            SELECT o.id, o.message_id, em.gmail_message_id
-            FROM label_push_outbox o
-            JOIN email_message em ON em.id = o.message_id
-            WHERE o.processed_at IS NULL
-              AND em.gmail_message_id IS NOT NULL
-            ORDER BY o.created_at ASC
-            LIMIT :limit
-            """
-        )
-
-        q_tids = text(
-            """
-            SELECT mtl.taxonomy_label_id
-            FROM message_taxonomy_label mtl
-            JOIN taxonomy_label tl ON tl.id = mtl.taxonomy_label_id
-            WHERE mtl.message_id = :mid AND tl.is_active = TRUE
-            """
-        )
-
-        q_label_rows = text(
-            """
-            SELECT id, gmail_label_id
-            FROM taxonomy_label
-            WHERE id = ANY(:ids)
-            """
-        )
-
-        q_mark_ok = text(
-            """
-            UPDATE label_push_outbox
-            SET processed_at = NOW(), error = NULL
-            WHERE id = :id
-            """
-        )
-
-        q_mark_err = text(
-            """
-            UPDATE label_push_outbox
-            SET processed_at = NOW(), error = :error
-            WHERE id = :id
-            """
-        )
-
-        while True:
-            with engine.begin() as conn:
-                outbox = conn.execute(q_fetch, {"limit": int(batch_size)}).mappings().all()
-
-            if not outbox:
-                break
-
-            batch_num += 1
-            for o in outbox:
-                outbox_id = int(o["id"])
-                message_id = int(o["message_id"])
-                gmail_message_id = str(o["gmail_message_id"])
-
-                processed += 1
-                try:
-                    with engine.begin() as conn:
-                        tids = conn.execute(q_tids, {"mid": int(message_id)}).fetchall()
-                        tset = [int(r[0]) for r in tids]
-                        label_rows = conn.execute(q_label_rows, {"ids": list(tset)}).fetchall()
-                        taxonomy_to_gmail = {
-                            int(r[0]): str(r[1])
-                            for r in label_rows
-                            if r[1] is not None and str(r[1]).strip()
-                        }
+        # Each outbox batch is claimed with one query for its rows and one for their labels;
+        # its modifies then go out as HTTP batch requests (rate-limited calls are retried with
+        # backoff by the client), and each chunk is closed out with a single UPDATE.
+        with engine.connect() as conn:
+            while True:
+                with conn.begin():
+                    outbox = conn.execute(
+                        _Q_PUSH_OUTBOX_PENDING, {"limit": int(batch_size)}
+                    ).mappings().all()
+                    if not outbox:
+                        break
+                    label_rows = conn.execute(
+                        _Q_PUSH_OUTBOX_GMAIL_LABELS,
+                        {"ids": sorted({int(o["message_id"]) for o in outbox})},
+                    ).fetchall()
 
-                    add_ids = [taxonomy_to_gmail.get(tid) for tid in tset]
-                    add_ids = [x for x in add_ids if x]
-                    if not add_ids:
-                        raise RuntimeError("missing gmail label mapping for message")
+                batch_num += 1
+                msg_to_gmail_labels: dict[int, list[str]] = {
+                    int(r[0]): list(r[1]) for r in label_rows
+                }
+
+                for start in range(0, len(outbox), HTTP_BATCH_MAX_CALLS):
+                    # Outbox id -> error (None once pushed) for every row in this chunk.
+                    errors: dict[int, str | None] = {}
+                    changes: list[tuple[str, str, list[str], None]] = []
+                    for o in outbox[start : start + HTTP_BATCH_MAX_CALLS]:
+                        outbox_id = int(o["id"])
+                        add_ids = msg_to_gmail_labels.get(int(o["message_id"]))
+                        if not add_ids:
+                            errors[outbox_id] = "missing gmail label mapping for message"
+                            continue
+                        changes.append((str(outbox_id), str(o["gmail_message_id"]), add_ids, None))
 
-                    modify_message_labels(
-                        service,
-                        message_id=gmail_message_id,
-                        add_label_ids=add_ids,
-                        remove_label_ids=None,
-                        user_id=settings.gmail_user_id,
+                    results = modify_message_labels_batch(
+                        service, changes=changes, user_id=settings.gmail_user_id
                     )
+                    for request_id, exc in results.items():
+                        errors[int(request_id)] = None if exc is None else str(exc)[:5000]
 
-                    with engine.begin() as conn:
-                        conn.execute(q_mark_ok, {"id": int(outbox_id)})
-
-                    succeeded += 1
-                except HttpError as he:
-                    status = getattr(getattr(he, "resp", None), "status", None)
-                    if status in {429, 500, 502, 503, 504}:
-                        try:
-                            time.sleep(0.25)
-                            modify_message_labels(
-                                service,
-                                message_id=gmail_message_id,
-                                add_label_ids=add_ids,
-                                remove_label_ids=None,
-                                user_id=settings.gmail_user_id,
-                            )
-                            with engine.begin() as conn:
-                                conn.execute(q_mark_ok, {"id": int(outbox_id)})
-                            succeeded += 1
-                            continue
-                        except Exception as e:
-                            failed += 1
-                            with engine.begin() as conn:
-                                conn.execute(q_mark_err, {"id": int(outbox_id), "error": str(e)[:5000]})
-                            continue
+                    with conn.begin():
+                        conn.execute(
+                            _Q_PUSH_OUTBOX_CLOSE,
+                            {"ids": list(errors), "errors": list(errors.values())},
+                        )
 
-                    failed += 1
-                    with engine.begin() as conn:
-                        conn.execute(q_mark_err, {"id": int(outbox_id), "error": str(he)[:5000]})
-                except Exception as e:
-                    failed += 1
-                    with engine.begin() as conn:
-                        conn.execute(q_mark_err, {"id": int(outbox_id), "error": str(e)[:5000]})
+                    processed += len(errors)
+                    ok = sum(1 for err in errors.values() if err is None)
+                    succeeded += ok
+                    failed += len(errors) - ok
 
-                if processed % 50 == 0:
                     _set_job(
                         job_id,
                         phase="gmail_push_outbox",
@@ -1107,16 +1578,14 @@ def start_gmail_push_outbox(batch_size: int = 250):
                         ),
                     )
 
-            _set_job(
-                job_id,
-                phase="gmail_push_outbox",
-                processed=processed,
-                inserted=succeeded,
-                failed=failed,
-                message=f"Completed batch {batch_num} (ok {succeeded}, failed {failed})",
-            )
-
-            time.sleep(0.05)
+                _set_job(
+                    job_id,
+                    phase="gmail_push_outbox",
+                    processed=processed,
+                    inserted=succeeded,
+                    failed=failed,
+                    message=f"Completed batch {batch_num} (ok {succeeded}, failed {failed})",
+                )
 
         _set_job(
             job_id,
@@ -1138,7 +1607,11 @@ def start_gmail_push_outbox(batch_size: int = 250):
 
 
 @router.post("/gmail/archive/push")
-def start_gmail_archive_push(batch_size: int = 200, dry_run: bool = False):
+def start_gmail_archive_push(
+    batch_size: int = 200,
+    dry_run: bool = False,
+    settings: Settings = Depends(get_settings),
+):
     """Apply the Gmail Archive marker label for messages queued by retention planning.
 
     This job consumes rows from archive_push_outbox (planned via /api/gmail-sync/retention/plan)
@@ -1154,7 +1627,6 @@ def start_gmail_archive_push(batch_size: int = 200, dry_run: bool = False):
     if batch_size < 1 or batch_size > 2000:
         raise HTTPException(status_code=400, detail="batch_size must be between 1 and 2000")
 
-    settings = Settings()
     job_id = _make_job_id("gmail-archive-push")
     job = _Job(
         job_id=job_id,
@@ -1162,16 +1634,13 @@ def start_gmail_archive_push(batch_size: int = 200, dry_run: bool = False):
         state="queued",
         phase="gmail_archive_push",
         started_at=_now(),
-        updated_at=_now(),
         progress_total=None,
         progress_processed=0,
-        counters=JobCounters(),
         message="Queued",
-        error_samples=[],
+        error_samples=(),
         eta_hint=None,
     )
-    with _lock:
-        _jobs[job_id] = job
+    _register_job(job)
 
     def task():
         from app.db.postgres import engine
@@ -1354,6 +1823,7 @@ def start_gmail_archive_trash(
     batch_size: int = 250,
     dry_run: bool = False,
     remove_archive_label: bool = False,
+    settings: Settings = Depends(get_settings),
 ):
     """Move all messages with the Archive marker label to Gmail Trash.
 
@@ -1377,7 +1847,6 @@ def start_gmail_archive_trash(
     if batch_size < 1 or batch_size > 500:
         raise HTTPException(status_code=400, detail="batch_size must be between 1 and 500")
 
-    settings = Settings()
     job_id = _make_job_id("gmail-archive-trash")
     job = _Job(
         job_id=job_id,
@@ -1385,16 +1854,13 @@ def start_gmail_archive_trash(
         state="queued",
         phase="gmail_archive_trash",
         started_at=_now(),
-        updated_at=_now(),
         progress_total=None,
         progress_processed=0,
-        counters=JobCounters(),
         message="Queued",
-        error_samples=[],
+        error_samples=(),
         eta_hint=None,
     )
-    with _lock:
-        _jobs[job_id] = job
+    _register_job(job)
 
     def task():
         from googleapiclient.errors import HttpError
@@ -1402,7 +1868,7 @@ def start_gmail_archive_trash(
         from app.gmail.client import (
             GMAIL_SCOPE_MODIFY,
             get_gmail_service_from_files,
-            list_labels,
+            label_name_to_id,
             modify_message_labels,
             move_message_to_trash,
         )
@@ -1431,13 +1897,7 @@ def start_gmail_archive_trash(
             allow_interactive=False,
         )
 
-        labels = list_labels(service, user_id=settings.gmail_user_id)
-        name_to_id: dict[str, str] = {}
-        for l in labels:
-            lid = l.get("id")
-            nm = l.get("name")
-            if lid and nm:
-                name_to_id[str(nm)] = str(lid)
+        name_to_id = label_name_to_id(service, user_id=settings.gmail_user_id)
 
         # Case-insensitive matching helps when users end up with both
         # "Email Archive" and "Email archive".
@@ -1665,6 +2125,7 @@ def start_gmail_archive_trash(
 def start_gmail_trash_sync(
     batch_size: int = 500,
     q: str = "in:trash",
+    settings: Settings = Depends(get_settings),
 ):
     """Sync Gmail Trash membership into the DB.
 
@@ -1683,7 +2144,6 @@ def start_gmail_trash_sync(
     if batch_size < 1 or batch_size > 500:
         raise HTTPException(status_code=400, detail="batch_size must be between 1 and 500")
 
-    settings = Settings()
     job_id = _make_job_id("gmail-trash-sync")
     job = _Job(
         job_id=job_id,
@@ -1691,16 +2151,13 @@ def start_gmail_trash_sync(
         state="queued",
         phase="gmail_trash_sync",
         started_at=_now(),
-        updated_at=_now(),
         progress_total=None,
         progress_processed=0,
-        counters=JobCounters(),
         message="Queued",
-        error_samples=[],
+        error_samples=(),
         eta_hint=None,
     )
-    with _lock:
-        _jobs[job_id] = job
+    _register_job(job)
 
     def task():
         from sqlalchemy import text
@@ -1812,7 +2269,11 @@ def start_gmail_trash_sync(
 
 
 @router.post("/incremental/run")
-def start_incremental_run(max_messages: int | None = None, max_emails: int | None = None):
+def start_incremental_run(
+    max_messages: int | None = None,
+    max_emails: int | None = None,
+    settings: Settings = Depends(get_settings),
+):
     """Run the daily incremental pipeline.
 
     Steps:
@@ -1822,8 +2283,6 @@ def start_incremental_run(max_messages: int | None = None, max_emails: int | Non
     This intentionally avoids the bulk-mode clustering optimization.
     """
 
-    settings = Settings()
-
     if max_messages is not None:
         max_messages = max(1, min(int(max_messages), 5000))
     if max_emails is not None:
@@ -1836,16 +2295,13 @@ def start_incremental_run(max_messages: int | None = None, max_emails: int | Non
         state="queued",
         phase="metadata_ingestion",
         started_at=_now(),
-        updated_at=_now(),
         progress_total=None,
         progress_processed=0,
-        counters=JobCounters(),
         message="Queued",
-        error_samples=[],
+        error_samples=(),
         eta_hint=None,
     )
-    with _lock:
-        _jobs[job_id] = job
+    _register_job(job)
 
     def task():
         from app.db.postgres import engine
@@ -1860,7 +2316,7 @@ def start_incremental_run(max_messages: int | None = None, max_emails: int | Non
 
         # Phase 1: incremental metadata ingest
         def ingest_hook(*, processed: int, skipped: int, failed: int, message: str | None):
-            _set_job(
+            _post_progress(
                 job_id,
                 phase="metadata_ingestion",
                 processed=processed,
@@ -1891,7 +2347,7 @@ def start_incremental_run(max_messages: int | None = None, max_emails: int | Non
             message: str | None,
         ):
             # Report progress as "emails labeled" because that's the visible outcome.
-            _set_job(
+            _post_progress(
                 job_id,
                 phase="incremental_label",
                 processed=emails_labeled,
@@ -1917,7 +2373,10 @@ def start_incremental_run(max_messages: int | None = None, max_emails: int | Non
 
 
 @router.post("/events/extract/financial-tickets-bookings")
-def start_event_extract_financial_tickets_bookings(limit: int = 250):
+def start_event_extract_financial_tickets_bookings(
+    limit: int = 250,
+    settings: Settings = Depends(get_settings),
+):
     """Extract event metadata for emails in Financial / Tickets & Bookings.
 
     This job:
@@ -1931,8 +2390,6 @@ def start_event_extract_financial_tickets_bookings(limit: int = 250):
     - This is safe/non-destructive: it does not modify Gmail.
     """
 
-    settings = Settings()
-
     limit = max(1, min(int(limit), 5000))
 
     job_id = _make_job_id("event-extract")
@@ -1942,20 +2399,19 @@ def start_event_extract_financial_tickets_bookings(limit: int = 250):
         state="queued",
         phase="event_extract",
         started_at=_now(),
-        updated_at=_now(),
         progress_total=None,
         progress_processed=0,
-        counters=JobCounters(),
         message="Queued",
-        error_samples=[],
+        error_samples=(),
         eta_hint=None,
     )
-    with _lock:
-        _jobs[job_id] = job
+    _register_job(job)
 
     def task():
-        from app.analysis.events.extractor import extract_event_from_email
+        from app.analysis.batch import ExtractionInput
+        from app.analysis.events.extractor import extract_events_batch
         from app.analysis.events.prompt import PROMPT_VERSION
+        from app.analysis.llm_backend import build_llm_backend
         from app.db.postgres import engine
         from app.gmail.client import get_gmail_service_from_files, get_message_body_text
         from app.repository.event_metadata_repository import (
@@ -1963,9 +2419,12 @@ def start_event_extract_financial_tickets_bookings(limit: int = 250):
             upsert_message_event_metadata,
         )
 
-        if not settings.ollama_host:
+        backend = build_llm_backend(settings)
+        if backend is None:
             raise RuntimeError(
-                "Ollama is not configured. Set EMAIL_INTEL_OLLAMA_HOST (e.g. http://localhost:11434)."
+                "LLM backend is not configured. Set EMAIL_INTEL_OLLAMA_HOST "
+                "(e.g. http://localhost:11434) or EMAIL_INTEL_LLM_BACKEND=vllm with "
+                "EMAIL_INTEL_VLLM_HOST."
             )
 
         service = get_gmail_service_from_files(
@@ -1989,110 +2448,120 @@ def start_event_extract_financial_tickets_bookings(limit: int = 250):
         updated = 0
         failed = 0
         processed = 0
+        prefiltered = 0
 
-        for r in rows:
-            processed += 1
-            try:
-                mid = int(r["message_id"])
-                gid = str(r["gmail_message_id"])
-                subj = r.get("subject")
-                from_domain = r.get("from_domain")
-                internal_date = r.get("internal_date")
-                internal_iso = internal_date.isoformat() if internal_date is not None else None
-
-                body = get_message_body_text(
-                    service,
-                    message_id=gid,
-                    user_id=settings.gmail_user_id,
-                    max_chars=30_000,
-                )
-
-                extracted = extract_event_from_email(
-                    ollama_host=settings.ollama_host,
-                    ollama_model=settings.ollama_model,
-                    subject=str(subj) if subj is not None else None,
-                    from_domain=str(from_domain) if from_domain is not None else None,
-                    internal_date_iso=internal_iso,
-                    body=body,
-                )
-
-                # Decide a simple status.
-                if extracted.event_name or extracted.event_date or extracted.start_time:
-                    status = "succeeded"
-                else:
-                    status = "no_event"
+        def record_failure(r: dict, e: Exception) -> None:
+            nonlocal failed
+            failed += 1
+            _add_job_error(job_id, f"event_extract_failed message_id={r.get('gmail_message_id')}: {e}")
 
-                was_insert = upsert_message_event_metadata(
+            # Best-effort: persist the failure row so we have visibility.
+            try:
+                upsert_message_event_metadata(
                     engine=engine,
-                    message_id=mid,
-                    status=status,
-                    error=None,
-                    event_name=extracted.event_name,
-                    event_type=extracted.event_type,
-                    event_date=extracted.event_date,
-                    start_time=extracted.start_time,
-                    end_time=extracted.end_time,
-                    timezone=extracted.timezone,
-                    end_time_inferred=bool(extracted.end_time_inferred),
-                    confidence=extracted.confidence,
-                    model=extracted.model,
-                    prompt_version=extracted.prompt_version,
-                    raw_json=extracted.raw_json,
+                    message_id=int(r["message_id"]),
+                    status="failed",
+                    error=str(e),
+                    event_name=None,
+                    event_type=None,
+                    event_date=None,
+                    start_time=None,
+                    end_time=None,
+                    timezone=None,
+                    end_time_inferred=False,
+                    confidence=None,
+                    model=backend.model,
+                    prompt_version=PROMPT_VERSION,
+                    raw_json=None,
                     extracted_at=_now(),
                 )
+            except Exception:
+                pass
 
-                if was_insert:
-                    inserted += 1
-                else:
-                    updated += 1
-
-                _set_job(
-                    job_id,
-                    phase="event_extract",
-                    processed=processed,
-                    inserted=inserted,
-                    skipped_existing=updated,
-                    failed=failed,
-                    message=f"Extracted events: {processed}/{total} (inserted {inserted}, updated {updated}, failed {failed})",
+        batch_size = max(1, int(settings.extraction_batch_size))
+        for start in range(0, total, batch_size):
+            # Bodies are fetched per email (a Gmail failure only fails that email); the chunk's
+            # LLM calls then go out together through the batch extractor.
+            fetched: list[tuple[dict, ExtractionInput]] = []
+            for r in rows[start : start + batch_size]:
+                try:
+                    body = get_message_body_text(
+                        service,
+                        message_id=str(r["gmail_message_id"]),
+                        user_id=settings.gmail_user_id,
+                        max_chars=30_000,
+                    )
+                    fetched.append((r, ExtractionInput.from_row(r, body=body)))
+                except Exception as e:  # noqa: BLE001
+                    processed += 1
+                    record_failure(r, e)
+
+            results = (
+                extract_events_batch(
+                    [inp for _, inp in fetched],
+                    backend=backend,
+                    prefilter=settings.extraction_prefilter,
                 )
-            except Exception as e:  # noqa: BLE001
-                failed += 1
-                _add_job_error(job_id, f"event_extract_failed message_id={r.get('gmail_message_id')}: {e}")
-
-                # Best-effort: persist the failure row so we have visibility.
+                if fetched
+                else []
+            )
+            for (r, _), extracted in zip(fetched, results):
+                processed += 1
+                if isinstance(extracted, Exception):
+                    record_failure(r, extracted)
+                    continue
                 try:
-                    mid = int(r["message_id"])
-                    upsert_message_event_metadata(
+                    # Decide a simple status (prefiltered rows stay distinguishable for re-runs).
+                    if extracted.prefiltered:
+                        status = "prefiltered"
+                        prefiltered += 1
+                    elif extracted.event_name or extracted.event_date or extracted.start_time:
+                        status = "succeeded"
+                    else:
+                        status = "no_event"
+
+                    was_insert = upsert_message_event_metadata(
                         engine=engine,
-                        message_id=mid,
-                        status="failed",
-                        error=str(e),
-                        event_name=None,
-                        event_type=None,
-                        event_date=None,
-                        start_time=None,
-                        end_time=None,
-                        timezone=None,
-                        end_time_inferred=False,
-                        confidence=None,
-                        model=settings.ollama_model,
-                        prompt_version=PROMPT_VERSION,
-                        raw_json=None,
+                        message_id=int(r["message_id"]),
+                        status=status,
+                        error=None,
+                        event_name=extracted.event_name,
+                        event_type=extracted.event_type,
+                        event_date=extracted.event_date,
+                        start_time=extracted.start_time,
+                        end_time=extracted.end_time,
+                        timezone=extracted.timezone,
+                        end_time_inferred=bool(extracted.end_time_inferred),
+                        confidence=extracted.confidence,
+                        model=extracted.model,
+                        prompt_version=extracted.prompt_version,
+                        raw_json=extracted.raw_json,
                         extracted_at=_now(),
                     )
-                except Exception:
-                    pass
+                except Exception as e:  # noqa: BLE001
+                    record_failure(r, e)
+                    continue
 
-                _set_job(
-                    job_id,
-                    phase="event_extract",
-                    processed=processed,
-                    inserted=inserted,
-                    skipped_existing=updated,
-                    failed=failed,
-                    message=f"Extracted events: {processed}/{total} (inserted {inserted}, updated {updated}, failed {failed})",
-                )
+                if was_insert:
+                    inserted += 1
+                else:
+                    updated += 1
+
+            _set_job(
+                job_id,
+                phase="event_extract",
+                processed=processed,
+                inserted=inserted,
+                skipped_existing=updated,
+                failed=failed,
+                message=f"Extracted events: {processed}/{total} (inserted {inserted}, updated {updated}, failed {failed})",
+            )
 
+        # One aggregate per run so pre-filter recall regressions show up in the logs.
+        logger.info(
+            "event_extract_prefilter",
+            extra={"job_id": job_id, "total": total, "skipped": prefiltered},
+        )
         _set_job(
             job_id,
             phase="event_extract",
@@ -2100,7 +2569,10 @@ def start_event_extract_financial_tickets_bookings(limit: int = 250):
             inserted=inserted,
             skipped_existing=updated,
             failed=failed,
-            message=f"Done: processed {processed}, inserted {inserted}, updated {updated}, failed {failed}",
+            message=(
+                f"Done: processed {processed}, inserted {inserted}, updated {updated}, "
+                f"failed {failed}, prefiltered {prefiltered}"
+            ),
         )
 
     _run_in_thread(job_id, task)
@@ -2108,7 +2580,10 @@ def start_event_extract_financial_tickets_bookings(limit: int = 250):
 
 
 @router.post("/payments/extract/financial-and-recent")
-def start_payment_extract_financial_and_recent(days: int = 12):
+def start_payment_extract_financial_and_recent(
+    days: int = 12,
+    settings: Settings = Depends(get_settings),
+):
     """Extract payment metadata for all Financial emails and recent emails.
 
     This job:
@@ -2120,8 +2595,6 @@ def start_payment_extract_financial_and_recent(days: int = 12):
     - De-duplication is handled downstream via payment_fingerprint.
     """
 
-    settings = Settings()
-
     days = max(1, int(days))
 
     job_id = _make_job_id("payment-extract")
@@ -2131,19 +2604,18 @@ def start_payment_extract_financial_and_recent(days: int = 12):
         state="queued",
         phase="payment_extract",
         started_at=_now(),
-        updated_at=_now(),
         progress_total=None,
         progress_processed=0,
-        counters=JobCounters(),
         message="Queued",
-        error_samples=[],
+        error_samples=(),
         eta_hint=None,
     )
-    with _lock:
-        _jobs[job_id] = job
+    _register_job(job)
 
     def task():
-        from app.analysis.payments.extractor import extract_payment_from_email
+        from app.analysis.batch import ExtractionInput
+        from app.analysis.llm_backend import build_llm_backend
+        from app.analysis.payments.extractor import extract_payments_batch
         from app.analysis.payments.prompt import PROMPT_VERSION
         from app.db.postgres import engine
         from app.gmail.client import (
@@ -2160,9 +2632,12 @@ def start_payment_extract_financial_and_recent(days: int = 12):
             upsert_message_payment_metadata,
         )
 
-        if not settings.ollama_host:
+        backend = build_llm_backend(settings)
+        if backend is None:
             raise RuntimeError(
-                "Ollama is not configured. Set EMAIL_INTEL_OLLAMA_HOST (e.g. http://localhost:11434)."
+                "LLM backend is not configured. Set EMAIL_INTEL_OLLAMA_HOST "
+                "(e.g. http://localhost:11434) or EMAIL_INTEL_LLM_BACKEND=vllm with "
+                "EMAIL_INTEL_VLLM_HOST."
             )
 
         service = get_gmail_service_from_files(
@@ -2241,124 +2716,131 @@ def start_payment_extract_financial_and_recent(days: int = 12):
         updated = 0
         failed = 0
         processed = 0
+        prefiltered = 0
 
-        def _process_rows(rows: list[dict[str, object]], label: str) -> None:
-            nonlocal inserted, updated, failed, processed
-            for r in rows:
-                processed += 1
-                try:
-                    mid = int(r["message_id"])  # type: ignore[index]
-                    gid = str(r["gmail_message_id"])  # type: ignore[index]
-                    subj = r.get("subject")
-                    from_domain = r.get("from_domain")
-                    internal_date = r.get("internal_date")
-                    internal_iso = internal_date.isoformat() if internal_date is not None else None
-
-                    body = get_message_body_text(
-                        service,
-                        message_id=gid,
-                        user_id=settings.gmail_user_id,
-                        max_chars=30_000,
-                    )
+        def record_failure(r: dict[str, object], e: Exception) -> None:
+            nonlocal failed
+            failed += 1
+            _add_job_error(job_id, f"payment_extract_failed {r.get('gmail_message_id')}: {e}")
 
-                    extracted = extract_payment_from_email(
-                        ollama_host=settings.ollama_host,
-                        ollama_model=settings.ollama_model,
-                        subject=str(subj) if subj is not None else None,
-                        from_domain=str(from_domain) if from_domain is not None else None,
-                        internal_date_iso=internal_iso,
-                        body=body,
-                    )
+            try:
+                upsert_message_payment_metadata(
+                    engine=engine,
+                    message_id=int(r["message_id"]),  # type: ignore[arg-type]
+                    status="failed",
+                    error=str(e),
+                    item_name=None,
+                    vendor_name=None,
+                    item_category=None,
+                    cost_amount=None,
+                    cost_currency=None,
+                    is_recurring=None,
+                    frequency=None,
+                    payment_date=None,
+                    payment_fingerprint=None,
+                    confidence=None,
+                    model=backend.model,
+                    prompt_version=PROMPT_VERSION,
+                    raw_json=None,
+                    extracted_at=_now(),
+                )
+            except Exception:
+                pass
 
-                    if extracted.cost_amount or extracted.vendor_name or extracted.item_name:
-                        status = "succeeded"
-                    else:
-                        status = "no_payment"
+        batch_size = max(1, int(settings.extraction_batch_size))
 
-                    was_insert = upsert_message_payment_metadata(
-                        engine=engine,
-                        message_id=mid,
-                        status=status,
-                        error=None,
-                        item_name=extracted.item_name,
-                        vendor_name=extracted.vendor_name,
-                        item_category=extracted.item_category,
-                        cost_amount=extracted.cost_amount,
-                        cost_currency=extracted.cost_currency,
-                        is_recurring=extracted.is_recurring,
-                        frequency=extracted.frequency,
-                        payment_date=extracted.payment_date,
-                        payment_fingerprint=extracted.payment_fingerprint,
-                        confidence=extracted.confidence,
-                        model=extracted.model,
-                        prompt_version=extracted.prompt_version,
-                        raw_json=extracted.raw_json,
-                        extracted_at=_now(),
+        def _process_rows(rows: list[dict[str, object]], label: str) -> None:
+            nonlocal inserted, updated, processed, prefiltered
+            for start in range(0, len(rows), batch_size):
+                # Bodies are fetched per email (a Gmail failure only fails that email); the
+                # chunk's LLM calls then go out together through the batch extractor.
+                fetched: list[tuple[dict[str, object], ExtractionInput]] = []
+                for r in rows[start : start + batch_size]:
+                    try:
+                        body = get_message_body_text(
+                            service,
+                            message_id=str(r["gmail_message_id"]),
+                            user_id=settings.gmail_user_id,
+                            max_chars=30_000,
+                        )
+                        fetched.append((r, ExtractionInput.from_row(r, body=body)))
+                    except Exception as e:  # noqa: BLE001
+                        processed += 1
+                        record_failure(r, e)
+
+                results = (
+                    extract_payments_batch(
+                        [inp for _, inp in fetched],
+                        backend=backend,
+                        prefilter=settings.extraction_prefilter,
                     )
+                    if fetched
+                    else []
+                )
+                for (r, _), extracted in zip(fetched, results):
+                    processed += 1
+                    if isinstance(extracted, Exception):
+                        record_failure(r, extracted)
+                        continue
+                    try:
+                        if extracted.prefiltered:
+                            status = "prefiltered"
+                            prefiltered += 1
+                        elif extracted.cost_amount or extracted.vendor_name or extracted.item_name:
+                            status = "succeeded"
+                        else:
+                            status = "no_payment"
+
+                        was_insert = upsert_message_payment_metadata(
+                            engine=engine,
+                            message_id=int(r["message_id"]),  # type: ignore[arg-type]
+                            status=status,
+                            error=None,
+                            item_name=extracted.item_name,
+                            vendor_name=extracted.vendor_name,
+                            item_category=extracted.item_category,
+                            cost_amount=extracted.cost_amount,
+                            cost_currency=extracted.cost_currency,
+                            is_recurring=extracted.is_recurring,
+                            frequency=extracted.frequency,
+                            payment_date=extracted.payment_date,
+                            payment_fingerprint=extracted.payment_fingerprint,
+                            confidence=extracted.confidence,
+                            model=extracted.model,
+                            prompt_version=extracted.prompt_version,
+                            raw_json=extracted.raw_json,
+                            extracted_at=_now(),
+                        )
+                    except Exception as e:  # noqa: BLE001
+                        record_failure(r, e)
+                        continue
 
                     if was_insert:
                         inserted += 1
                     else:
                         updated += 1
 
-                    if processed % 25 == 0 or processed == total:
-                        _set_job(
-                            job_id,
-                            phase="payment_extract",
-                            processed=processed,
-                            inserted=inserted,
-                            skipped_existing=updated,
-                            failed=failed,
-                            message=(
-                                f"{label}: {processed}/{total} (ins {inserted}, "
-                                f"upd {updated}, fail {failed})"
-                            ),
-                        )
-                except Exception as e:  # noqa: BLE001
-                    failed += 1
-                    _add_job_error(job_id, f"payment_extract_failed {r.get('gmail_message_id')}: {e}")
-
-                    try:
-                        mid = int(r["message_id"])  # type: ignore[index]
-                        upsert_message_payment_metadata(
-                            engine=engine,
-                            message_id=mid,
-                            status="failed",
-                            error=str(e),
-                            item_name=None,
-                            vendor_name=None,
-                            item_category=None,
-                            cost_amount=None,
-                            cost_currency=None,
-                            is_recurring=None,
-                            frequency=None,
-                            payment_date=None,
-                            payment_fingerprint=None,
-                            confidence=None,
-                            model=settings.ollama_model,
-                            prompt_version=PROMPT_VERSION,
-                            raw_json=None,
-                            extracted_at=_now(),
-                        )
-                    except Exception:
-                        pass
-
-                    _set_job(
-                        job_id,
-                        phase="payment_extract",
-                        processed=processed,
-                        inserted=inserted,
-                        skipped_existing=updated,
-                        failed=failed,
-                        message=(
-                            f"{label}: {processed}/{total} (ins {inserted}, "
-                            f"upd {updated}, fail {failed})"
-                        ),
-                    )
+                _set_job(
+                    job_id,
+                    phase="payment_extract",
+                    processed=processed,
+                    inserted=inserted,
+                    skipped_existing=updated,
+                    failed=failed,
+                    message=(
+                        f"{label}: {processed}/{total} (ins {inserted}, "
+                        f"upd {updated}, fail {failed})"
+                    ),
+                )
 
         _process_rows(rows_financial, "Financial")
         _process_rows(rows_recent, "Recent")
 
+        # One aggregate per run so pre-filter recall regressions show up in the logs.
+        logger.info(
+            "payment_extract_prefilter",
+            extra={"job_id": job_id, "total": total, "skipped": prefiltered},
+        )
         _set_job(
             job_id,
             phase="payment_extract",
@@ -2366,7 +2848,10 @@ def start_payment_extract_financial_and_recent(days: int = 12):
             inserted=inserted,
             skipped_existing=updated,
             failed=failed,
-            message=f"Done: processed {processed}, inserted {inserted}, updated {updated}, failed {failed}",
+            message=(
+                f"Done: processed {processed}, inserted {inserted}, updated {updated}, "
+                f"failed {failed}, prefiltered {prefiltered}"
+            ),
         )
 
     _run_in_thread(job_id, task)
@@ -2378,11 +2863,10 @@ def start_maintenance(
     inbox_cleanup_days: int | None = None,
     label_threshold: int | None = None,
     fallback_days: int | None = None,
+    settings: Settings = Depends(get_settings),
 ):
     """Run the full maintenance pipeline incrementally."""
 
-    settings = Settings()
-
     job_id = _make_job_id("maintenance")
     job = _Job(
         job_id=job_id,
@@ -2390,16 +2874,13 @@ def start_maintenance(
         state="queued",
         phase="maintenance",
         started_at=_now(),
-        updated_at=_now(),
         progress_total=None,
         progress_processed=0,
-        counters=JobCounters(),
         message="Queued",
-        error_samples=[],
+        error_samples=(),
         eta_hint=None,
     )
-    with _lock:
-        _jobs[job_id] = job
+    _register_job(job)
 
     def task():
         from app.db.postgres import engine
@@ -18,7 +18,7 @@ from datetime import datetime, timezone
 from fastapi import APIRouter, Query
 
 from app.api.models import EmailMessageSummary, MessageSamplesResponse
-from app.settings import Settings
+from app.settings import get_settings
 
 router = APIRouter(prefix="/api/messages", tags=["messages"])
 
@@ -135,7 +135,7 @@ def message_samples(
         try:
             from app.gmail.client import get_gmail_service_from_files, list_label_names
 
-            s = Settings()
+            s = get_settings()
             service = get_gmail_service_from_files(
                 credentials_path=s.gmail_credentials_path,
                 token_path=s.gmail_token_path,
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from datetime import date, datetime, time
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class DashboardNode(BaseModel):
@@ -23,12 +23,17 @@ class DashboardTreeResponse(BaseModel):
 
 
 class JobProgress(BaseModel):
+    # Immutable so job snapshots can share instances instead of copying them.
+    model_config = ConfigDict(frozen=True)
+
     total: int | None = None
     processed: int
     percent: float | None = None
 
 
 class JobCounters(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     inserted: int = 0
     skipped_existing: int = 0
     failed: int = 0
@@ -48,10 +53,14 @@ class JobStatusResponse(BaseModel):
     # Kept intentionally small (sampled) to avoid returning huge payloads.
     error_samples: list[str] | None = None
     eta_hint: str | None = None
+    # Suggested delay before the next status poll (adaptive: fast while progressing, backs off
+    # when idle or finished).
+    poll_after_ms: int | None = None
 
 
 class CurrentJobResponse(BaseModel):
     active: dict | None = None
+    poll_after_ms: int | None = None
 
 
 class EmailMessageSummary(BaseModel):
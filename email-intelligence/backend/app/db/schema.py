@@ -75,6 +75,11 @@ def ensure_core_schema(engine) -> None:
         CREATE INDEX IF NOT EXISTS idx_email_archived_at
             ON email_message(archived_at);
 
+        -- Retention sweeps: per-label cutoffs become range scans over unarchived mail.
+        CREATE INDEX IF NOT EXISTS idx_email_retention_unarchived
+            ON email_message(internal_date)
+            WHERE archived_at IS NULL;
+
         CREATE INDEX IF NOT EXISTS idx_email_inbox_removed_at
             ON email_message(inbox_removed_at);
 
@@ -87,6 +92,54 @@ def ensure_core_schema(engine) -> None:
         CREATE INDEX IF NOT EXISTS idx_email_label_ids
             ON email_message USING GIN(label_ids);
 
+        -- Dashboard tree: covers every column the aggregation reads, with the same TRASH
+        -- predicate, so the GROUPING SETS query can run as an index-only scan.
+        CREATE INDEX IF NOT EXISTS idx_email_dashboard
+            ON email_message(category, subcategory, cluster_id, from_domain)
+            INCLUDE (is_unread)
+            WHERE NOT ('TRASH' = ANY(COALESCE(label_ids, ARRAY[]::text[])));
+
+        -- Change tracking for cached read endpoints (dashboard tree): statement-level triggers
+        -- bump a sequence once per statement that actually changed rows, so validating a cache
+        -- is one read of last_value. Nothing is written per row, so UPDATEs stay HOT-eligible.
+        -- (Replaces an earlier per-row updated_at trigger + index, removed below.)
+        DROP TRIGGER IF EXISTS trg_email_message_touch_updated_at ON email_message;
+        DROP TRIGGER IF EXISTS trg_email_cluster_touch_updated_at ON email_cluster;
+        DROP FUNCTION IF EXISTS email_intel_touch_updated_at();
+        DROP INDEX IF EXISTS idx_email_updated_at;
+        ALTER TABLE email_message DROP COLUMN IF EXISTS updated_at;
+        ALTER TABLE email_cluster DROP COLUMN IF EXISTS updated_at;
+
+        CREATE SEQUENCE IF NOT EXISTS email_intel_change_seq;
+
+        CREATE OR REPLACE FUNCTION email_intel_bump_change_seq() RETURNS trigger AS $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM changed_rows) THEN
+                PERFORM nextval('email_intel_change_seq');
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER trg_email_message_change_insert
+            AFTER INSERT ON email_message REFERENCING NEW TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION email_intel_bump_change_seq();
+        CREATE OR REPLACE TRIGGER trg_email_message_change_update
+            AFTER UPDATE ON email_message REFERENCING NEW TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION email_intel_bump_change_seq();
+        CREATE OR REPLACE TRIGGER trg_email_message_change_delete
+            AFTER DELETE ON email_message REFERENCING OLD TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION email_intel_bump_change_seq();
+        CREATE OR REPLACE TRIGGER trg_email_cluster_change_insert
+            AFTER INSERT ON email_cluster REFERENCING NEW TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION email_intel_bump_change_seq();
+        CREATE OR REPLACE TRIGGER trg_email_cluster_change_update
+            AFTER UPDATE ON email_cluster REFERENCING NEW TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION email_intel_bump_change_seq();
+        CREATE OR REPLACE TRIGGER trg_email_cluster_change_delete
+            AFTER DELETE ON email_cluster REFERENCING OLD TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION email_intel_bump_change_seq();
+
         -- Event extraction (Phase 2+): per-message structured event metadata.
         -- One row per email_message; idempotent updates allow re-running the extractor.
         CREATE TABLE IF NOT EXISTS message_event_metadata (
@@ -132,6 +185,11 @@ def ensure_core_schema(engine) -> None:
         CREATE INDEX IF NOT EXISTS idx_message_event_metadata_hidden_at
             ON message_event_metadata(hidden_at);
 
+        -- /api/events/future default view: visible, succeeded events ordered by date.
+        CREATE INDEX IF NOT EXISTS idx_message_event_metadata_future_visible
+            ON message_event_metadata(event_date, start_time)
+            WHERE status = 'succeeded' AND hidden_at IS NULL;
+
         CREATE UNIQUE INDEX IF NOT EXISTS idx_message_event_metadata_calendar_ical_uid
             ON message_event_metadata(calendar_ical_uid);
 
@@ -13,16 +13,19 @@ Phase 2 (clustering/labeling) rules:
 
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from email.utils import getaddresses, parseaddr
-from typing import Iterable
+from pathlib import Path
+from typing import Iterable, Sequence
 
 from google.auth.exceptions import RefreshError
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 
 import json
 
@@ -32,8 +35,19 @@ METADATA_HEADERS: tuple[str, ...] = ("From", "To", "Cc", "Bcc", "Subject", "Date
 GMAIL_SCOPE_READONLY = "https://www.googleapis.com/auth/gmail.readonly"
 GMAIL_SCOPE_MODIFY = "https://www.googleapis.com/auth/gmail.modify"
 
+# users.messages.batchModify accepts at most this many message ids per call.
+BATCH_MODIFY_MAX_IDS = 1000
 
-@dataclass(frozen=True)
+# Retries for label reads and message mutations. `execute(num_retries=...)` retries 429, 5xx and
+# 403 rate-limit responses with randomized exponential backoff, so a quota burst does not turn
+# into permanent failures.
+GMAIL_NUM_RETRIES = 5
+
+# Calls per HTTP batch request. Gmail allows 100 but recommends <= 50 to avoid rate limiting.
+HTTP_BATCH_MAX_CALLS = 50
+
+
+@dataclass(frozen=True, slots=True)
 class GmailMessageMetadata:
     gmail_message_id: str
     thread_id: str | None
@@ -154,6 +168,59 @@ def get_gmail_service_from_files(
     return build("gmail", "v1", credentials=creds)
 
 
+# Per-thread service cache: googleapiclient services wrap an httplib2 connection, which is not
+# thread-safe. Entries are keyed by file paths + scopes and invalidated when either file's mtime
+# changes.
+_service_local = threading.local()
+
+
+def _mtime(path: str) -> float | None:
+    try:
+        return Path(path).stat().st_mtime
+    except OSError:
+        return None
+
+
+def get_gmail_service_cached(
+    *,
+    credentials_path: str,
+    token_path: str,
+    scopes: list[str] | None = None,
+    auth_mode: str = "local_server",
+    allow_interactive: bool = True,
+):
+    """Like `get_gmail_service_from_files`, but reuse the service built on this thread.
+
+    Building a service parses the token file and the discovery document, which dominates a
+    single cheap API call. The cached service refreshes its own access token when it expires;
+    replacing the credentials or token file (different mtime) forces a rebuild, which also
+    re-runs the token scope checks.
+    """
+
+    cache: dict[tuple, tuple[float | None, float | None, object]] | None = getattr(
+        _service_local, "services", None
+    )
+    if cache is None:
+        cache = _service_local.services = {}
+
+    key = (credentials_path, token_path, tuple(sorted(scopes or [GMAIL_SCOPE_READONLY])))
+    stamp = (_mtime(credentials_path), _mtime(token_path))
+    hit = cache.get(key)
+    if hit is not None and hit[:2] == stamp:
+        return hit[2]
+
+    service = get_gmail_service_from_files(
+        credentials_path=credentials_path,
+        token_path=token_path,
+        scopes=scopes,
+        auth_mode=auth_mode,
+        allow_interactive=allow_interactive,
+    )
+    # Re-stat: an interactive flow may just have written the token file.
+    cache[key] = (_mtime(credentials_path), _mtime(token_path), service)
+    return service
+
+
 def iter_message_ids(
     service,
     *,
@@ -355,50 +422,55 @@ def list_label_names(service, *, user_id: str = "me") -> dict[str, str]:
     human-friendly label names.
     """
 
-    resp = service.users().labels().list(userId=user_id).execute()
-    labels = resp.get("labels", []) or []
-
-    out: dict[str, str] = {}
-    for l in labels:
-        lid = l.get("id")
-        name = l.get("name")
-        if lid and name:
-            out[str(lid)] = str(name)
-    return out
+    return label_maps(service, user_id=user_id)[1]
 
 
 def list_labels(service, *, user_id: str = "me") -> list[dict]:
     """Return all Gmail labels as raw dicts."""
 
-    resp = service.users().labels().list(userId=user_id).execute()
+    req = service.users().labels().list(userId=user_id)
+    resp = req.execute(num_retries=GMAIL_NUM_RETRIES)
     return list(resp.get("labels", []) or [])
 
 
 def label_name_to_id(service, *, user_id: str = "me") -> dict[str, str]:
     """Return a mapping of Gmail label name -> label id."""
 
-    labels = list_labels(service, user_id=user_id)
-    out: dict[str, str] = {}
-    for l in labels:
+    return label_maps(service, user_id=user_id)[0]
+
+
+def label_maps(service, *, user_id: str = "me") -> tuple[dict[str, str], dict[str, str]]:
+    """Return (label name -> id, label id -> name) from a single labels.list call.
+
+    Callers that need both directions should use this rather than `label_name_to_id` plus
+    `list_label_names`, which would list the labels twice.
+    """
+
+    name_to_id: dict[str, str] = {}
+    id_to_name: dict[str, str] = {}
+    for l in list_labels(service, user_id=user_id):
         lid = l.get("id")
         name = l.get("name")
         if lid and name:
-            out[str(name)] = str(lid)
-    return out
+            name_to_id[str(name)] = str(lid)
+            id_to_name[str(lid)] = str(name)
+    return name_to_id, id_to_name
 
 
 def create_label(service, *, name: str, user_id: str = "me") -> dict:
     """Create a Gmail label and return the created label resource."""
 
     body = {"name": name, "labelListVisibility": "labelShow", "messageListVisibility": "show"}
-    return service.users().labels().create(userId=user_id, body=body).execute()
+    req = service.users().labels().create(userId=user_id, body=body)
+    return req.execute(num_retries=GMAIL_NUM_RETRIES)
 
 
 def update_label(service, *, label_id: str, name: str, user_id: str = "me") -> dict:
     """Update (rename) an existing Gmail label."""
 
     body = {"id": label_id, "name": name}
-    return service.users().labels().update(userId=user_id, id=label_id, body=body).execute()
+    req = service.users().labels().update(userId=user_id, id=label_id, body=body)
+    return req.execute(num_retries=GMAIL_NUM_RETRIES)
 
 
 def modify_message_labels(
@@ -419,7 +491,156 @@ def modify_message_labels(
         body["addLabelIds"] = list(add_label_ids)
     if remove_label_ids:
         body["removeLabelIds"] = list(remove_label_ids)
-    return service.users().messages().modify(userId=user_id, id=message_id, body=body).execute()
+    req = service.users().messages().modify(userId=user_id, id=message_id, body=body)
+    return req.execute(num_retries=GMAIL_NUM_RETRIES)
+
+
+def batch_modify_message_labels(
+    service,
+    *,
+    message_ids: list[str],
+    add_label_ids: list[str] | None = None,
+    remove_label_ids: list[str] | None = None,
+    user_id: str = "me",
+) -> None:
+    """Apply the same label changes to many Gmail messages in one request.
+
+    Args:
+        service: Gmail API service.
+        message_ids: Up to `BATCH_MODIFY_MAX_IDS` Gmail message ids.
+        add_label_ids: Label ids to add to every message.
+        remove_label_ids: Label ids to remove from every message.
+        user_id: Gmail user id.
+
+    Raises:
+        ValueError: If more than `BATCH_MODIFY_MAX_IDS` ids are given.
+    """
+
+    if len(message_ids) > BATCH_MODIFY_MAX_IDS:
+        raise ValueError(f"batchModify accepts at most {BATCH_MODIFY_MAX_IDS} ids")
+
+    body: dict[str, list[str]] = {"ids": list(message_ids)}
+    if add_label_ids:
+        body["addLabelIds"] = list(add_label_ids)
+    if remove_label_ids:
+        body["removeLabelIds"] = list(remove_label_ids)
+    req = service.users().messages().batchModify(userId=user_id, body=body)
+    req.execute(num_retries=GMAIL_NUM_RETRIES)
+
+
+def is_invalid_id_error(exc: Exception | None) -> bool:
+    """Return True when Gmail rejected the request's input (400/404), e.g. a bad message id.
+
+    batchModify is all-or-nothing, so only these failures are worth retrying per message;
+    rate-limit and server errors would just multiply quota use.
+    """
+
+    if not isinstance(exc, HttpError):
+        return False
+    return int(getattr(exc.resp, "status", 0) or 0) in (400, 404)
+
+
+_RATE_LIMIT_REASONS = frozenset({"rateLimitExceeded", "userRateLimitExceeded"})
+
+
+def _error_reasons(exc: HttpError) -> set[str]:
+    # Gmail error bodies look like {"error": {"errors": [{"reason": ...}, ...], ...}}.
+    try:
+        data = json.loads(exc.content or b"{}")
+    except ValueError:
+        return set()
+    err = data.get("error") if isinstance(data, dict) else None
+    items = err.get("errors") if isinstance(err, dict) else None
+    if not isinstance(items, list):
+        return set()
+    return {str(item["reason"]) for item in items if isinstance(item, dict) and item.get("reason")}
+
+
+def _is_retryable_error(exc: Exception | None) -> bool:
+    """Return True for HTTP errors worth retrying (429, 5xx, 403 rate-limit reasons)."""
+
+    if not isinstance(exc, HttpError):
+        return False
+    status = int(getattr(exc.resp, "status", 0) or 0)
+    if status == 429 or status >= 500:
+        return True
+    return status == 403 and not _RATE_LIMIT_REASONS.isdisjoint(_error_reasons(exc))
+
+
+def modify_message_labels_batch(
+    service,
+    *,
+    changes: Sequence[tuple[str, str, list[str] | None, list[str] | None]],
+    user_id: str = "me",
+) -> dict[str, Exception | None]:
+    """Run per-message label changes through Google's HTTP batch endpoint (one round-trip).
+
+    Unlike `batch_modify_message_labels`, each message can get its own label set and fails
+    independently.
+
+    Args:
+        service: Gmail API service.
+        changes: Up to `HTTP_BATCH_MAX_CALLS` tuples of
+            (request_id, gmail_message_id, add_label_ids, remove_label_ids).
+        user_id: Gmail user id.
+
+    Returns:
+        Mapping of request_id -> None on success, or the exception for that call.
+
+    Raises:
+        ValueError: If more than `HTTP_BATCH_MAX_CALLS` changes are given.
+    """
+
+    if len(changes) > HTTP_BATCH_MAX_CALLS:
+        raise ValueError(f"HTTP batch accepts at most {HTTP_BATCH_MAX_CALLS} calls")
+    if not changes:
+        return {}
+
+    results: dict[str, Exception | None] = {}
+
+    def _on_response(request_id: str, _response: dict | None, exception: Exception | None) -> None:
+        results[request_id] = exception
+
+    batch = service.new_batch_http_request(callback=_on_response)
+    for request_id, message_id, add_label_ids, remove_label_ids in changes:
+        body: dict[str, list[str]] = {}
+        if add_label_ids:
+            body["addLabelIds"] = list(add_label_ids)
+        if remove_label_ids:
+            body["removeLabelIds"] = list(remove_label_ids)
+        batch.add(
+            service.users().messages().modify(userId=user_id, id=message_id, body=body),
+            request_id=request_id,
+        )
+
+    try:
+        batch.execute()
+    except Exception as e:  # noqa: BLE001
+        # The batch request itself failed; no sub-request is known to have been applied.
+        return {request_id: e for request_id, *_ in changes}
+
+    # Defensive: a sub-request without a callback is reported as failed.
+    for request_id, *_ in changes:
+        results.setdefault(request_id, RuntimeError("no response for batched request"))
+
+    # Sub-requests are not retried by the batch itself; re-run rate-limited ones individually
+    # (with backoff) rather than reporting a transient quota error as a failure.
+    for request_id, message_id, add_label_ids, remove_label_ids in changes:
+        if not _is_retryable_error(results[request_id]):
+            continue
+        try:
+            modify_message_labels(
+                service,
+                message_id=message_id,
+                add_label_ids=add_label_ids,
+                remove_label_ids=remove_label_ids,
+                user_id=user_id,
+            )
+            results[request_id] = None
+        except Exception as e:  # noqa: BLE001
+            results[request_id] = e
+
+    return results
 
 
 def move_message_to_trash(
@@ -434,4 +655,5 @@ def move_message_to_trash(
     Messages in Trash are eligible for automatic permanent deletion after ~30 days.
     """
 
-    return service.users().messages().trash(userId=user_id, id=message_id).execute()
+    req = service.users().messages().trash(userId=user_id, id=message_id)
+    return req.execute(num_retries=GMAIL_NUM_RETRIES)
@@ -5,6 +5,8 @@ We keep this separate from Gmail to allow different OAuth scopes and token files
 
 from __future__ import annotations
 
+import threading
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Sequence
 
@@ -16,6 +18,9 @@ from googleapiclient.discovery import build
 
 CALENDAR_SCOPE_EVENTS = "https://www.googleapis.com/auth/calendar.events"
 
+# Google rejects HTTP batch requests with more than 50 calls.
+_BATCH_MAX_CALLS = 50
+
 
 def get_calendar_service_from_files(
     *,
@@ -71,3 +76,138 @@ def get_calendar_service_from_files(
         token_file.write_text(creds.to_json(), encoding="utf-8")
 
     return build("calendar", "v3", credentials=creds)
+
+
+# Per-thread service cache: googleapiclient services wrap an httplib2 connection, which is not
+# thread-safe. Entries are keyed by file paths and invalidated when either file's mtime changes.
+_service_local = threading.local()
+
+
+def _mtime(path: str) -> float | None:
+    try:
+        return Path(path).stat().st_mtime
+    except OSError:
+        return None
+
+
+def get_calendar_service_cached(
+    *,
+    credentials_path: str,
+    token_path: str,
+    auth_mode: str = "local_server",
+    allow_interactive: bool = True,
+):
+    """Like `get_calendar_service_from_files`, but reuse the service built on this thread.
+
+    Building a service parses the token file and the discovery document, which dominates a
+    single cheap API call. The cached service refreshes its own access token when it expires;
+    replacing the credentials or token file (different mtime) forces a rebuild.
+    """
+
+    cache: dict[tuple[str, str], tuple[float | None, float | None, object]] | None = getattr(
+        _service_local, "services", None
+    )
+    if cache is None:
+        cache = _service_local.services = {}
+
+    key = (credentials_path, token_path)
+    stamp = (_mtime(credentials_path), _mtime(token_path))
+    hit = cache.get(key)
+    if hit is not None and hit[:2] == stamp:
+        return hit[2]
+
+    service = get_calendar_service_from_files(
+        credentials_path=credentials_path,
+        token_path=token_path,
+        auth_mode=auth_mode,
+        allow_interactive=allow_interactive,
+    )
+    # Re-stat: an interactive flow may just have written the token file.
+    cache[key] = (_mtime(credentials_path), _mtime(token_path), service)
+    return service
+
+
+def _rfc3339(dt: datetime) -> str:
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+def list_event_ids_by_ical_uid(
+    service,
+    *,
+    calendar_id: str,
+    time_min: datetime,
+    time_max: datetime,
+    window_days: int = 31,
+) -> dict[str, str]:
+    """Return a mapping of iCalUID -> event id for events in [time_min, time_max).
+
+    The range is split into `window_days` windows whose `events.list` pages are fetched together
+    through Google's HTTP batch endpoint. A long range therefore costs one round-trip per page
+    depth rather than one per page.
+
+    Args:
+        service: Calendar v3 service.
+        calendar_id: Calendar to scan.
+        time_min: Inclusive lower bound (timezone-aware).
+        time_max: Exclusive upper bound (timezone-aware).
+        window_days: Width of each batched sub-range.
+
+    Raises:
+        googleapiclient.errors.HttpError: If any listed page fails.
+    """
+
+    # (window start, window end, page token)
+    pending: list[tuple[datetime, datetime, str | None]] = []
+    start = time_min
+    while start < time_max:
+        end = min(start + timedelta(days=window_days), time_max)
+        pending.append((start, end, None))
+        start = end
+
+    out: dict[str, str] = {}
+    while pending:
+        next_round: list[tuple[datetime, datetime, str | None]] = []
+        for offset in range(0, len(pending), _BATCH_MAX_CALLS):
+            chunk = pending[offset : offset + _BATCH_MAX_CALLS]
+            responses: dict[str, dict] = {}
+            errors: list[Exception] = []
+
+            def _collect(request_id: str, response: dict, exception: Exception | None) -> None:
+                if exception is not None:
+                    errors.append(exception)
+                else:
+                    responses[request_id] = response
+
+            batch = service.new_batch_http_request(callback=_collect)
+            for i, (window_start, window_end, page_token) in enumerate(chunk):
+                batch.add(
+                    service.events().list(
+                        calendarId=calendar_id,
+                        timeMin=_rfc3339(window_start),
+                        timeMax=_rfc3339(window_end),
+                        singleEvents=True,
+                        showDeleted=False,
+                        maxResults=2500,
+                        pageToken=page_token,
+                    ),
+                    request_id=str(i),
+                )
+            batch.execute()
+            if errors:
+                raise errors[0]
+
+            for i, (window_start, window_end, _) in enumerate(chunk):
+                resp = responses.get(str(i)) or {}
+                for it in resp.get("items") or []:
+                    uid = (it.get("iCalUID") or "").strip()
+                    eid = (it.get("id") or "").strip()
+                    if uid and eid:
+                        out[uid] = eid
+
+                page_token = resp.get("nextPageToken")
+                if page_token:
+                    next_round.append((window_start, window_end, page_token))
+
+        pending = next_round
+
+    return out
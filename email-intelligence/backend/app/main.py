@@ -38,6 +38,7 @@ from app.gmail.client import get_gmail_service_from_files
 from app.api.dashboard import router as dashboard_router
 from app.api.events import router as events_router
 from app.api.payments import router as payments_router
+from app.api.jobs import cancel_queued_jobs
 from app.api.jobs import router as jobs_router
 from app.api.messages import router as messages_router
 from app.api.taxonomy import router as taxonomy_router
@@ -82,6 +83,12 @@ def _startup() -> None:
         ingest_fake_email()
 
 
+@app.on_event("shutdown")
+def _shutdown() -> None:
+    # Queued jobs would never start once the process exits; mark them cancelled.
+    cancel_queued_jobs()
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
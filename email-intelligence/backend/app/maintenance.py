@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import logging
 import time
 from datetime import datetime, timedelta, timezone
 from typing import Any, Callable
@@ -35,6 +36,8 @@ from app.settings import Settings
 from app.vector.qdrant import ensure_collection
 
 
+logger = logging.getLogger(__name__)
+
 ProgressCallback = Callable[..., None]
 
 
@@ -562,9 +565,11 @@ def run_maintenance(
         progress_cb: Optional callback for job progress updates.
     """
 
-    from app.analysis.events.extractor import extract_event_from_email
+    from app.analysis.batch import ExtractionInput
+    from app.analysis.events.extractor import extract_events_batch
     from app.analysis.events.prompt import PROMPT_VERSION as EVENT_PROMPT_VERSION
-    from app.analysis.payments.extractor import extract_payment_from_email
+    from app.analysis.llm_backend import build_llm_backend
+    from app.analysis.payments.extractor import extract_payments_batch
     from app.analysis.payments.prompt import PROMPT_VERSION as PAYMENT_PROMPT_VERSION
     from app.gmail.client import (
         GMAIL_SCOPE_MODIFY,
@@ -578,6 +583,7 @@ def run_maintenance(
     inbox_cleanup_days = int(inbox_cleanup_days or settings.inbox_cleanup_days)
     label_threshold = int(label_threshold or settings.maintenance_label_threshold)
     fallback_days = int(fallback_days or settings.maintenance_fallback_days)
+    batch_size = max(1, int(settings.extraction_batch_size))
 
     ensure_collection()
 
@@ -703,6 +709,8 @@ def run_maintenance(
         progress_cb=progress_cb,
     )
 
+    backend = build_llm_backend(settings)
+
     cleanup_cutoff = _now_utc() - timedelta(days=max(1, inbox_cleanup_days))
     _cleanup_inbox(
         engine=engine,
@@ -713,11 +721,11 @@ def run_maintenance(
         progress_cb=progress_cb,
     )
 
-    if not settings.ollama_host:
+    if backend is None:
         _call_progress(
             progress_cb,
             phase="maintenance_event_extract",
-            message="Skipping event extraction: Ollama not configured",
+            message="Skipping event extraction: LLM backend not configured",
         )
     else:
         event_rows = list_unprocessed_messages_in_category_since(
@@ -727,6 +735,7 @@ def run_maintenance(
             received_since=cutoff,
             limit=None,
             include_trash=False,
+            include_prefiltered=not settings.extraction_prefilter,
         )
 
         total = len(event_rows)
@@ -741,112 +750,112 @@ def run_maintenance(
         updated = 0
         failed = 0
         processed = 0
+        prefiltered = 0
 
-        for r in event_rows:
-            processed += 1
+        def record_event_failure(r: dict[str, Any], e: Exception) -> None:
+            nonlocal failed
+            failed += 1
             try:
-                mid = int(r["message_id"])
-                gid = str(r["gmail_message_id"])
-                subj = r.get("subject")
-                from_domain = r.get("from_domain")
-                internal_date = r.get("internal_date")
-                internal_iso = internal_date.isoformat() if internal_date is not None else None
-
-                body = get_message_body_text(
-                    service,
-                    message_id=gid,
-                    user_id=settings.gmail_user_id,
-                    max_chars=30_000,
-                )
-
-                extracted = extract_event_from_email(
-                    ollama_host=settings.ollama_host,
-                    ollama_model=settings.ollama_model,
-                    subject=str(subj) if subj is not None else None,
-                    from_domain=str(from_domain) if from_domain is not None else None,
-                    internal_date_iso=internal_iso,
-                    body=body,
-                )
-
-                if extracted.event_name or extracted.event_date or extracted.start_time:
-                    status = "succeeded"
-                else:
-                    status = "no_event"
-
-                was_insert = upsert_message_event_metadata(
+                upsert_message_event_metadata(
                     engine=engine,
-                    message_id=mid,
-                    status=status,
-                    error=None,
-                    event_name=extracted.event_name,
-                    event_type=extracted.event_type,
-                    event_date=extracted.event_date,
-                    start_time=extracted.start_time,
-                    end_time=extracted.end_time,
-                    timezone=extracted.timezone,
-                    end_time_inferred=bool(extracted.end_time_inferred),
-                    confidence=extracted.confidence,
-                    model=extracted.model,
-                    prompt_version=extracted.prompt_version,
-                    raw_json=extracted.raw_json,
+                    message_id=int(r["message_id"]),
+                    status="failed",
+                    error=str(e),
+                    event_name=None,
+                    event_type=None,
+                    event_date=None,
+                    start_time=None,
+                    end_time=None,
+                    timezone=None,
+                    end_time_inferred=False,
+                    confidence=None,
+                    model=backend.model,
+                    prompt_version=EVENT_PROMPT_VERSION,
+                    raw_json=None,
                     extracted_at=_now_utc(),
                 )
-
-                if was_insert:
-                    inserted += 1
-                else:
-                    updated += 1
-
-                if processed % 25 == 0 or processed == total:
-                    _call_progress(
-                        progress_cb,
-                        phase="maintenance_event_extract",
-                        processed=processed,
-                        inserted=inserted,
-                        skipped_existing=updated,
-                        failed=failed,
-                        message=(
-                            f"Event extraction: {processed}/{total} "
-                            f"(ins {inserted}, upd {updated}, fail {failed})"
-                        ),
+            except Exception:
+                pass
+
+        for start in range(0, total, batch_size):
+            # Bodies are fetched per email (a Gmail failure only fails that email); the chunk's
+            # LLM calls then go out together through the batch extractor.
+            fetched: list[tuple[dict[str, Any], ExtractionInput]] = []
+            for r in event_rows[start : start + batch_size]:
+                try:
+                    body = get_message_body_text(
+                        service,
+                        message_id=str(r["gmail_message_id"]),
+                        user_id=settings.gmail_user_id,
+                        max_chars=30_000,
                     )
-            except Exception as e:  # noqa: BLE001
-                failed += 1
+                    fetched.append((r, ExtractionInput.from_row(r, body=body)))
+                except Exception as e:  # noqa: BLE001
+                    processed += 1
+                    record_event_failure(r, e)
+
+            results = (
+                extract_events_batch(
+                    [inp for _, inp in fetched],
+                    backend=backend,
+                    prefilter=settings.extraction_prefilter,
+                )
+                if fetched
+                else []
+            )
+            for (r, _), extracted in zip(fetched, results):
+                processed += 1
+                if isinstance(extracted, Exception):
+                    record_event_failure(r, extracted)
+                    continue
                 try:
-                    mid = int(r["message_id"])
-                    upsert_message_event_metadata(
+                    if extracted.prefiltered:
+                        status = "prefiltered"
+                        prefiltered += 1
+                    elif extracted.event_name or extracted.event_date or extracted.start_time:
+                        status = "succeeded"
+                    else:
+                        status = "no_event"
+
+                    was_insert = upsert_message_event_metadata(
                         engine=engine,
-                        message_id=mid,
-                        status="failed",
-                        error=str(e),
-                        event_name=None,
-                        event_type=None,
-                        event_date=None,
-                        start_time=None,
-                        end_time=None,
-                        timezone=None,
-                        end_time_inferred=False,
-                        confidence=None,
-                        model=settings.ollama_model,
-                        prompt_version=EVENT_PROMPT_VERSION,
-                        raw_json=None,
+                        message_id=int(r["message_id"]),
+                        status=status,
+                        error=None,
+                        event_name=extracted.event_name,
+                        event_type=extracted.event_type,
+                        event_date=extracted.event_date,
+                        start_time=extracted.start_time,
+                        end_time=extracted.end_time,
+                        timezone=extracted.timezone,
+                        end_time_inferred=bool(extracted.end_time_inferred),
+                        confidence=extracted.confidence,
+                        model=extracted.model,
+                        prompt_version=extracted.prompt_version,
+                        raw_json=extracted.raw_json,
                         extracted_at=_now_utc(),
                     )
-                except Exception:
-                    pass
+                except Exception as e:  # noqa: BLE001
+                    record_event_failure(r, e)
+                    continue
 
-                _call_progress(
-                    progress_cb,
-                    phase="maintenance_event_extract",
-                    processed=processed,
-                    inserted=inserted,
-                    skipped_existing=updated,
-                    failed=failed,
-                    message=(
-                        f"Event extraction: {processed}/{total} "
-                        f"(ins {inserted}, upd {updated}, fail {failed})"
-                    ),
-                )
+                if was_insert:
+                    inserted += 1
+                else:
+                    updated += 1
+
+            _call_progress(
+                progress_cb,
+                phase="maintenance_event_extract",
+                processed=processed,
+                inserted=inserted,
+                skipped_existing=updated,
+                failed=failed,
+                message=(
+                    f"Event extraction: {processed}/{total} "
+                    f"(ins {inserted}, upd {updated}, fail {failed})"
+                ),
+            )
 
         _call_progress(
             progress_cb,
@@ -857,15 +866,19 @@ def run_maintenance(
             failed=failed,
             message=(
                 f"Event extraction done: processed {processed}, "
-                f"inserted {inserted}, updated {updated}"
+                f"inserted {inserted}, updated {updated}, prefiltered {prefiltered}"
             ),
         )
+        logger.info(
+            "maintenance_event_extract_prefilter",
+            extra={"total": total, "skipped": prefiltered},
+        )
 
-    if not settings.ollama_host:
+    if backend is None:
         _call_progress(
             progress_cb,
             phase="maintenance_payment_extract",
-            message="Skipping payment extraction: Ollama not configured",
+            message="Skipping payment extraction: LLM backend not configured",
         )
     else:
         rows_financial = list_unprocessed_messages_in_category_any_subcategory(
@@ -873,12 +886,14 @@ def run_maintenance(
             category="Financial",
             limit=None,
             include_trash=False,
+            include_prefiltered=not settings.extraction_prefilter,
         )
         rows_recent = list_unprocessed_messages_received_since(
             engine=engine,
             received_since=cutoff,
             limit=None,
             include_trash=False,
+            include_prefiltered=not settings.extraction_prefilter,
         )
 
         seen: set[int] = set()
@@ -902,116 +917,114 @@ def run_maintenance(
         updated = 0
         failed = 0
         processed = 0
+        prefiltered = 0
 
-        for r in rows:
-            processed += 1
+        def record_payment_failure(r: dict[str, Any], e: Exception) -> None:
+            nonlocal failed
+            failed += 1
             try:
-                mid = int(r["message_id"])
-                gid = str(r["gmail_message_id"])
-                subj = r.get("subject")
-                from_domain = r.get("from_domain")
-                internal_date = r.get("internal_date")
-                internal_iso = internal_date.isoformat() if internal_date is not None else None
-
-                body = get_message_body_text(
-                    service,
-                    message_id=gid,
-                    user_id=settings.gmail_user_id,
-                    max_chars=30_000,
-                )
-
-                extracted = extract_payment_from_email(
-                    ollama_host=settings.ollama_host,
-                    ollama_model=settings.ollama_model,
-                    subject=str(subj) if subj is not None else None,
-                    from_domain=str(from_domain) if from_domain is not None else None,
-                    internal_date_iso=internal_iso,
-                    body=body,
-                )
-
-                if extracted.cost_amount or extracted.vendor_name or extracted.item_name:
-                    status = "succeeded"
-                else:
-                    status = "no_payment"
-
-                was_insert = upsert_message_payment_metadata(
+                upsert_message_payment_metadata(
                     engine=engine,
-                    message_id=mid,
-                    status=status,
-                    error=None,
-                    item_name=extracted.item_name,
-                    vendor_name=extracted.vendor_name,
-                    item_category=extracted.item_category,
-                    cost_amount=extracted.cost_amount,
-                    cost_currency=extracted.cost_currency,
-                    is_recurring=extracted.is_recurring,
-                    frequency=extracted.frequency,
-                    payment_date=extracted.payment_date,
-                    payment_fingerprint=extracted.payment_fingerprint,
-                    confidence=extracted.confidence,
-                    model=extracted.model,
-                    prompt_version=extracted.prompt_version,
-                    raw_json=extracted.raw_json,
+                    message_id=int(r["message_id"]),
+                    status="failed",
+                    error=str(e),
+                    item_name=None,
+                    vendor_name=None,
+                    item_category=None,
+                    cost_amount=None,
+                    cost_currency=None,
+                    is_recurring=None,
+                    frequency=None,
+                    payment_date=None,
+                    payment_fingerprint=None,
+                    confidence=None,
+                    model=backend.model,
+                    prompt_version=PAYMENT_PROMPT_VERSION,
+                    raw_json=None,
                     extracted_at=_now_utc(),
                 )
+            except Exception:
+                pass
 
-                if was_insert:
-                    inserted += 1
-                else:
-                    updated += 1
-
-                if processed % 25 == 0 or processed == total:
-                    _call_progress(
-                        progress_cb,
-                        phase="maintenance_payment_extract",
-                        processed=processed,
-                        inserted=inserted,
-                        skipped_existing=updated,
-                        failed=failed,
-                        message=(
-                            f"Payment extraction: {processed}/{total} "
-                            f"(ins {inserted}, upd {updated}, fail {failed})"
-                        ),
+        for start in range(0, total, batch_size):
+            fetched = []
+            for r in rows[start : start + batch_size]:
+                try:
+                    body = get_message_body_text(
+                        service,
+                        message_id=str(r["gmail_message_id"]),
+                        user_id=settings.gmail_user_id,
+                        max_chars=30_000,
                     )
-            except Exception as e:  # noqa: BLE001
-                failed += 1
+                    fetched.append((r, ExtractionInput.from_row(r, body=body)))
+                except Exception as e:  # noqa: BLE001
+                    processed += 1
+                    record_payment_failure(r, e)
+
+            payment_results = (
+                extract_payments_batch(
+                    [inp for _, inp in fetched],
+                    backend=backend,
+                    prefilter=settings.extraction_prefilter,
+                )
+                if fetched
+                else []
+            )
+            for (r, _), payment in zip(fetched, payment_results):
+                processed += 1
+                if isinstance(payment, Exception):
+                    record_payment_failure(r, payment)
+                    continue
                 try:
-                    mid = int(r["message_id"])
-                    upsert_message_payment_metadata(
+                    if payment.prefiltered:
+                        status = "prefiltered"
+                        prefiltered += 1
+                    elif payment.cost_amount or payment.vendor_name or payment.item_name:
+                        status = "succeeded"
+                    else:
+                        status = "no_payment"
+
+                    was_insert = upsert_message_payment_metadata(
                         engine=engine,
-                        message_id=mid,
-                        status="failed",
-                        error=str(e),
-                        item_name=None,
-                        vendor_name=None,
-                        item_category=None,
-                        cost_amount=None,
-                        cost_currency=None,
-                        is_recurring=None,
-                        frequency=None,
-                        payment_date=None,
-                        payment_fingerprint=None,
-                        confidence=None,
-                        model=settings.ollama_model,
-                        prompt_version=PAYMENT_PROMPT_VERSION,
-                        raw_json=None,
+                        message_id=int(r["message_id"]),
+                        status=status,
+                        error=None,
+                        item_name=payment.item_name,
+                        vendor_name=payment.vendor_name,
+                        item_category=payment.item_category,
+                        cost_amount=payment.cost_amount,
+                        cost_currency=payment.cost_currency,
+                        is_recurring=payment.is_recurring,
+                        frequency=payment.frequency,
+                        payment_date=payment.payment_date,
+                        payment_fingerprint=payment.payment_fingerprint,
+                        confidence=payment.confidence,
+                        model=payment.model,
+                        prompt_version=payment.prompt_version,
+                        raw_json=payment.raw_json,
                         extracted_at=_now_utc(),
                     )
-                except Exception:
-                    pass
+                except Exception as e:  # noqa: BLE001
+                    record_payment_failure(r, e)
+                    continue
 
-                _call_progress(
-                    progress_cb,
-                    phase="maintenance_payment_extract",
-                    processed=processed,
-                    inserted=inserted,
-                    skipped_existing=updated,
-                    failed=failed,
-                    message=(
-                        f"Payment extraction: {processed}/{total} "
-                        f"(ins {inserted}, upd {updated}, fail {failed})"
-                    ),
-                )
+                if was_insert:
+                    inserted += 1
+                else:
+                    updated += 1
+
+            _call_progress(
+                progress_cb,
+                phase="maintenance_payment_extract",
+                processed=processed,
+                inserted=inserted,
+                skipped_existing=updated,
+                failed=failed,
+                message=(
+                    f"Payment extraction: {processed}/{total} "
+                    f"(ins {inserted}, upd {updated}, fail {failed})"
+                ),
+            )
 
         _call_progress(
             progress_cb,
@@ -1022,6 +1035,10 @@ def run_maintenance(
             failed=failed,
             message=(
                 f"Payment extraction done: processed {processed}, "
-                f"inserted {inserted}, updated {updated}"
+                f"inserted {inserted}, updated {updated}, prefiltered {prefiltered}"
             ),
         )
+        logger.info(
+            "maintenance_payment_extract_prefilter",
+            extra={"total": total, "skipped": prefiltered},
+        )
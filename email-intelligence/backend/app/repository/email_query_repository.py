@@ -8,7 +8,7 @@ from datetime import datetime
 from app.domain.email import EmailMessage
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class EmailRow:
     email: EmailMessage
     category: str | None
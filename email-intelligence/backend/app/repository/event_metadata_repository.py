@@ -2,11 +2,107 @@
 
 from __future__ import annotations
 
-from datetime import date, datetime, time, timezone
+from datetime import date, datetime, time, timedelta, timezone
 from typing import Any
 
 import json
 
+from sqlalchemy import text
+
+
+# Pure reads: run without BEGIN/COMMIT round-trips or a held transaction snapshot.
+_READ_OPTS = {"isolation_level": "AUTOCOMMIT"}
+
+# Module-level so SQLAlchemy's compiled-statement cache reuses it across calls; the hidden filter
+# is a bind parameter rather than an f-string variant.
+_Q_FUTURE_EVENTS = text(
+    """
+    SELECT
+        mem.message_id,
+        mem.event_date,
+        mem.start_time,
+        mem.end_time,
+        mem.end_time_inferred,
+        mem.timezone,
+        mem.event_type,
+        mem.event_name,
+        mem.calendar_event_id,
+        mem.calendar_checked_at,
+        mem.calendar_published_at,
+        mem.hidden_at,
+        em.subject,
+        em.from_domain,
+        em.internal_date
+    FROM message_event_metadata mem
+    JOIN email_message em ON em.id = mem.message_id
+    WHERE mem.status = 'succeeded'
+      AND mem.event_date IS NOT NULL
+      AND mem.event_date >= CURRENT_DATE
+      AND em.gmail_message_id NOT LIKE 'fake-%'
+      AND NOT ('TRASH' = ANY(COALESCE(em.label_ids, ARRAY[]::text[])))
+      AND (CAST(:include_hidden AS boolean) OR mem.hidden_at IS NULL)
+    ORDER BY mem.event_date ASC, mem.start_time ASC NULLS LAST, em.internal_date ASC
+    LIMIT :limit
+    """
+)
+
+# Calendar-check candidates: filter and aggregate in one statement so only the rows to check
+# come back.
+_Q_FUTURE_EVENTS_NEEDING_CHECK = text(
+    """
+    WITH f AS (
+        SELECT mem.message_id, mem.calendar_ical_uid, mem.event_date
+        FROM message_event_metadata mem
+        WHERE mem.message_id = ANY(:ids)
+          AND mem.event_date IS NOT NULL
+          AND (
+              mem.calendar_checked_at IS NULL
+              OR mem.calendar_checked_at < NOW() - CAST(:ttl AS interval)
+          )
+    )
+    SELECT
+        (
+            SELECT json_agg(json_build_object(
+                'message_id', f.message_id,
+                'calendar_ical_uid', f.calendar_ical_uid
+            ))
+            FROM f
+        ) AS rows,
+        MIN(event_date) AS min_date,
+        MAX(event_date) AS max_date
+    FROM f
+    """
+)
+
+# One UPDATE for a whole batch of calendar checks, fed by parallel arrays.
+_Q_SET_CALENDAR_STATUS_BULK = text(
+    """
+    UPDATE message_event_metadata AS mem
+    SET
+        -- See note in hide_event(): keep legacy rows compliant with the NOT VALID event_type CHECK.
+        event_type = CASE
+            WHEN mem.event_type IS NULL THEN NULL
+            WHEN mem.event_type IN ('Theatre', 'Comedy', 'Opera', 'Ballet', 'Cinema', 'Social', 'Other')
+                THEN mem.event_type
+            WHEN lower(mem.event_type) IN ('theatre', 'comedy', 'opera', 'ballet', 'cinema', 'social')
+                THEN initcap(lower(mem.event_type))
+            WHEN lower(mem.event_type) = 'other'
+                THEN 'Other'
+            ELSE 'Other'
+        END,
+        calendar_ical_uid = COALESCE(v.calendar_ical_uid, mem.calendar_ical_uid),
+        calendar_event_id = v.calendar_event_id,
+        calendar_checked_at = :checked_at,
+        updated_at = NOW()
+    FROM unnest(
+        CAST(:mids AS integer[]),
+        CAST(:uids AS text[]),
+        CAST(:eids AS text[])
+    ) AS v(message_id, calendar_ical_uid, calendar_event_id)
+    WHERE mem.message_id = v.message_id
+    """
+)
+
 
 def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
@@ -131,6 +227,7 @@ def list_unprocessed_messages_in_category_since(
     received_since: datetime,
     limit: int | None = 5000,
     include_trash: bool = False,
+    include_prefiltered: bool = False,
 ) -> list[dict[str, Any]]:
     """List category-scoped messages missing event metadata.
 
@@ -141,6 +238,8 @@ def list_unprocessed_messages_in_category_since(
         received_since: Only include emails with internal_date >= this value.
         limit: Max rows (None for no limit).
         include_trash: If False, exclude messages with the TRASH label.
+        include_prefiltered: Also return messages whose metadata row has status "prefiltered"
+            (skipped by the relevance pre-filter), so they can be re-extracted.
 
     Returns:
         Rows with message_id, gmail_message_id, subject, from_domain, internal_date.
@@ -157,7 +256,11 @@ def list_unprocessed_messages_in_category_since(
         "em.category = :category",
         "em.internal_date >= :received_since",
         "em.gmail_message_id NOT LIKE 'fake-%'",
-        "mem.message_id IS NULL",
+        (
+            "(mem.message_id IS NULL OR mem.status = 'prefiltered')"
+            if include_prefiltered
+            else "mem.message_id IS NULL"
+        ),
     ]
 
     if subcategory is None:
@@ -329,50 +432,16 @@ def list_future_events(
         Rows ordered by date/time with message_id and display fields.
     """
 
-    from sqlalchemy import text
-
     limit = max(1, min(int(limit), 2000))
 
-    where = [
-        "mem.status = 'succeeded'",
-        "mem.event_date IS NOT NULL",
-        "mem.event_date >= CURRENT_DATE",
-        "em.gmail_message_id NOT LIKE 'fake-%'",
-        "NOT ('TRASH' = ANY(COALESCE(em.label_ids, ARRAY[]::text[])))",
-    ]
-    if not include_hidden:
-        where.append("mem.hidden_at IS NULL")
-
-    where_sql = " AND ".join(where)
-
-    q = text(
-        f"""
-        SELECT
-            mem.message_id,
-            mem.event_date,
-            mem.start_time,
-            mem.end_time,
-            mem.end_time_inferred,
-            mem.timezone,
-            mem.event_type,
-            mem.event_name,
-            mem.calendar_event_id,
-            mem.calendar_checked_at,
-            mem.calendar_published_at,
-            mem.hidden_at,
-            em.subject,
-            em.from_domain,
-            em.internal_date
-        FROM message_event_metadata mem
-        JOIN email_message em ON em.id = mem.message_id
-        WHERE {where_sql}
-        ORDER BY mem.event_date ASC, mem.start_time ASC NULLS LAST, em.internal_date ASC
-        LIMIT :limit
-        """
-    )
-
-    with engine.begin() as conn:
-        rows = conn.execute(q, {"limit": limit}).mappings().all()
+    with engine.connect().execution_options(**_READ_OPTS) as conn:
+        rows = (
+            conn.execute(
+                _Q_FUTURE_EVENTS, {"limit": limit, "include_hidden": bool(include_hidden)}
+            )
+            .mappings()
+            .all()
+        )
 
     return [dict(r) for r in rows]
 
@@ -500,6 +569,68 @@ def set_calendar_status(
         )
 
 
+def list_future_events_needing_calendar_check(
+    *,
+    engine: Any,
+    message_ids: list[int],
+    ttl: timedelta = timedelta(hours=24),
+) -> tuple[list[dict[str, Any]], date | None, date | None]:
+    """Select the events whose cached calendar status is missing or stale.
+
+    Args:
+        engine: SQLAlchemy engine.
+        message_ids: Candidate rows (typically the events just listed for the UI).
+        ttl: Maximum age of `calendar_checked_at` before a row needs re-checking.
+
+    Returns:
+        (rows, min_event_date, max_event_date). Rows carry message_id and calendar_ical_uid;
+        the dates span only the returned rows and are None when nothing needs checking.
+    """
+
+    if not message_ids:
+        return [], None, None
+
+    with engine.connect().execution_options(**_READ_OPTS) as conn:
+        rows, min_date, max_date = conn.execute(
+            _Q_FUTURE_EVENTS_NEEDING_CHECK, {"ids": [int(m) for m in message_ids], "ttl": ttl}
+        ).one()
+
+    return list(rows or []), min_date, max_date
+
+
+def set_calendar_status_bulk(
+    *,
+    engine: Any,
+    rows: list[dict[str, Any]],
+    checked_at_utc: datetime,
+) -> int:
+    """Update cached calendar status for many message_event_metadata rows in one statement.
+
+    Args:
+        engine: SQLAlchemy engine.
+        rows: Dicts with message_id, calendar_ical_uid and calendar_event_id (may be None).
+        checked_at_utc: Check timestamp applied to every row.
+
+    Returns:
+        Number of rows updated.
+    """
+
+    if not rows:
+        return 0
+
+    params = {
+        "mids": [int(r["message_id"]) for r in rows],
+        "uids": [r.get("calendar_ical_uid") for r in rows],
+        "eids": [r.get("calendar_event_id") for r in rows],
+        "checked_at": checked_at_utc,
+    }
+
+    with engine.begin() as conn:
+        result = conn.execute(_Q_SET_CALENDAR_STATUS_BULK, params)
+
+    return int(result.rowcount or 0)
+
+
 def get_event_row_for_message(
     *,
     engine: Any,
@@ -532,6 +663,6 @@ def get_event_row_for_message(
         """
     )
 
-    with engine.begin() as conn:
+    with engine.connect().execution_options(**_READ_OPTS) as conn:
         row = conn.execute(q, {"mid": int(message_id)}).mappings().first()
     return dict(row) if row else None
@@ -73,6 +73,7 @@ def list_unprocessed_messages_in_category_any_subcategory(
     category: str,
     limit: int | None = 500,
     include_trash: bool = False,
+    include_prefiltered: bool = False,
 ) -> list[dict[str, Any]]:
     """List category-scoped messages missing payment metadata.
 
@@ -81,6 +82,8 @@ def list_unprocessed_messages_in_category_any_subcategory(
         category: Tier-1 category.
         limit: Max rows (None for no limit).
         include_trash: If False, exclude messages with the TRASH label.
+        include_prefiltered: Also return messages whose metadata row has status "prefiltered"
+            (skipped by the relevance pre-filter), so they can be re-extracted.
 
     Returns:
         Rows with message_id, gmail_message_id, subject, from_domain, internal_date.
@@ -91,7 +94,11 @@ def list_unprocessed_messages_in_category_any_subcategory(
     where = [
         "em.category = :category",
         "em.gmail_message_id NOT LIKE 'fake-%'",
-        "mem.message_id IS NULL",
+        (
+            "(mem.message_id IS NULL OR mem.status = 'prefiltered')"
+            if include_prefiltered
+            else "mem.message_id IS NULL"
+        ),
     ]
     if not include_trash:
         where.append("NOT ('TRASH' = ANY(COALESCE(em.label_ids, ARRAY[]::text[])))")
@@ -181,15 +188,23 @@ def list_unprocessed_messages_received_since(
     received_since: datetime,
     limit: int | None = 5000,
     include_trash: bool = False,
+    include_prefiltered: bool = False,
 ) -> list[dict[str, Any]]:
-    """List messages missing payment metadata since a given timestamp."""
+    """List messages missing payment metadata since a given timestamp.
+
+    With `include_prefiltered`, rows stored as "prefiltered" count as missing (re-extraction).
+    """
 
     from sqlalchemy import text
 
     where = [
         "em.internal_date >= :received_since",
         "em.gmail_message_id NOT LIKE 'fake-%'",
-        "mem.message_id IS NULL",
+        (
+            "(mem.message_id IS NULL OR mem.status = 'prefiltered')"
+            if include_prefiltered
+            else "mem.message_id IS NULL"
+        ),
     ]
     if not include_trash:
         where.append("NOT ('TRASH' = ANY(COALESCE(em.label_ids, ARRAY[]::text[])))")
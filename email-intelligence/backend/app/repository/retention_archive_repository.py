@@ -16,7 +16,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ArchiveOutboxRow:
     id: int
     message_id: int
@@ -31,7 +31,8 @@ def plan_archive_outbox(*, engine, default_days: int) -> int:
         default_days: Tier-0 default retention in days.
 
     Returns:
-        Number of outbox rows inserted or reset.
+        Number of outbox rows inserted or reset. Rows that are still pending are left
+        untouched (and not counted), so re-planning does not rewrite them.
     """
 
     from sqlalchemy import text
@@ -48,8 +49,8 @@ def plan_archive_outbox(*, engine, default_days: int) -> int:
             LEFT JOIN taxonomy_label p ON p.id = tl.parent_id
             WHERE em.archived_at IS NULL
               AND em.gmail_message_id IS NOT NULL
-                            AND em.internal_date <= (
-                NOW() - (COALESCE(tl.retention_days, p.retention_days, :default_days)::text || ' days')::interval
+              AND em.internal_date <= NOW() - make_interval(
+                  days => COALESCE(tl.retention_days, p.retention_days, CAST(:default_days AS int))
               )
         )
         INSERT INTO archive_push_outbox (message_id, reason)
@@ -60,6 +61,7 @@ def plan_archive_outbox(*, engine, default_days: int) -> int:
             created_at = NOW(),
             processed_at = NULL,
             error = NULL
+        WHERE archive_push_outbox.processed_at IS NOT NULL
         RETURNING message_id
         """
     )
@@ -414,3 +414,55 @@ class TaxonomyAdminRepository:
                     "sync_error": str(sync_error) if sync_error is not None else None,
                 },
             )
+
+    def bulk_set_gmail_sync_fields(
+        self, *, items: list[tuple[int, str | None, str | None, str | None]]
+    ) -> int:
+        """Bulk update Gmail mapping and last sync metadata for multiple taxonomy labels.
+
+        Args:
+            items: List of (taxonomy_label_id, gmail_label_id, sync_status, sync_error). Each
+                label id should appear at most once.
+
+        Returns:
+            Number of labels updated.
+        """
+
+        if not items:
+            return 0
+
+        from sqlalchemy import text
+
+        q = text(
+            """
+            WITH data AS (
+                SELECT *
+                FROM UNNEST(
+                    CAST(:ids AS int[]),
+                    CAST(:gmail_label_ids AS text[]),
+                    CAST(:statuses AS text[]),
+                    CAST(:errors AS text[])
+                ) AS t(id, gmail_label_id, sync_status, sync_error)
+            )
+            UPDATE taxonomy_label tl
+            SET
+                gmail_label_id = data.gmail_label_id,
+                last_sync_at = NOW(),
+                sync_status = data.sync_status,
+                sync_error = data.sync_error
+            FROM data
+            WHERE tl.id = data.id
+            RETURNING tl.id
+            """
+        )
+
+        params = {
+            "ids": [int(i[0]) for i in items],
+            "gmail_label_ids": [str(i[1]) if i[1] is not None else None for i in items],
+            "statuses": [str(i[2]) if i[2] is not None else None for i in items],
+            "errors": [str(i[3]) if i[3] is not None else None for i in items],
+        }
+        with self._engine.begin() as conn:
+            rows = conn.execute(q, params).fetchall()
+
+        return int(len(rows))
@@ -6,6 +6,7 @@ across runs.
 
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
 
 from pydantic import BaseModel, field_validator
@@ -75,10 +76,25 @@ class Settings(BaseSettings):
     maintenance_label_threshold: int = 200
     maintenance_fallback_days: int = 30
 
+    # Job runner: finished jobs kept in memory for /api/jobs/recent and status lookups.
+    job_history_limit: int = 32
+
     # Optional local LLM (Ollama)
     ollama_host: str | None = None
     ollama_model: str = "llama3.1:8b"
 
+    # Extraction LLM backend: "ollama" (default, uses ollama_host) or "vllm"
+    # (any OpenAI-compatible /v1/completions server; batches are sent as prompt arrays).
+    llm_backend: str = "ollama"  # ollama|vllm
+    vllm_host: str | None = None
+    vllm_model: str | None = None  # defaults to ollama_model when unset
+    llm_max_tokens: int = 512
+    # Emails per extraction batch: bodies are fetched and their LLM calls dispatched together.
+    extraction_batch_size: int = 16
+    # Skip the LLM for emails with no event/payment indicators (stored with status "prefiltered").
+    # Turning it off also makes maintenance re-extract previously prefiltered emails.
+    extraction_prefilter: bool = True
+
     # Embeddings
     # Default to a small embedding model that matches our historical VECTOR_SIZE=384.
     # Ensure it's available locally: `ollama pull all-minilm`.
@@ -90,6 +106,13 @@ class Settings(BaseSettings):
     allow_deterministic_vectors: bool = False
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Process-wide Settings, parsed once (env and .env are fixed at process start)."""
+
+    return Settings()
+
+
 class StatusResponse(BaseModel):
     current_phase: str | None
     total_email_count: int
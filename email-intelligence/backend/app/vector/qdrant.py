@@ -11,21 +11,16 @@ from functools import lru_cache
 from qdrant_client import QdrantClient
 from qdrant_client.models import Distance, FieldCondition, Filter, MatchValue, PointStruct, VectorParams
 
-from app.settings import Settings
+from app.settings import get_settings
 from app.vector.embedding import build_embedding_text
 from app.vector.vectorizer import VECTOR_SIZE, vector_version_tag
 
 COLLECTION_NAME = "email_subjects"
 
 
-@lru_cache
-def _settings() -> Settings:
-    return Settings()
-
-
 @lru_cache
 def _client() -> QdrantClient:
-    s = _settings()
+    s = get_settings()
     return QdrantClient(host=s.qdrant_host, port=s.qdrant_port)
 
 
@@ -16,20 +16,13 @@ import random
 import json
 import urllib.error
 import urllib.request
-from functools import lru_cache
 
 
-from app.settings import Settings
+from app.settings import get_settings
 
 VECTOR_SIZE = 384
 
 
-
-@lru_cache
-def _settings() -> Settings:
-    return Settings()
-
-
 def _normalize(vec: list[float]) -> list[float]:
     norm = math.sqrt(sum(v * v for v in vec))
     if norm == 0.0:
@@ -109,7 +102,7 @@ def vectorize_text(text: str, size: int = VECTOR_SIZE) -> list[float]:
     Fallback (opt-in): deterministic pseudo-random vectors.
     """
 
-    s = _settings()
+    s = get_settings()
     if s.ollama_host:
         vec = _ollama_embeddings(
             s.ollama_host,
@@ -142,7 +135,7 @@ def vector_version_tag() -> str:
     semantically meaningful vectors once backfilled.
     """
 
-    s = _settings()
+    s = get_settings()
     if s.ollama_host:
         return f"ollama:{s.embedding_model}"
     return "deterministic"
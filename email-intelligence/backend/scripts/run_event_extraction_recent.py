@@ -163,7 +163,9 @@ def main() -> int:
                 body=body,
             )
 
-            if extracted.event_name or extracted.event_date or extracted.start_time:
+            if extracted.prefiltered:
+                status = "prefiltered"
+            elif extracted.event_name or extracted.event_date or extracted.start_time:
                 status = "succeeded"
             else:
                 status = "no_event"
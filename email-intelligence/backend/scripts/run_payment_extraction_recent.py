@@ -155,7 +155,9 @@ def main() -> int:
                 body=body,
             )
 
-            if extracted.cost_amount or extracted.vendor_name or extracted.item_name:
+            if extracted.prefiltered:
+                status = "prefiltered"
+            elif extracted.cost_amount or extracted.vendor_name or extracted.item_name:
                 status = "succeeded"
             else:
                 status = "no_payment"
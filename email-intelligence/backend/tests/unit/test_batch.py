@@ -0,0 +1,85 @@
+"""Unit tests for length-binned concurrent dispatch."""
+
+import threading
+import time
+
+from app.analysis.batch import _bin_index, run_binned
+
+
+class TestBinIndex:
+    """Test suite for _bin_index."""
+
+    def test_bins_are_inclusive_upper_bounds(self) -> None:
+        """Test that sizes land in the first bin whose bound they don't exceed."""
+        bins = (10, 100)
+
+        assert [_bin_index(n, bins) for n in (0, 10, 11, 100, 101)] == [0, 0, 1, 1, 2]
+
+
+class TestRunBinned:
+    """Test suite for run_binned."""
+
+    def test_empty_input(self) -> None:
+        """Test that no items means no work and an empty result."""
+        assert run_binned([], lambda x: x, size_of=len) == []
+
+    def test_results_keep_input_order(self) -> None:
+        """Test that results line up with inputs even though bins run out of order."""
+        items = ["x" * n for n in (5_000, 1, 3_000, 10, 9_000, 2)]
+
+        out = run_binned(items, len, size_of=len, max_workers=3)
+
+        assert out == [5_000, 1, 3_000, 10, 9_000, 2]
+
+    def test_bins_are_drained_one_at_a_time(self) -> None:
+        """Test that no item of a larger bin starts before the smaller bin has finished."""
+        lock = threading.Lock()
+        events: list[tuple[str, int]] = []
+
+        def work(size: int) -> int:
+            with lock:
+                events.append(("start", size))
+            time.sleep(0.01)
+            with lock:
+                events.append(("end", size))
+            return size
+
+        items = [50, 5, 500, 6, 60, 7]
+        run_binned(items, work, size_of=lambda n: n, max_workers=4, bins=(10, 100))
+
+        def bin_of(size: int) -> int:
+            return _bin_index(size, (10, 100))
+
+        for i, (kind, size) in enumerate(events):
+            if kind != "start":
+                continue
+            earlier_bins_pending = [
+                s for k, s in events[i:] if k == "end" and bin_of(s) < bin_of(size)
+            ]
+            assert not earlier_bins_pending, (size, events)
+
+    def test_failures_are_isolated_per_item(self) -> None:
+        """Test that a raising item returns its exception while others succeed."""
+
+        def work(n: int) -> int:
+            if n == 2:
+                raise ValueError("boom")
+            return n * 10
+
+        out = run_binned([1, 2, 3], work, size_of=lambda n: 0)
+
+        assert out[0] == 10 and out[2] == 30
+        assert isinstance(out[1], ValueError)
+
+    def test_worker_threads_are_reused_across_calls(self) -> None:
+        """Test that the pool outlives a call, so per-thread connections are kept."""
+        seen: set[str] = set()
+
+        def work(n: int) -> int:
+            seen.add(threading.current_thread().name)
+            return n
+
+        for _ in range(5):
+            run_binned(list(range(8)), work, size_of=lambda n: 0, max_workers=2)
+
+        assert len(seen) <= 2
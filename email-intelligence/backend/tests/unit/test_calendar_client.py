@@ -0,0 +1,147 @@
+"""Unit tests for the batched Calendar event listing."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.google import calendar_client
+from app.google.calendar_client import list_event_ids_by_ical_uid
+
+
+class _FakeRequest:
+    def __init__(self, kwargs: dict) -> None:
+        self.kwargs = kwargs
+
+
+class _FakeBatch:
+    def __init__(self, service: "_FakeService", callback) -> None:
+        self.service = service
+        self.callback = callback
+        self.calls: list[tuple[str, _FakeRequest]] = []
+
+    def add(self, request: _FakeRequest, request_id: str) -> None:
+        self.calls.append((request_id, request))
+
+    def execute(self) -> None:
+        self.service.batches.append([req.kwargs for _, req in self.calls])
+        for request_id, req in self.calls:
+            key = (req.kwargs["timeMin"], req.kwargs["pageToken"])
+            result = self.service.pages.get(key, {"items": []})
+            if isinstance(result, Exception):
+                self.callback(request_id, None, result)
+            else:
+                self.callback(request_id, result, None)
+
+
+class _FakeService:
+    """Serves canned events.list pages keyed by (timeMin, pageToken)."""
+
+    def __init__(self, pages: dict) -> None:
+        self.pages = pages
+        self.batches: list[list[dict]] = []
+
+    def events(self) -> "_FakeService":
+        return self
+
+    def list(self, **kwargs) -> _FakeRequest:
+        return _FakeRequest(kwargs)
+
+    def new_batch_http_request(self, callback) -> _FakeBatch:
+        return _FakeBatch(self, callback)
+
+
+JAN = datetime(2024, 1, 1, tzinfo=timezone.utc)
+FEB = datetime(2024, 2, 1, tzinfo=timezone.utc)
+MAR = datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+
+def _event(uid: str, eid: str) -> dict:
+    return {"iCalUID": uid, "id": eid}
+
+
+class TestListEventIdsByIcalUid:
+    """Test suite for list_event_ids_by_ical_uid."""
+
+    def test_windows_share_one_batch(self) -> None:
+        """Test that each window is listed in a single batch round-trip."""
+        service = _FakeService(
+            {
+                ("2024-01-01T00:00:00Z", None): {"items": [_event("u1", "e1")]},
+                ("2024-01-31T00:00:00Z", None): {"items": [_event("u2", "e2")]},
+            }
+        )
+
+        out = list_event_ids_by_ical_uid(
+            service, calendar_id="primary", time_min=JAN, time_max=MAR, window_days=30
+        )
+
+        assert out == {"u1": "e1", "u2": "e2"}
+        assert len(service.batches) == 1
+        assert [(c["timeMin"], c["timeMax"]) for c in service.batches[0]] == [
+            ("2024-01-01T00:00:00Z", "2024-01-31T00:00:00Z"),
+            ("2024-01-31T00:00:00Z", "2024-03-01T00:00:00Z"),
+        ]
+
+    def test_follows_page_tokens_per_window(self) -> None:
+        """Test that only windows with a nextPageToken are listed again in the next round."""
+        service = _FakeService(
+            {
+                ("2024-01-01T00:00:00Z", None): {
+                    "items": [_event("u1", "e1")],
+                    "nextPageToken": "p2",
+                },
+                ("2024-01-01T00:00:00Z", "p2"): {"items": [_event("u3", "e3")]},
+                ("2024-02-01T00:00:00Z", None): {"items": [_event("u2", "e2")]},
+            }
+        )
+
+        out = list_event_ids_by_ical_uid(
+            service, calendar_id="primary", time_min=JAN, time_max=MAR, window_days=31
+        )
+
+        assert out == {"u1": "e1", "u2": "e2", "u3": "e3"}
+        assert [[c["pageToken"] for c in batch] for batch in service.batches] == [
+            [None, None],
+            ["p2"],
+        ]
+
+    def test_skips_events_missing_uid_or_id(self) -> None:
+        """Test that events without an iCalUID or id are ignored."""
+        service = _FakeService(
+            {
+                ("2024-01-01T00:00:00Z", None): {
+                    "items": [_event(" ", "e1"), _event("u2", ""), {"id": "e3"}, _event("u4", "e4")]
+                },
+            }
+        )
+
+        out = list_event_ids_by_ical_uid(service, calendar_id="primary", time_min=JAN, time_max=FEB)
+
+        assert out == {"u4": "e4"}
+
+    def test_splits_batches_at_the_call_limit(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that more windows than the batch limit are spread over several batches."""
+        monkeypatch.setattr(calendar_client, "_BATCH_MAX_CALLS", 2)
+        service = _FakeService({})
+
+        list_event_ids_by_ical_uid(
+            service, calendar_id="primary", time_min=JAN, time_max=MAR, window_days=12
+        )
+
+        assert [len(batch) for batch in service.batches] == [2, 2, 1]
+
+    def test_raises_first_failed_page(self) -> None:
+        """Test that a failed page surfaces as an exception instead of a partial map."""
+        service = _FakeService({("2024-01-01T00:00:00Z", None): RuntimeError("boom")})
+
+        with pytest.raises(RuntimeError, match="boom"):
+            list_event_ids_by_ical_uid(service, calendar_id="primary", time_min=JAN, time_max=FEB)
+
+    def test_empty_range_makes_no_calls(self) -> None:
+        """Test that an empty time range returns immediately."""
+        service = _FakeService({})
+
+        assert list_event_ids_by_ical_uid(
+            service, calendar_id="primary", time_min=FEB, time_max=FEB
+        ) == {}
+        assert service.batches == []
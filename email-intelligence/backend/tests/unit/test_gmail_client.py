@@ -0,0 +1,188 @@
+"""Unit tests for batched Gmail label changes and their retry handling."""
+
+import json
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from app.gmail import client
+from app.gmail.client import is_invalid_id_error, modify_message_labels_batch
+
+
+def _http_error(status: int, *reasons: str) -> HttpError:
+    body = {"error": {"code": status, "errors": [{"reason": r} for r in reasons]}}
+    return HttpError(httplib2.Response({"status": status}), json.dumps(body).encode())
+
+
+class _FakeRequest:
+    def __init__(self, service: "_FakeService", message_id: str, body: dict) -> None:
+        self.service = service
+        self.message_id = message_id
+        self.body = body
+
+    def execute(self, num_retries: int = 0) -> dict:
+        self.service.direct_calls.append(self.message_id)
+        return self.service.respond(self.message_id)
+
+
+class _FakeBatch:
+    def __init__(self, service: "_FakeService", callback) -> None:
+        self.service = service
+        self.callback = callback
+        self.requests: list[tuple[str, _FakeRequest]] = []
+
+    def add(self, request: _FakeRequest, request_id: str) -> None:
+        self.requests.append((request_id, request))
+
+    def execute(self) -> None:
+        if self.service.batch_error is not None:
+            raise self.service.batch_error
+        self.service.batched.append([req.message_id for _, req in self.requests])
+        for request_id, req in self.requests:
+            try:
+                response, exc = self.service.respond(req.message_id), None
+            except Exception as e:  # noqa: BLE001
+                response, exc = None, e
+            self.callback(request_id, response, exc)
+
+
+class _FakeService:
+    """Answers messages.modify from per-message queues of outcomes (None = success)."""
+
+    def __init__(self, outcomes: dict[str, list[Exception | None]] | None = None) -> None:
+        self.outcomes = {k: list(v) for k, v in (outcomes or {}).items()}
+        self.batch_error: Exception | None = None
+        self.batched: list[list[str]] = []
+        self.direct_calls: list[str] = []
+        self.bodies: dict[str, dict] = {}
+
+    def users(self) -> "_FakeService":
+        return self
+
+    def messages(self) -> "_FakeService":
+        return self
+
+    def modify(self, *, userId: str, id: str, body: dict) -> _FakeRequest:
+        self.bodies[id] = body
+        return _FakeRequest(self, id, body)
+
+    def new_batch_http_request(self, callback) -> _FakeBatch:
+        return _FakeBatch(self, callback)
+
+    def respond(self, message_id: str) -> dict:
+        queue = self.outcomes.get(message_id)
+        exc = queue.pop(0) if queue else None
+        if exc is not None:
+            raise exc
+        return {"id": message_id}
+
+
+class TestModifyMessageLabelsBatch:
+    """Test suite for modify_message_labels_batch."""
+
+    def test_all_succeed_in_one_batch(self) -> None:
+        """Test that successful changes map to None and need no extra calls."""
+        service = _FakeService()
+
+        results = modify_message_labels_batch(
+            service, changes=[("r1", "m1", ["A"], None), ("r2", "m2", None, ["B"])]
+        )
+
+        assert results == {"r1": None, "r2": None}
+        assert service.batched == [["m1", "m2"]]
+        assert service.direct_calls == []
+        assert service.bodies == {"m1": {"addLabelIds": ["A"]}, "m2": {"removeLabelIds": ["B"]}}
+
+    @pytest.mark.parametrize(
+        "error",
+        [
+            _http_error(429),
+            _http_error(503),
+            _http_error(403, "userRateLimitExceeded"),
+            _http_error(403, "rateLimitExceeded"),
+        ],
+    )
+    def test_retryable_failures_are_rerun_individually(self, error: HttpError) -> None:
+        """Test that rate-limit and server errors are retried once outside the batch."""
+        service = _FakeService({"m2": [error]})
+
+        results = modify_message_labels_batch(
+            service, changes=[("r1", "m1", ["A"], None), ("r2", "m2", ["A"], None)]
+        )
+
+        assert results == {"r1": None, "r2": None}
+        assert service.direct_calls == ["m2"]
+
+    @pytest.mark.parametrize(
+        "error",
+        [
+            _http_error(400),
+            _http_error(404),
+            _http_error(403, "insufficientPermissions"),
+            _http_error(403),
+            RuntimeError("not an HttpError"),
+        ],
+    )
+    def test_permanent_failures_are_reported(self, error: Exception) -> None:
+        """Test that bad ids, permission errors and unknown failures are not retried."""
+        service = _FakeService({"m1": [error]})
+
+        results = modify_message_labels_batch(service, changes=[("r1", "m1", ["A"], None)])
+
+        assert results == {"r1": error}
+        assert service.direct_calls == []
+
+    def test_failed_retry_reports_the_retry_error(self) -> None:
+        """Test that a retry that fails again reports its own exception."""
+        first, second = _http_error(429), _http_error(400)
+        service = _FakeService({"m1": [first, second]})
+
+        results = modify_message_labels_batch(service, changes=[("r1", "m1", ["A"], None)])
+
+        assert results == {"r1": second}
+
+    def test_batch_level_failure_fails_every_change(self) -> None:
+        """Test that a failed batch round-trip is reported for each request id."""
+        service = _FakeService()
+        service.batch_error = _http_error(500)
+
+        results = modify_message_labels_batch(
+            service, changes=[("r1", "m1", ["A"], None), ("r2", "m2", ["A"], None)]
+        )
+
+        assert results == {"r1": service.batch_error, "r2": service.batch_error}
+        assert service.direct_calls == []
+
+    def test_rejects_oversized_batches(self) -> None:
+        """Test that more than HTTP_BATCH_MAX_CALLS changes raise ValueError."""
+        changes = [(str(i), f"m{i}", ["A"], None) for i in range(client.HTTP_BATCH_MAX_CALLS + 1)]
+
+        with pytest.raises(ValueError):
+            modify_message_labels_batch(_FakeService(), changes=changes)
+
+    def test_empty_changes_make_no_calls(self) -> None:
+        """Test that no changes return an empty mapping without a batch."""
+        service = _FakeService()
+
+        assert modify_message_labels_batch(service, changes=[]) == {}
+        assert service.batched == []
+
+
+class TestIsInvalidIdError:
+    """Test suite for is_invalid_id_error."""
+
+    @pytest.mark.parametrize(
+        ("error", "expected"),
+        [
+            (_http_error(400), True),
+            (_http_error(404), True),
+            (_http_error(429), False),
+            (_http_error(500), False),
+            (RuntimeError("boom"), False),
+            (None, False),
+        ],
+    )
+    def test_only_bad_input_statuses(self, error: Exception | None, expected: bool) -> None:
+        """Test that only 400/404 HttpErrors count as bad-id failures."""
+        assert is_invalid_id_error(error) is expected
@@ -0,0 +1,221 @@
+"""Unit tests for the in-memory job runner helpers."""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+try:
+    from app.api import jobs
+except Exception as exc:  # noqa: BLE001 - app.db.postgres connects on import
+    pytest.skip(f"app.api.jobs needs a reachable Postgres: {exc}", allow_module_level=True)
+
+
+@pytest.fixture
+def registry(monkeypatch: pytest.MonkeyPatch) -> OrderedDict:
+    """Give each test an empty job registry."""
+    monkeypatch.setattr(jobs, "_jobs", OrderedDict())
+    monkeypatch.setattr(jobs, "_running", set())
+    monkeypatch.setattr(jobs, "_futures", {})
+    monkeypatch.setattr(jobs, "_idempotency_keys", OrderedDict())
+    return jobs._jobs
+
+
+def _new_job(job_id: str, *, type: str = "test", state: str = "queued") -> "jobs._Job":
+    return jobs._Job(
+        job_id=job_id,
+        type=type,
+        state=state,
+        phase=None,
+        started_at=jobs._now(),
+        progress_total=None,
+        progress_processed=0,
+        message=None,
+        error_samples=(),
+        eta_hint=None,
+    )
+
+
+class TestFormatEta:
+    """Test suite for ETA hint bucketing."""
+
+    @pytest.mark.parametrize("seconds", [None, -1.0])
+    def test_missing_or_negative(self, seconds) -> None:
+        """Test that unknown or negative ETAs produce no hint."""
+        assert jobs._format_eta(seconds) is None
+
+    @pytest.mark.parametrize(
+        ("seconds", "expected"),
+        [
+            (0.0, "~5s"),
+            (0.4, "~5s"),
+            (5.0, "~5s"),
+            (6.0, "~10s"),
+            (54.9, "~55s"),
+            (59.0, "~1m"),
+            (61.0, "~1m"),
+            (119.0, "~1m"),
+            (3_599.0, "~59m"),
+            (3_700.0, "~1h 1m"),
+        ],
+    )
+    def test_buckets(self, seconds: float, expected: str) -> None:
+        """Test 5s steps (rounded up, never ~0s) under a minute and whole minutes above."""
+        assert jobs._format_eta(seconds) == expected
+
+
+class TestCountQuerySlices:
+    """Test suite for the yearly internal-date slices used by exact counts."""
+
+    @pytest.fixture(autouse=True)
+    def _fixed_now(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(jobs, "_now", lambda: datetime(2007, 6, 1, tzinfo=timezone.utc))
+
+    def test_slices_tile_the_timeline(self) -> None:
+        """Test an open-ended first and last slice around one slice per year."""
+        assert jobs._count_query_slices(None) == [
+            "before:2005/01/01",
+            "after:2005/01/01 before:2006/01/01",
+            "after:2006/01/01 before:2007/01/01",
+            "after:2007/01/01",
+        ]
+
+    def test_query_is_parenthesized_in_every_slice(self) -> None:
+        """Test that the caller's query is scoped so OR terms can't escape the date bounds."""
+        slices = jobs._count_query_slices("label:a OR label:b")
+
+        assert len(slices) == 4
+        assert all(s.startswith("(label:a OR label:b) ") for s in slices)
+
+
+class TestJobRegistry:
+    """Test suite for _register_job, _set_job and finished-job eviction."""
+
+    def test_set_job_swaps_in_a_new_snapshot(self, registry: OrderedDict) -> None:
+        """Test that updates replace the snapshot and leave earlier ones untouched."""
+        jobs._register_job(_new_job("a"))
+        before = jobs._get_job("a")
+
+        jobs._set_job("a", state="running", processed=5, total=10, message="halfway")
+        after = jobs._get_job("a")
+
+        assert before.state == "queued" and before.progress_processed == 0
+        assert (after.state, after.progress_processed, after.progress_total) == ("running", 5, 10)
+        assert after.message == "halfway"
+
+    def test_omitted_fields_are_kept(self, registry: OrderedDict) -> None:
+        """Test that None arguments don't clear earlier values."""
+        jobs._register_job(_new_job("a"))
+        jobs._set_job("a", message="hello", total=3)
+
+        jobs._set_job("a", processed=1)
+
+        job = jobs._get_job("a")
+        assert (job.message, job.progress_total, job.progress_processed) == ("hello", 3, 1)
+
+    def test_running_set_tracks_state(self, registry: OrderedDict) -> None:
+        """Test that the running set follows the job state."""
+        jobs._register_job(_new_job("a"))
+
+        jobs._set_job("a", state="running")
+        assert jobs._running == {"a"}
+
+        jobs._set_job("a", state="succeeded")
+        assert jobs._running == set()
+
+    def test_finished_jobs_move_to_the_end(self, registry: OrderedDict) -> None:
+        """Test that the registry keeps finished jobs in completion order."""
+        for jid in ("a", "b", "c"):
+            jobs._register_job(_new_job(jid))
+
+        jobs._set_job("a", state="failed")
+
+        assert list(registry) == ["b", "c", "a"]
+
+    def test_eviction_drops_oldest_finished_only(self, registry: OrderedDict) -> None:
+        """Test that eviction keeps the newest finished jobs and every active job."""
+        for jid in ("active", "f1", "f2", "f3"):
+            jobs._register_job(_new_job(jid))
+        for jid in ("f1", "f2", "f3"):
+            jobs._set_job(jid, state="succeeded")
+
+        jobs._evict_finished_jobs(limit=2)
+
+        assert list(registry) == ["active", "f2", "f3"]
+
+    def test_exclusive_returns_the_active_job(self, registry: OrderedDict) -> None:
+        """Test that an exclusive start reuses a queued/running job of the same type."""
+        jobs._register_job(_new_job("first", type="ingest"))
+
+        assert jobs._register_job(_new_job("second", type="ingest"), exclusive=True) == "first"
+        assert jobs._register_job(_new_job("other", type="label"), exclusive=True) == "other"
+        assert "second" not in registry
+
+    def test_idempotency_key_returns_the_original_job(self, registry: OrderedDict) -> None:
+        """Test that retried starts with the same key don't register a second job."""
+        assert jobs._register_job(_new_job("a"), idempotency_key="k") == "a"
+
+        assert jobs._register_job(_new_job("b"), idempotency_key="k") == "a"
+        assert list(registry) == ["a"]
+
+
+def _wait_for_state(job_id: str, state: str, *, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while jobs._get_job(job_id).state != state:
+        assert time.monotonic() < deadline, f"{job_id} never reached {state}"
+        time.sleep(0.01)
+
+
+class TestCancelJob:
+    """Test suite for cancel_job state transitions."""
+
+    def test_unknown_job_is_404(self, registry: OrderedDict) -> None:
+        """Test that cancelling an unknown job id returns 404."""
+        with pytest.raises(HTTPException) as exc_info:
+            jobs.cancel_job("missing")
+
+        assert exc_info.value.status_code == 404
+
+    def test_queued_job_is_cancelled_and_running_job_is_409(self, registry: OrderedDict) -> None:
+        """Test that a job queued behind another is cancelled while the running one can't be."""
+        release = threading.Event()
+        jobs._register_job(_new_job("first", type="cancel-test"))
+        jobs._register_job(_new_job("second", type="cancel-test"))
+        jobs._run_in_thread("first", release.wait)
+        jobs._run_in_thread("second", lambda: None)
+        try:
+            _wait_for_state("first", "running")
+
+            resp = jobs.cancel_job("second")
+            assert resp.state == "cancelled"
+            assert resp.message == "Cancelled before it started"
+            assert "second" not in jobs._futures
+
+            with pytest.raises(HTTPException) as exc_info:
+                jobs.cancel_job("first")
+            assert exc_info.value.status_code == 409
+        finally:
+            release.set()
+
+        _wait_for_state("first", "succeeded")
+
+    def test_finished_job_returns_its_status(self, registry: OrderedDict) -> None:
+        """Test that cancelling a finished job is a no-op that reports its final state."""
+        jobs._register_job(_new_job("done"))
+        jobs._set_job("done", state="failed", message="boom")
+
+        resp = jobs.cancel_job("done")
+
+        assert (resp.state, resp.message) == ("failed", "boom")
+
+    def test_unstarted_job_without_future_is_409(self, registry: OrderedDict) -> None:
+        """Test that a queued job that was never submitted can't be cancelled."""
+        jobs._register_job(_new_job("orphan"))
+
+        with pytest.raises(HTTPException) as exc_info:
+            jobs.cancel_job("orphan")
+
+        assert exc_info.value.status_code == 409
@@ -0,0 +1,59 @@
+"""Unit tests for LLM response parsing helpers."""
+
+import pytest
+
+from app.analysis.common.llm_io import extract_json_object, find_json_object
+
+
+class TestFindJsonObject:
+    """Test suite for the bracket-balanced JSON scanner."""
+
+    def test_returns_none_without_brace(self) -> None:
+        """Test that text without an opening brace yields None."""
+        assert find_json_object("no json here") is None
+
+    def test_stops_at_end_of_first_object(self) -> None:
+        """Test that only the first balanced object is returned, not up to the last brace."""
+        raw = 'Sure! {"a": 1} and later {"b": 2}'
+
+        assert find_json_object(raw) == '{"a": 1}'
+
+    def test_nested_objects(self) -> None:
+        """Test that nested braces are balanced."""
+        raw = 'x {"a": {"b": {"c": 1}}, "d": 2} y'
+
+        assert find_json_object(raw) == '{"a": {"b": {"c": 1}}, "d": 2}'
+
+    def test_braces_inside_strings_are_ignored(self) -> None:
+        """Test that braces and escaped quotes inside strings don't affect depth."""
+        raw = '{"text": "a } b { \\" }", "n": 1} trailing }'
+
+        assert find_json_object(raw) == '{"text": "a } b { \\" }", "n": 1}'
+
+    def test_unbalanced_returns_none(self) -> None:
+        """Test that an object that never closes yields None."""
+        assert find_json_object('{"a": {"b": 1}') is None
+
+
+class TestExtractJsonObject:
+    """Test suite for extract_json_object."""
+
+    def test_direct_json(self) -> None:
+        """Test the fast path for a response that is exactly one object."""
+        assert extract_json_object(' {"is_event": true} ') == {"is_event": True}
+
+    def test_json_embedded_in_prose(self) -> None:
+        """Test the tolerant path for responses wrapped in prose or code fences."""
+        raw = 'Here you go:\n```json\n{"amount": "12.50", "items": [1, 2]}\n```\nThanks!'
+
+        assert extract_json_object(raw) == {"amount": "12.50", "items": [1, 2]}
+
+    def test_empty_response_raises(self) -> None:
+        """Test that an empty response is rejected."""
+        with pytest.raises(ValueError, match="empty"):
+            extract_json_object("   ")
+
+    def test_missing_object_raises(self) -> None:
+        """Test that a response without an object is rejected."""
+        with pytest.raises(ValueError, match="did not contain"):
+            extract_json_object("[1, 2, 3]")
@@ -0,0 +1,68 @@
+"""Unit tests for payment amount parsing."""
+
+from decimal import Decimal
+
+import pytest
+
+from app.analysis.payments import extractor
+from app.analysis.payments.extractor import _parse_cost, _parse_numeric_amount
+
+
+class TestParseNumericAmount:
+    """Test suite for numeric JSON cost values."""
+
+    def test_int(self) -> None:
+        """Test that integers convert exactly."""
+        assert _parse_numeric_amount(12) == Decimal("12")
+
+    def test_float_uses_shortest_repr(self) -> None:
+        """Test that floats convert via repr, not their binary expansion."""
+        assert _parse_numeric_amount(0.1) == Decimal("0.1")
+        assert _parse_numeric_amount(12.5) == Decimal("12.5")
+
+    @pytest.mark.parametrize("value", [float("nan"), float("inf"), Decimal("NaN")])
+    def test_non_finite_is_none(self, value) -> None:
+        """Test that NaN/infinity are rejected."""
+        assert _parse_numeric_amount(value) is None
+
+
+class TestParseCost:
+    """Test suite for splitting cost_amount into amount and currency."""
+
+    @pytest.mark.parametrize(
+        ("raw", "expected"),
+        [
+            ("£12.50", (Decimal("12.50"), "GBP")),
+            ("€ 9,99", (Decimal("9.99"), "EUR")),
+            ("$1,234.56", (Decimal("1234.56"), "USD")),
+            ("12.00 usd", (Decimal("12.00"), "USD")),
+            ("CHF 40", (Decimal("40"), "CHF")),
+            ("EUR £5", (Decimal("5"), "GBP")),  # a symbol wins over a code
+            ("free", (None, None)),
+            ("", (None, None)),
+        ],
+    )
+    def test_string_values(self, raw: str, expected: tuple) -> None:
+        """Test amounts and currencies inferred from one scan of the text."""
+        assert _parse_cost(raw) == expected
+
+    def test_numeric_values_have_no_currency(self) -> None:
+        """Test that numeric JSON values skip the text scan."""
+        assert _parse_cost(7) == (Decimal("7"), None)
+        assert _parse_cost(2.5) == (Decimal("2.5"), None)
+
+    @pytest.mark.parametrize("value", [None, True, False])
+    def test_missing_values(self, value) -> None:
+        """Test that None and booleans yield no amount or currency."""
+        assert _parse_cost(value) == (None, None)
+
+    def test_re2_lastgroup_path(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that the named-group dispatch behaves the same under google-re2."""
+        re2 = pytest.importorskip("re2")
+        monkeypatch.setattr(
+            extractor, "_COST_TOKEN_RE", re2.compile(extractor._COST_TOKEN_RE.pattern)
+        )
+
+        assert _parse_cost("£12.50") == (Decimal("12.50"), "GBP")
+        assert _parse_cost("12.00 usd") == (Decimal("12.00"), "USD")
+        assert _parse_cost("EUR £5") == (Decimal("5"), "GBP")
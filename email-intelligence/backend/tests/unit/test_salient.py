@@ -0,0 +1,69 @@
+"""Unit tests for salient-span body trimming."""
+
+from app.analysis.common.salient import AMOUNT_HINT_RE, DATE_HINT_RE, trim_to_salient_spans
+
+PATTERNS = [DATE_HINT_RE, AMOUNT_HINT_RE]
+FILLER = "lorem ipsum dolor sit amet " * 10
+
+
+class TestTrimToSalientSpans:
+    """Test suite for trim_to_salient_spans."""
+
+    def test_short_body_is_returned_whole(self) -> None:
+        """Test that bodies within budget are only stripped."""
+        assert trim_to_salient_spans("  hello\n\nworld  ", PATTERNS, budget_chars=100) == (
+            "hello\n\nworld"
+        )
+
+    def test_none_body(self) -> None:
+        """Test that a missing body trims to an empty string."""
+        assert trim_to_salient_spans(None, PATTERNS) == ""
+
+    def test_keeps_best_paragraphs_in_original_order(self) -> None:
+        """Test that higher-scoring paragraphs are chosen and emitted in body order."""
+        body = "\n\n".join(
+            [
+                FILLER,
+                "Paid £12.50",  # amount only
+                FILLER,
+                "Total £30.00 on 2024-05-01",  # amount and date
+                FILLER,
+            ]
+        )
+
+        out = trim_to_salient_spans(body, PATTERNS, budget_chars=60)
+
+        assert out == "Paid £12.50\n\nTotal £30.00 on 2024-05-01"
+
+    def test_budget_prefers_higher_scores(self) -> None:
+        """Test that when both don't fit, the higher-scoring paragraph wins."""
+        body = "\n\n".join([FILLER, "Paid £12.50", FILLER, "Total £30.00 on 2024-05-01"])
+
+        out = trim_to_salient_spans(body, PATTERNS, budget_chars=30)
+
+        assert out == "Total £30.00 on 2024-05-01"
+
+    def test_body_without_blank_lines_is_split_into_lines(self) -> None:
+        """Test that an oversized paragraph is trimmed line by line, not sent whole."""
+        body = "\n".join([FILLER] * 100 + ["Total £12.50 on 2024-05-01"] + [FILLER] * 10)
+
+        out = trim_to_salient_spans(body, PATTERNS, budget_chars=4_000)
+
+        assert out == "Total £12.50 on 2024-05-01"
+
+    def test_single_huge_line_is_cut_to_budget(self) -> None:
+        """Test that a line longer than the budget is cut so its hinted piece can be kept."""
+        body = "a" * 5_000 + " $5.00 " + "b" * 5_000
+
+        out = trim_to_salient_spans(body, PATTERNS, budget_chars=4_000)
+
+        assert len(out) <= 4_000
+        assert "$5.00" in out
+
+    def test_no_hints_falls_back_to_budgeted_head(self) -> None:
+        """Test that unscored bodies are head-truncated to the budget."""
+        body = "\n".join([FILLER] * 300)
+
+        out = trim_to_salient_spans(body, PATTERNS, budget_chars=4_000)
+
+        assert out == body[:4_000]
@@ -15,7 +15,7 @@ export interface DashboardTreeResponse {
   root: DashboardNode;
 }
 
-export type JobState = "queued" | "running" | "succeeded" | "failed";
+export type JobState = "queued" | "running" | "succeeded" | "failed" | "cancelled";
 
 export interface JobProgress {
   total?: number | null;
@@ -40,6 +40,7 @@ export interface JobStatusResponse {
   counters: JobCounters;
   message?: string | null;
   eta_hint?: string | null;
+  poll_after_ms?: number | null;
 }
 
 export interface CurrentJobResponse {
@@ -48,6 +49,7 @@ export interface CurrentJobResponse {
     type: string;
     state: JobState;
   };
+  poll_after_ms?: number | null;
 }
 
 export interface EmailMessageSummary {
@@ -107,6 +109,7 @@ export interface PushResponse {
   succeeded: number;
   failed: number;
   generated_at: string;
+  next_after?: number | null;
 }
 
 export interface RetentionPreviewItem {
@@ -17,6 +17,10 @@ function sleep(ms: number): Promise<void> {
   return new Promise((resolve) => setTimeout(resolve, ms));
 }
 
+function isTerminal(state: JobStatusResponse["state"]): boolean {
+  return state === "succeeded" || state === "failed" || state === "cancelled";
+}
+
 function apiBaseUrl(): string {
   // Mirror api/client.ts behavior for EventSource URLs.
   return (import.meta as any).env?.VITE_API_BASE_URL ?? "";
@@ -41,21 +45,23 @@ export function useJobPolling(): {
 
   const statusPollAbort = useRef<AbortController | null>(null);
 
-  // Always poll current job every 5 seconds.
+  // Always poll current job: every 5s, or slower when the backend suggests backing off.
   useEffect(() => {
     let cancelled = false;
 
     async function loop() {
       while (!cancelled) {
+        let delayMs = 5000;
         try {
           const current = await api.getCurrentJob();
           if (!cancelled) setActiveJob(current.active);
+          delayMs = Math.max(delayMs, current.poll_after_ms ?? delayMs);
         } catch {
           // If backend is down, keep trying; UI will show idle.
           if (!cancelled) setActiveJob(null);
         }
 
-        await sleep(5000);
+        await sleep(delayMs);
       }
     }
 
@@ -98,7 +104,7 @@ export function useJobPolling(): {
       const now = Date.now();
 
       // Always emit terminal states immediately.
-      if (force || status.state === "succeeded" || status.state === "failed") {
+      if (force || isTerminal(status.state)) {
         clearJobStatusFlushTimer();
         emitJobStatus(status);
         return;
@@ -141,15 +147,18 @@ export function useJobPolling(): {
 
       async function loop() {
         while (!cancelled) {
+          let delayMs = 2000;
           try {
             const status = await api.getJobStatus(jobId);
             if (cancelled) return;
+            // Backend backs off on stalled jobs; never poll faster than the 2s baseline.
+            delayMs = Math.max(delayMs, status.poll_after_ms ?? delayMs);
 
-            // Polling is already low-frequency (2s), but we route through the same
+            // Polling is already low-frequency, but we route through the same
             // throttler for consistency.
             setJobStatusThrottled(status, { force: true });
 
-            if (status.state === "succeeded" || status.state === "failed") {
+            if (isTerminal(status.state)) {
               setLastCompletedJobId(status.job_id);
               return;
             }
@@ -161,7 +170,7 @@ export function useJobPolling(): {
             console.warn("job status poll failed", msg);
           }
 
-          await sleep(2000);
+          await sleep(delayMs);
         }
       }
 
@@ -188,7 +197,7 @@ export function useJobPolling(): {
           try {
             const status = JSON.parse(String(evt.data)) as JobStatusResponse;
             setJobStatusThrottled(status);
-            if (status.state === "succeeded" || status.state === "failed") {
+            if (isTerminal(status.state)) {
               setLastCompletedJobId(status.job_id);
               closeSse();
             }
@@ -221,7 +230,7 @@ export function useJobPolling(): {
       // after the job disappears from /api/jobs/current.
       setJobStatus((prev) => {
         if (!prev) return null;
-        if (prev.state === "succeeded" || prev.state === "failed") return prev;
+        if (isTerminal(prev.state)) return prev;
         return null;
       });
     }